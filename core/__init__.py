@@ -5,9 +5,11 @@
 from .rule_loader import RuleLoader
 from .http_client import HttpClient
 from .selector import Selector
+from .reader_cache import ReaderCache
 
 __all__ = [
     'RuleLoader',
     'HttpClient',
-    'Selector'
+    'Selector',
+    'ReaderCache'
 ]
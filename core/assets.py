@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+静态资源构建（压缩、内容哈希命名、预压缩）
+"""
+import gzip
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # 可选依赖，未安装时只生成 gzip 文件
+    brotli = None
+
+
+class AssetPipeline:
+    """
+    静态资源构建
+
+    启动时把 static 下的 CSS/JS 去掉注释和多余空白，以内容哈希命名（如 js/app.3f2a9c1b7d.js）
+    写入输出目录，并生成 .gz（安装 brotli 时还有 .br）预压缩文件。文件名随内容变化，
+    因此可以设置长期不变的缓存；内容相同的文件不会重复写入，多个进程同时构建也是安全的。
+    """
+
+    HASH_LENGTH = 10
+
+    # 按 Accept-Encoding 选择预压缩文件的优先顺序
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, static_dir: str, output_dir: str, files: Iterable[str], gzip_level: int = 9):
+        """
+        初始化资源构建
+
+        Args:
+            static_dir: 源文件目录
+            output_dir: 构建输出目录
+            files: 要构建的文件（相对 static_dir 的路径）
+            gzip_level: gzip 压缩级别
+        """
+        self.static_dir = Path(static_dir)
+        self.output_dir = Path(output_dir)
+        self.files = list(files)
+        self.gzip_level = gzip_level
+        self.manifest: Dict[str, str] = {}  # 源文件路径 -> 构建后的文件名
+
+    def build(self) -> Dict[str, str]:
+        """
+        构建所有资源
+
+        Returns:
+            源文件路径到构建后文件名（相对输出目录）的映射
+        """
+        manifest = {}
+        for path in self.files:
+            source = self.static_dir / path
+            if not source.exists():
+                print(f"静态资源不存在，跳过: {path}")
+                continue
+
+            data = self.minify(path, source.read_text(encoding='utf-8')).encode('utf-8')
+            digest = hashlib.sha256(data).hexdigest()[:self.HASH_LENGTH]
+            stem, ext = os.path.splitext(path)
+            name = f"{stem}.{digest}{ext}"
+
+            target = self.output_dir / name
+            self._write(target, data)
+            self._write(target.with_name(target.name + '.gz'), lambda: gzip.compress(data, compresslevel=self.gzip_level, mtime=0))
+            if brotli is not None:
+                self._write(target.with_name(target.name + '.br'), lambda: brotli.compress(data))
+
+            manifest[path] = name
+
+        self.manifest = manifest
+        return manifest
+
+    def url(self, path: str) -> str:
+        """
+        获取资源 URL
+
+        Args:
+            path: 源文件路径（相对 static 目录）
+
+        Returns:
+            构建后的 /assets/ 地址，未构建时返回原 /static/ 地址
+        """
+        name = self.manifest.get(path)
+        return f"/assets/{name}" if name else f"/static/{path}"
+
+    def resolve(self, name: str, accept_encoding: str = '') -> Tuple[Optional[Path], Optional[str]]:
+        """
+        按客户端支持的编码选择要发送的文件
+
+        Args:
+            name: 构建后的文件名
+            accept_encoding: 请求的 Accept-Encoding 头
+
+        Returns:
+            (文件路径, 内容编码)，不是构建产物时返回 (None, None)，未压缩时编码为 None
+        """
+        if name not in self.manifest.values():
+            return None, None
+
+        path = self.output_dir / name
+        accepted = {item.split(';')[0].strip().lower() for item in accept_encoding.split(',')}
+        for encoding, suffix in self.ENCODINGS:
+            encoded = path.with_name(path.name + suffix)
+            if encoding in accepted and encoded.exists():
+                return encoded, encoding
+        return path, None
+
+    @classmethod
+    def minify(cls, path: str, text: str) -> str:
+        """
+        按文件类型压缩
+
+        Args:
+            path: 文件路径（用于判断类型）
+            text: 文件内容
+
+        Returns:
+            压缩后的内容，不认识的类型原样返回
+        """
+        if path.endswith('.css'):
+            return cls.minify_css(text)
+        if path.endswith('.js'):
+            return cls.minify_js(text)
+        return text
+
+    @staticmethod
+    def minify_css(text: str) -> str:
+        """去掉 CSS 注释，合并空白，去掉括号、分号和逗号两侧的空白"""
+        text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+        text = re.sub(r'\s+', ' ', text)
+        text = re.sub(r'\s*([{};,>])\s*', r'\1', text)
+        return text.replace(';}', '}').strip()
+
+    @staticmethod
+    def minify_js(text: str) -> str:
+        """
+        保守地压缩 JavaScript：去掉行首尾空白、空行和整行注释，保留换行（不改变自动分号插入的结果）。
+        模板字符串中的行首空白也会被去掉，项目中的模板字符串都是 HTML，不受影响。
+        """
+        lines = []
+        for line in text.split('\n'):
+            line = line.strip()
+            if line and not line.startswith('//'):
+                lines.append(line)
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _write(path: Path, data):
+        """写入文件（已存在时跳过，先写临时文件再替换，避免读到写了一半的文件）"""
+        if path.exists():
+            return
+        if callable(data):
+            data = data()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        temp.write_bytes(data)
+        os.replace(temp, path)
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+书源熔断器（连续失败后暂停访问，冷却后放行探测请求）
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+import requests
+from core.storage import Storage
+
+
+class CircuitOpenError(requests.RequestException):
+    """熔断器打开时拒绝请求（继承 RequestException，调用方按网络错误处理即可）"""
+
+
+class CircuitBreaker:
+    """
+    熔断器
+
+    closed：正常放行，连续失败达到 failure_threshold 次后打开；
+    open：直接拒绝请求，经过 recovery_timeout 秒后进入 half_open；
+    half_open：只放行一个探测请求，成功则关闭，失败则重新打开。
+
+    提供 storage 时状态保存在数据库中，由所有进程共享（多 worker 部署时一个进程打开熔断器，其他进程同样暂停访问）：
+    每次判断前读取数据库中的状态，状态变化在写事务中完成，半开状态下所有进程只有一个能占用探测名额。
+    请求成功且熔断器本来就是关闭状态时不写数据库。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 storage: Optional[Storage] = None):
+        """
+        初始化熔断器
+
+        Args:
+            name: 名称（书源名称）
+            failure_threshold: 连续失败多少次后打开
+            recovery_timeout: 打开后多久放行探测请求（秒）
+            storage: SQLite 存储，为 None 时状态只保存在本进程内存中
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.storage = storage
+
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at = 0.0  # 探测请求发出的时间，0 表示没有进行中的探测
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """当前状态"""
+        with self._lock:
+            self._load()
+            return self._current_state()
+
+    def is_open(self) -> bool:
+        """
+        是否正在拒绝请求（不改变状态，用于调用前快速判断）
+
+        Returns:
+            打开且未到探测时间，或正在探测时返回 True
+        """
+        with self._lock:
+            self._load()
+            state = self._current_state()
+            if state == self.OPEN:
+                return True
+            return state == self.HALF_OPEN and self._probe_in_flight()
+
+    def allow_request(self) -> bool:
+        """
+        请求是否可以发出（半开状态下会占用探测名额）
+
+        Returns:
+            是否放行
+        """
+        with self._lock:
+            self._load()
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.OPEN or self._probe_in_flight():
+                return False
+
+            # 占用探测名额（共享状态时在写事务中重新判断，其他进程可能已经占用）
+            return self._update(self._take_probe)
+
+    def before_request(self):
+        """
+        请求前检查
+
+        Raises:
+            CircuitOpenError: 熔断器打开
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(f"书源 {self.name} 暂时不可用（熔断中）")
+
+    def on_success(self):
+        """记录成功，关闭熔断器"""
+        with self._lock:
+            self._load()
+            # 已经是关闭状态时不需要写入
+            if self._state == self.CLOSED and self._failures == 0 and not self._probe_at:
+                return
+            self._update(self._close)
+
+    def on_failure(self):
+        """记录失败，连续失败达到阈值或探测失败时打开熔断器"""
+        with self._lock:
+            self._update(self._record_failure)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取熔断器状态
+
+        Returns:
+            状态字典（retry_in 为距离下次探测的秒数）
+        """
+        with self._lock:
+            self._load()
+            state = self._current_state()
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = max(0, round(self._opened_at + self.recovery_timeout - time.time()))
+            return {
+                'state': state,
+                'failures': self._failures,
+                'retry_in': retry_in
+            }
+
+    def _take_probe(self) -> bool:
+        """半开且没有进行中的探测时占用探测名额（调用方需持有锁）"""
+        state = self._current_state()
+        if state == self.CLOSED:
+            return True
+        if state == self.OPEN or self._probe_in_flight():
+            return False
+
+        self._state = self.HALF_OPEN
+        self._probe_at = time.time()
+        return True
+
+    def _close(self):
+        """关闭熔断器（调用方需持有锁）"""
+        self._state = self.CLOSED
+        self._failures = 0
+        self._probe_at = 0.0
+
+    def _record_failure(self):
+        """失败计数加 1，达到阈值或探测失败时打开（调用方需持有锁）"""
+        self._failures += 1
+        self._probe_at = 0.0
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                print(f"书源 {self.name} 连续失败 {self._failures} 次，暂停访问 {self.recovery_timeout:.0f} 秒")
+            self._state = self.OPEN
+            self._opened_at = time.time()
+
+    def _load(self, conn=None):
+        """从数据库读取共享状态（没有 storage 时不做任何事，调用方需持有锁）"""
+        if self.storage is None:
+            return
+
+        sql = 'SELECT state, failures, opened_at, probe_at FROM circuit_breakers WHERE name = ?'
+        if conn is not None:
+            row = conn.execute(sql, (self.name,)).fetchone()
+        else:
+            row = self.storage.query_one(sql, (self.name,))
+        if row is None:
+            row = (self.CLOSED, 0, 0.0, 0.0)
+        self._state, self._failures, self._opened_at, self._probe_at = row
+
+    def _update(self, change: Callable[[], Any]) -> Any:
+        """
+        修改状态：共享状态时在写事务中读取最新状态、修改后写回（调用方需持有锁）
+
+        Args:
+            change: 修改内存中状态的函数
+
+        Returns:
+            change 的返回值
+        """
+        if self.storage is None:
+            return change()
+
+        with self.storage.transaction() as conn:
+            # 立即获取写锁，读取和写回之间其他进程不能修改
+            conn.execute('BEGIN IMMEDIATE')
+            self._load(conn)
+            result = change()
+            conn.execute(
+                'INSERT OR REPLACE INTO circuit_breakers (name, state, failures, opened_at, probe_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (self.name, self._state, self._failures, self._opened_at, self._probe_at, int(time.time() * 1000))
+            )
+        return result
+
+    def _current_state(self) -> str:
+        """计算当前状态：打开超过冷却时间后视为半开（调用方需持有锁）"""
+        if self._state == self.OPEN and time.time() - self._opened_at >= self.recovery_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def _probe_in_flight(self) -> bool:
+        """是否有进行中的探测请求，超时未回报的探测视为已结束（调用方需持有锁）"""
+        return self._probe_at > 0 and time.time() - self._probe_at < self.recovery_timeout
+
+
+class CircuitBreakerRegistry:
+    """按书源名称管理熔断器"""
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 storage: Optional[Storage] = None):
+        """
+        初始化熔断器注册表
+
+        Args:
+            failure_threshold: 连续失败多少次后打开
+            recovery_timeout: 打开后多久放行探测请求（秒）
+            storage: SQLite 存储，提供时熔断器状态由所有进程共享
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.storage = storage
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        """
+        获取书源的熔断器（不存在时创建）
+
+        Args:
+            name: 书源名称
+
+        Returns:
+            熔断器
+        """
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, self.failure_threshold, self.recovery_timeout, self.storage)
+                self._breakers[name] = breaker
+            return breaker
+
+    def stats(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        获取书源熔断器状态
+
+        Args:
+            name: 书源名称
+
+        Returns:
+            状态字典，从未请求过的书源返回 None
+        """
+        with self._lock:
+            breaker = self._breakers.get(name)
+        return breaker.stats() if breaker else None
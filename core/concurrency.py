@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+自适应并发控制（AIMD：请求正常时线性增加并发，限流、超时或延迟飙升时成倍减少）
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class AdaptiveLimiter:
+    """
+    自适应并发限制器
+
+    每完成约 limit 个健康请求（延迟不超过基线的 latency_factor 倍）并发数加 1；
+    遇到 429/503、超时、连接错误或延迟飙升时并发数乘以 decrease_factor。
+    并发数始终在 [min_limit, max_limit] 范围内；在上次下调之前发出的请求失败时不再下调，
+    避免同一波失败把并发数连续压到最低。
+    """
+
+    # 视为被书源限流的状态码
+    THROTTLE_STATUS = (429, 503)
+
+    def __init__(
+        self,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        initial_limit: Optional[int] = None,
+        decrease_factor: float = 0.5,
+        latency_factor: float = 3.0,
+        latency_alpha: float = 0.1
+    ):
+        """
+        初始化并发限制器
+
+        Args:
+            min_limit: 最小并发数
+            max_limit: 最大并发数
+            initial_limit: 初始并发数，默认为最小值和最大值的中间值
+            decrease_factor: 下调时的乘数
+            latency_factor: 延迟超过基线的倍数时视为延迟飙升
+            latency_alpha: 基线延迟的指数平滑系数
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        if initial_limit is None:
+            initial_limit = (self.min_limit + self.max_limit) // 2
+        self._limit = min(max(initial_limit, self.min_limit), self.max_limit)
+
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.latency_alpha = latency_alpha
+
+        self._in_use = 0
+        self._successes = 0  # 上次调整后的健康请求数
+        self._baseline: Optional[float] = None  # 基线延迟（秒）
+        self._last_decrease = 0.0  # 上次下调的时间
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """当前并发数上限"""
+        return self._limit
+
+    def acquire(self):
+        """占用一个并发名额，已满时等待"""
+        with self._condition:
+            while self._in_use >= self._limit:
+                self._condition.wait()
+            self._in_use += 1
+
+    def release(self):
+        """释放并发名额"""
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self):
+        """在并发名额内执行"""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def on_success(self, latency: float):
+        """
+        记录一次成功的请求
+
+        Args:
+            latency: 请求耗时（秒）
+        """
+        started_at = time.time() - latency
+        with self._condition:
+            spike = self._baseline is not None and latency > self._baseline * self.latency_factor
+
+            # 飙升的延迟同样计入基线，书源整体变慢后基线会随之上移，不会一直下调
+            if self._baseline is None:
+                self._baseline = latency
+            else:
+                self._baseline += self.latency_alpha * (latency - self._baseline)
+
+            if spike:
+                self._decrease(started_at)
+                return
+
+            # 加性增长：每一轮（约 limit 个请求）加 1
+            self._successes += 1
+            if self._successes >= self._limit and self._limit < self.max_limit:
+                self._limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    def on_failure(self, status: Optional[int] = None, started_at: Optional[float] = None):
+        """
+        记录一次失败的请求
+
+        Args:
+            status: HTTP 状态码，超时或连接错误时为 None
+            started_at: 请求发出的时间，默认为当前时间
+        """
+        # 404 等客户端错误与书源负载无关，不调整并发
+        if status is not None and status not in self.THROTTLE_STATUS and status < 500:
+            return
+
+        with self._condition:
+            self._decrease(started_at if started_at is not None else time.time())
+
+    def stats(self) -> Dict[str, float]:
+        """
+        获取当前状态
+
+        Returns:
+            状态字典
+        """
+        with self._condition:
+            return {
+                'limit': self._limit,
+                'in_use': self._in_use,
+                'baseline_latency': round(self._baseline, 3) if self._baseline is not None else None
+            }
+
+    def _decrease(self, started_at: float):
+        """乘性下调并发数（调用方需持有锁）"""
+        self._successes = 0
+
+        # 请求在上次下调之前发出，反映的是下调前的并发，不再重复下调
+        if started_at < self._last_decrease:
+            return
+
+        self._last_decrease = time.time()
+        self._limit = max(self.min_limit, int(self._limit * self.decrease_factor))
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+内容存储（磁盘持久化的章节与目录缓存，阅读器和下载器共用）
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+from models.book import Book
+from models.chapter import Chapter
+from models.chapter_table import ChapterTable
+from core.storage import Storage
+from core.validators import ChapterValidation
+
+
+class ContentStore:
+    """
+    磁盘内容存储
+
+    章节按 (书源, 章节 URL) 索引，书籍信息和目录按 (书源, 书籍 URL) 索引，
+    索引保存在 SQLite 的 cache_entries 表中；正文以内容哈希去重，zlib 压缩后存放在 objects 目录下。
+
+    目录更新、重新下载后旧的对象不再被索引引用，由 gc 定期清理；设置 max_bytes 时，
+    对象总大小超出上限后按最近使用时间（updated_at，读取时最多每天刷新一次）淘汰最久未用的索引记录。
+    """
+
+    KIND_BOOK = 'book'
+    KIND_CHAPTER = 'chapter'
+
+    # 读取时刷新 updated_at 的最小间隔（秒），避免每次读取都写数据库
+    TOUCH_INTERVAL = 24 * 60 * 60
+
+    # 没有索引引用的对象至少存在这么久才删除（秒），避免删除刚写入、索引还没写入的对象
+    GC_GRACE = 60 * 60
+
+    def __init__(
+        self,
+        storage: Storage,
+        root_dir: str = "cache",
+        compress_level: int = 6,
+        max_bytes: Optional[int] = None,
+        gc_interval: Optional[float] = None
+    ):
+        """
+        初始化内容存储
+
+        Args:
+            storage: SQLite 存储
+            root_dir: 存储根目录
+            compress_level: zlib 压缩级别（1-9）
+            max_bytes: 对象总大小上限（字节），为 None 时不限制
+            gc_interval: 后台清理的间隔（秒），为 None 时不启动后台清理（可手动调用 gc）
+        """
+        self.storage = storage
+        self.root_dir = Path(root_dir)
+        self.objects_dir = self.root_dir / "objects"
+        self.compress_level = compress_level
+        self.max_bytes = max_bytes
+        self.gc_interval = gc_interval
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        if gc_interval:
+            thread = threading.Thread(target=self._gc_loop, daemon=True)
+            thread.start()
+
+    # ==================== 章节 ====================
+    def get_chapter(self, source: str, url: str) -> Optional[Dict[str, Any]]:
+        """
+        读取已存储的章节
+
+        Args:
+            source: 书源名称
+            url: 章节 URL
+
+        Returns:
+            章节数据（title、content、url），不存在返回 None
+        """
+        row = self.storage.query_one(
+            'SELECT title, hash, updated_at FROM cache_entries WHERE kind = ? AND source = ? AND url = ?',
+            (self.KIND_CHAPTER, source, url)
+        )
+        if not row:
+            return None
+
+        content = self._read_object(row[1])
+        if content is None:
+            return None
+        self._touch_entry(self.KIND_CHAPTER, source, url, row[2])
+
+        return {
+            'title': row[0],
+            'content': content.decode('utf-8'),
+            'url': url
+        }
+
+    def put_chapter(self, source: str, url: str, title: str, content: str):
+        """
+        存储章节
+
+        Args:
+            source: 书源名称
+            url: 章节 URL
+            title: 章节标题
+            content: 章节正文
+        """
+        if not content:
+            return
+
+        content_hash = self._write_object(content.encode('utf-8'))
+        self._put_entry(self.KIND_CHAPTER, source, url, title or '', content_hash)
+
+    def fetch_chapter(self, source: str, chapter: Chapter, loader: Callable[[Chapter], Chapter],
+                      validation: Optional[ChapterValidation] = None) -> Chapter:
+        """
+        读穿式获取章节：先读存储，未命中时调用 loader 抓取并写回存储
+
+        Args:
+            source: 书源名称
+            chapter: 章节对象（包含 URL）
+            loader: 抓取函数，如 ChapterParser.parse
+            validation: 章节校验，提供时只有通过校验的内容才写入存储，存储中未通过校验的内容重新抓取；
+                失败原因写入 chapter.error
+
+        Returns:
+            填充了内容的章节对象
+        """
+        stored = self.get_chapter(source, chapter.url)
+        if stored:
+            if not chapter.title:
+                chapter.title = stored['title']
+            chapter.content = stored['content']
+            if validation is None or validation.validate(chapter)[0] is None:
+                return chapter
+
+        chapter = loader(chapter)
+        if not chapter or not chapter.content:
+            return chapter
+
+        if validation is not None:
+            chapter.error = validation.validate(chapter)[0]
+            if chapter.error:
+                return chapter
+
+        self.put_chapter(source, chapter.url, chapter.title, chapter.content)
+        return chapter
+
+    # ==================== 书籍信息与目录 ====================
+    def get_book(self, source: str, book_url: str) -> Optional[Dict[str, Any]]:
+        """
+        读取已存储的书籍信息和目录
+
+        Args:
+            source: 书源名称
+            book_url: 书籍详情页 URL
+
+        Returns:
+            书籍数据（chapters 为 ChapterTable），不存在返回 None
+        """
+        row = self.storage.query_one(
+            'SELECT hash, updated_at FROM cache_entries WHERE kind = ? AND source = ? AND url = ?',
+            (self.KIND_BOOK, source, book_url)
+        )
+        if not row:
+            return None
+
+        data = self._read_object(row[0])
+        if data is None:
+            return None
+        self._touch_entry(self.KIND_BOOK, source, book_url, row[1])
+
+        book_data = json.loads(data.decode('utf-8'))
+
+        # 目录以紧凑格式存储在 toc 中，旧版本存储的是 chapters 字典列表
+        if 'toc' in book_data:
+            book_data['chapters'] = ChapterTable.from_dict(book_data.pop('toc'))
+        else:
+            book_data['chapters'] = ChapterTable.from_list(book_data.get('chapters') or [])
+        return book_data
+
+    def put_book(self, source: str, book_url: str, book_data: Dict[str, Any]):
+        """
+        存储书籍信息和目录
+
+        Args:
+            source: 书源名称
+            book_url: 书籍详情页 URL
+            book_data: 书籍数据（chapters 为 ChapterTable）
+        """
+        book_data = dict(book_data)
+        book_data['toc'] = book_data.pop('chapters').to_dict()
+        data = json.dumps(book_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        content_hash = self._write_object(data)
+        self._put_entry(self.KIND_BOOK, source, book_url, book_data.get('book_name') or '', content_hash)
+
+    @staticmethod
+    def book_to_dict(book: Book, chapters: Iterable[Chapter]) -> Dict[str, Any]:
+        """
+        将书籍信息和目录转换为存储使用的字典
+
+        Args:
+            book: 书籍对象
+            chapters: 章节列表或目录表
+
+        Returns:
+            书籍数据字典（chapters 为 ChapterTable）
+        """
+        return {
+            'book_name': book.book_name,
+            'author': book.author,
+            'intro': book.intro,
+            'category': book.category,
+            'cover_url': book.cover_url,
+            'latest_chapter': book.latest_chapter,
+            'status': book.status,
+            'chapters': chapters if isinstance(chapters, ChapterTable) else ChapterTable.from_chapters(chapters)
+        }
+
+    # ==================== 清理 ====================
+    def gc(self) -> Dict[str, int]:
+        """
+        清理内容对象：超出大小上限时淘汰最久未用的索引记录，再删除没有索引引用的对象
+
+        Returns:
+            统计信息（evicted_entries、removed_objects、freed_bytes、total_bytes）
+        """
+        now = time.time()
+        sizes = {}  # 内容哈希 -> (文件路径, 大小, 修改时间)
+        removed_objects = 0
+        freed_bytes = 0
+
+        for shard in os.scandir(self.objects_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                if entry.name.endswith('.z'):
+                    sizes[entry.name[:-2]] = (entry.path, stat.st_size, stat.st_mtime)
+                elif entry.name.endswith('.tmp') and now - stat.st_mtime > self.GC_GRACE:
+                    # 写入中途退出留下的临时文件
+                    self._remove_file(entry.path)
+
+        evicted = self._evict_entries(sizes) if self.max_bytes else 0
+
+        referenced = {content_hash for (content_hash,) in self.storage.query('SELECT DISTINCT hash FROM cache_entries')}
+        for content_hash, (path, size, mtime) in sizes.items():
+            if content_hash in referenced or now - mtime < self.GC_GRACE:
+                continue
+            if self._remove_file(path):
+                removed_objects += 1
+                freed_bytes += size
+
+        total_bytes = sum(size for _, size, _ in sizes.values()) - freed_bytes
+        return {
+            'evicted_entries': evicted,
+            'removed_objects': removed_objects,
+            'freed_bytes': freed_bytes,
+            'total_bytes': total_bytes
+        }
+
+    def _evict_entries(self, sizes: Dict[str, tuple]) -> int:
+        """按最近使用时间从新到旧累计对象大小，删除超出上限的索引记录，返回删除数"""
+        rows = self.storage.query(
+            'SELECT kind, source, url, hash, updated_at FROM cache_entries ORDER BY updated_at DESC'
+        )
+
+        total = 0
+        counted = set()
+        evict = []
+        for kind, source, url, content_hash, updated_at in rows:
+            if content_hash not in counted:
+                counted.add(content_hash)
+                total += sizes.get(content_hash, (None, 0, 0))[1]
+            if total > self.max_bytes:
+                evict.append((kind, source, url, content_hash, updated_at))
+
+        if evict:
+            # 记录在此期间被重新写入或读取时保留
+            self.storage.execute_many(
+                'DELETE FROM cache_entries WHERE kind = ? AND source = ? AND url = ? AND hash = ? AND updated_at = ?',
+                evict
+            )
+        return len(evict)
+
+    def _gc_loop(self):
+        """后台定期清理"""
+        while True:
+            time.sleep(self.gc_interval)
+            try:
+                stats = self.gc()
+                if stats['evicted_entries'] or stats['removed_objects']:
+                    print(f"内容存储清理: 淘汰 {stats['evicted_entries']} 条记录，删除 {stats['removed_objects']} 个对象，"
+                          f"释放 {stats['freed_bytes'] / 1024 / 1024:.1f} MB")
+            except Exception as e:
+                print(f"清理内容存储失败: {e}")
+
+    @staticmethod
+    def _remove_file(path: str) -> bool:
+        """删除文件，失败时返回 False"""
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    # ==================== 内部实现 ====================
+    def _touch_entry(self, kind: str, source: str, url: str, updated_at: int):
+        """读取时刷新索引记录的使用时间（距上次刷新超过 TOUCH_INTERVAL 时）"""
+        now = int(time.time())
+        if now - updated_at < self.TOUCH_INTERVAL:
+            return
+        self.storage.execute(
+            'UPDATE cache_entries SET updated_at = ? WHERE kind = ? AND source = ? AND url = ?',
+            (now, kind, source, url)
+        )
+
+    def _put_entry(self, kind: str, source: str, url: str, title: str, content_hash: str):
+        """写入索引记录"""
+        self.storage.execute(
+            'INSERT OR REPLACE INTO cache_entries (kind, source, url, title, hash, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (kind, source, url, title, content_hash, int(time.time()))
+        )
+
+    def _object_path(self, content_hash: str) -> Path:
+        """获取内容对象的文件路径"""
+        return self.objects_dir / content_hash[:2] / f"{content_hash}.z"
+
+    def _write_object(self, data: bytes) -> str:
+        """写入内容对象（相同内容只保存一份），返回内容哈希"""
+        content_hash = hashlib.sha1(data).hexdigest()
+        path = self._object_path(content_hash)
+        if path.exists():
+            # 刷新修改时间，清理时不会把即将被新索引引用的对象当作孤立对象删除
+            try:
+                os.utime(path)
+                return content_hash
+            except OSError:
+                pass
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 先写临时文件再重命名，避免并发写入时读到半个文件
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(zlib.compress(data, self.compress_level))
+        os.replace(tmp_path, path)
+
+        return content_hash
+
+    def _read_object(self, content_hash: str) -> Optional[bytes]:
+        """读取内容对象"""
+        path = self._object_path(content_hash)
+        try:
+            with open(path, 'rb') as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error) as e:
+            print(f"读取缓存内容失败 ({content_hash}): {e}")
+            return None
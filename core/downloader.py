@@ -2,30 +2,60 @@
 """
 下载器
 """
+import multiprocessing
 import os
+import queue
+import threading
 import time
 from pathlib import Path
-from typing import List, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Iterator, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from models.book import Book
 from models.chapter import Chapter
+from models.chapter_table import ChapterTable
 from models.rule import Rule
 from core.http_client import HttpClient
+from core.concurrency import AdaptiveLimiter
+from core.hedging import HedgePolicy
+from core.validators import ChapterValidation, ChapterValidator
+from core.content_store import ContentStore
+from core import parse_worker
 from parsers.book_parser import BookParser
 from parsers.toc_parser import TocParser
 from parsers.chapter_parser import ChapterParser
 from utils.file_utils import FileUtils
+from utils.epub_writer import EpubWriter
 
 
 class Downloader:
-    """小说下载器"""
+    """
+    小说下载器
+
+    章节下载分为两级：线程池负责请求网页（I/O），进程池负责选择器提取和过滤（CPU），
+    解析不再受 GIL 限制。每个下载线程同一时间只有一个页面在等待解析，两级之间的排队数量不超过线程数。
+    """
+
+    # 章节数少于该值时不启动解析进程（进程启动开销大于收益）
+    PROCESS_PARSE_MIN_CHAPTERS = 20
+
+    # 规则没有配置 threads/maxThreads 时的并发上限
+    DEFAULT_MAX_THREADS = 16
 
     def __init__(
         self,
         rule: Rule,
         output_dir: str = "downloads",
         max_workers: int = 5,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        content_store: Optional[ContentStore] = None,
+        parse_processes: Optional[int] = None,
+        hedge_requests: bool = True,
+        validators: Optional[List[ChapterValidator]] = None,
+        repair_rounds: int = 2,
+        repair_backoff: float = 5.0,
+        chapter_callback: Optional[callable] = None,
+        epub_compress_level: int = 6
     ):
         """
         初始化下载器
@@ -33,18 +63,48 @@ class Downloader:
         Args:
             rule: 书源规则
             output_dir: 输出目录
-            max_workers: 最大并发数
+            max_workers: 初始并发数（之后根据书源的响应自适应调整）
             progress_callback: 进度回调函数
+            content_store: 内容存储，提供时优先复用已缓存的书籍信息、目录和章节
+            parse_processes: 解析章节的进程数，默认为 CPU 核数，为 0 时在下载线程内解析
+            hedge_requests: 是否对耗时超过 p95 的请求补发一次（补发数量受预算限制）
+            validators: 章节校验器列表，默认为拦截页、过短和重复内容校验
+            repair_rounds: 校验失败章节的重新获取轮数
+            repair_backoff: 第一轮重新获取前的等待时间（秒），之后每轮翻倍
+            chapter_callback: 章节结果回调函数，下载结束时以章节结果列表调用一次
+            epub_compress_level: EPUB 的压缩级别（0-9）
         """
         self.rule = rule
         self.output_dir = output_dir
         self.max_workers = max_workers
         self.progress_callback = progress_callback
+        self.content_store = content_store
+        self.parse_processes = (os.cpu_count() or 1) if parse_processes is None else parse_processes
+        self.validation = ChapterValidation(validators)
+        self.repair_rounds = repair_rounds
+        self.repair_backoff = repair_backoff
+        self.chapter_callback = chapter_callback
+        self.chapter_results: List[dict] = []
+        self.epub_compress_level = epub_compress_level
+        self._hard_failures = set()  # 最近一次校验为硬失败的章节序号（下载线程中读写，需持有 _hard_failures_lock）
+        self._hard_failures_lock = threading.Lock()
+        self._epub: Optional[EpubWriter] = None  # 输出 EPUB 时边下载边写入
 
         # 根据规则调整配置
-        if rule.crawl:
-            if rule.crawl.threads:
-                self.max_workers = rule.crawl.threads
+        crawl = rule.crawl
+        if crawl:
+            if crawl.threads:
+                self.max_workers = crawl.threads
+
+        # 自适应并发：规则配置了 threads 而没有 maxThreads 时，threads 即为上限
+        self.limiter = AdaptiveLimiter(
+            min_limit=crawl.min_threads if crawl and crawl.min_threads else 1,
+            max_limit=(crawl.max_threads if crawl and crawl.max_threads
+                       else crawl.threads if crawl and crawl.threads
+                       else self.DEFAULT_MAX_THREADS),
+            initial_limit=self.max_workers
+        )
+        self.hedge = HedgePolicy() if hedge_requests else None
 
         # 创建 HTTP 客户端
         min_interval = rule.crawl.min_interval if rule.crawl and rule.crawl.min_interval else 0
@@ -55,7 +115,9 @@ class Downloader:
             max_retries=max_retries,
             min_interval=min_interval,
             max_interval=max_interval,
-            verify_ssl=not rule.ignore_ssl
+            verify_ssl=not rule.ignore_ssl,
+            limiter=self.limiter,
+            hedge=self.hedge
         )
 
         # 创建解析器
@@ -77,7 +139,7 @@ class Downloader:
             book_url: 书籍详情页 URL
             start_chapter: 起始章节（从 1 开始）
             end_chapter: 结束章节（-1 表示到最后）
-            format: 输出格式（txt）
+            format: 输出格式（txt、epub、chapters）
 
         Returns:
             是否成功
@@ -89,44 +151,40 @@ class Downloader:
         start_time = time.time()
 
         try:
-            # 1. 解析书籍详情
-            print("正在获取书籍信息...")
-            if self.progress_callback:
-                self.progress_callback("parsing_book", 0, 0, "", "")
-
-            book = self.book_parser.parse(book_url)
+            # 1. 获取书籍信息
+            book, stored_book = self._load_book_info(book_url)
             if not book:
-                print("获取书籍信息失败")
                 return False
 
-            print(f"书名: {book.book_name}")
-            print(f"作者: {book.author}")
-            if book.intro:
-                print(f"简介: {book.intro[:100]}...")
-            print()
+            # EPUB 边下载边写入：校验通过的章节直接写入文件并释放正文
+            if format == "epub":
+                self._epub = self._open_epub(book)
+
+            # 2. 获取目录并下载章节内容（目录边解析边下载，分页目录不必等全部页面获取完）
+            toc = self._iter_toc(book_url, book, stored_book)
+            chapters = self._chapter_range(toc, start_chapter, end_chapter)
+            chapters = self._prepare_download(book, chapters)
 
-            # 2. 解析目录
-            print("正在获取章节目录...")
+            print(f"开始下载章节 (并发数: {self.concurrency}, 范围: {self.limiter.min_limit}-{self.limiter.max_limit})...")
             if self.progress_callback:
-                self.progress_callback("parsing_toc", 0, 0, book.book_name, book.author)
+                self.progress_callback("downloading", 0, 0, book.book_name, book.author)
+
+            chapters = self._download_chapters(chapters, book.book_name, book.author)
 
-            chapters = self.toc_parser.parse(book_url, start_chapter, end_chapter)
             if not chapters:
                 print("获取章节目录失败")
                 return False
 
-            print(f"共 {len(chapters)} 章\n")
-
-            # 3. 下载章节内容
-            print(f"开始下载章节 (并发数: {self.max_workers})...")
-            if self.progress_callback:
-                self.progress_callback("downloading", 0, len(chapters), book.book_name, book.author)
+            # 3. 重新获取校验失败的章节
+            repaired = self._repair_chapters(chapters, book.book_name, book.author)
+            self._report_chapters(chapters, repaired)
 
-            chapters = self._download_chapters(chapters, book.book_name, book.author)
-
-            # 统计成功数量
-            success_count = sum(1 for c in chapters if c.content)
+            # 统计成功数量（校验通过的章节写入 EPUB 后正文已释放）
+            success_count = sum(1 for c in chapters if c.content or not c.error)
             print(f"\n成功下载 {success_count}/{len(chapters)} 章")
+            if self.hedge:
+                stats = self.hedge.stats()
+                print(f"补发请求 {stats['hedged']} 次，其中 {stats['hedge_wins']} 次先返回 (p95: {stats['p95']} 秒)")
 
             # 4. 保存文件
             print("\n正在保存文件...")
@@ -143,55 +201,397 @@ class Downloader:
             return False
 
         finally:
+            if self._epub:
+                self._epub.abort()
+                self._epub = None
             self.http_client.close()
 
-    def _download_chapters(self, chapters: List[Chapter], book_name: str = "", author: str = "") -> List[Chapter]:
+    def _load_book(self, book_url: str) -> Tuple[Optional[Book], List[Chapter]]:
         """
-        并发下载章节内容
+        获取书籍信息和完整目录（网络获取失败时使用内容存储中的缓存）
 
         Args:
-            chapters: 章节列表
+            book_url: 书籍详情页 URL
+
+        Returns:
+            (书籍对象, 章节列表)，获取书籍信息失败时书籍为 None
+        """
+        book, stored_book = self._load_book_info(book_url)
+        if not book:
+            return None, []
+        return book, list(self._iter_toc(book_url, book, stored_book))
+
+    def _load_book_info(self, book_url: str) -> Tuple[Optional[Book], Optional[dict]]:
+        """
+        获取书籍信息（网络获取失败时使用内容存储中的缓存）
+
+        Args:
+            book_url: 书籍详情页 URL
+
+        Returns:
+            (书籍对象, 使用缓存时的缓存数据)，获取失败时书籍为 None
+        """
+        print("正在获取书籍信息...")
+        if self.progress_callback:
+            self.progress_callback("parsing_book", 0, 0, "", "")
+
+        book = self.book_parser.parse(book_url)
+        stored_book = None
+        if not book and self.content_store:
+            stored_book = self.content_store.get_book(self.rule.name, book_url)
+            if stored_book:
+                print("网络获取失败，使用已缓存的书籍信息")
+                book = self._book_from_dict(book_url, stored_book)
+
+        if not book:
+            print("获取书籍信息失败")
+            return None, None
+
+        print(f"书名: {book.book_name}")
+        print(f"作者: {book.author}")
+        if book.intro:
+            print(f"简介: {book.intro[:100]}...")
+        print()
+
+        return book, stored_book
+
+    def _iter_toc(self, book_url: str, book: Book, stored_book: Optional[dict] = None) -> Iterator[Chapter]:
+        """
+        逐页产出完整目录，全部获取后写入内容存储（网络获取失败时使用缓存的目录）
+
+        Args:
+            book_url: 书籍详情页 URL
+            book: 书籍对象
+            stored_book: 书籍信息来自缓存时的缓存数据
+
+        Yields:
+            章节
+        """
+        print("正在获取章节目录...")
+        if self.progress_callback:
+            self.progress_callback("parsing_toc", 0, 0, book.book_name, book.author)
+
+        if stored_book:
+            yield from self._chapters_from_dict(stored_book)
+            return
+
+        # 完整目录以紧凑的目录表保存，不保留下载用的章节对象
+        chapters = ChapterTable()
+        for batch in self.toc_parser.iter_batches(book_url):
+            chapters.extend(batch)
+            yield from batch
+
+        if chapters:
+            print(f"成功解析目录，共 {len(chapters)} 章")
+            # 完整目录写入内容存储，供阅读器复用
+            if self.content_store:
+                self.content_store.put_book(self.rule.name, book_url, ContentStore.book_to_dict(book, chapters))
+        elif self.content_store:
+            stored_book = self.content_store.get_book(self.rule.name, book_url)
+            if stored_book:
+                print("网络获取失败，使用已缓存的章节目录")
+                yield from self._chapters_from_dict(stored_book)
+
+    @staticmethod
+    def _chapter_range(chapters: Iterable[Chapter], start_chapter: int, end_chapter: int) -> Iterator[Chapter]:
+        """
+        按范围筛选章节，产出结束章节后立即停止，不再读取后面的目录（分页目录不再请求后续页面）
+
+        Args:
+            chapters: 按序号递增产出的章节
+            start_chapter: 起始章节
+            end_chapter: 结束章节（-1 表示到最后）
+
+        Yields:
+            范围内的章节
+        """
+        for chapter in chapters:
+            if end_chapter != -1 and chapter.index > end_chapter:
+                return
+            if chapter.index >= start_chapter:
+                yield chapter
+            if end_chapter != -1 and chapter.index >= end_chapter:
+                return
+
+    def _prepare_download(self, book: Book, chapters: Iterable[Chapter]) -> Iterable[Chapter]:
+        """
+        下载章节前的准备（子类覆盖，如匹配其他书源）
+
+        Args:
+            book: 书籍对象
+            chapters: 要下载的章节（可能是边获取目录边产出的迭代器）
+
+        Returns:
+            要下载的章节
+        """
+        return chapters
+
+    def _download_chapters(self, chapters: Iterable[Chapter], book_name: str = "", author: str = "",
+                           stage: str = "downloading", refresh: bool = False) -> List[Chapter]:
+        """
+        并发下载章节内容（chapters 可以是边获取目录边产出的迭代器，每产出一章即提交下载）
+
+        Args:
+            chapters: 章节列表或迭代器
             book_name: 书名
             author: 作者
+            stage: 进度回调中的阶段名称
+            refresh: 为 True 时跳过内容存储直接请求书源
 
         Returns:
-            填充了内容的章节列表
+            填充了内容的章节列表（按提交顺序）
         """
+        submitted: List[Chapter] = []
+        future_to_chapter = {}
+        done = queue.Queue()
         completed_count = 0
-        total_count = len(chapters)
 
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # 提交所有任务
-            future_to_chapter = {
-                executor.submit(self.chapter_parser.parse, chapter): chapter
-                for chapter in chapters
-            }
+        parse_pool = None
+        chapter_parser = self.chapter_parser
 
-            # 按完成顺序处理结果
-            for future in as_completed(future_to_chapter):
-                chapter = future_to_chapter[future]
-                try:
-                    result = future.result()
-                    completed_count += 1
+        def handle(future):
+            """处理一个已完成的章节"""
+            nonlocal completed_count
+            chapter = future_to_chapter.pop(future)
+            completed_count += 1
 
-                    # 调用进度回调
-                    if self.progress_callback:
-                        self.progress_callback("downloading", completed_count, total_count, book_name, author)
+            # 目录还在获取时总数为已提交的章节数
+            total_count = len(submitted)
+            try:
+                result = future.result()
 
-                    # 显示进度
-                    status = "[OK]" if result.content else "[FAIL]"
-                    print(f"[{completed_count}/{total_count}] {status} {result.title}")
+                # 显示进度
+                if result.error:
+                    print(f"[{completed_count}/{total_count}] [FAIL] {result.title} - {result.error}")
+                else:
+                    print(f"[{completed_count}/{total_count}] [OK] {result.title}")
 
-                except Exception as e:
-                    completed_count += 1
+            except Exception as e:
+                chapter.error = str(e)
+                print(f"[{completed_count}/{total_count}] [FAIL] {chapter.title} - 错误: {e}")
 
-                    # 调用进度回调
-                    if self.progress_callback:
-                        self.progress_callback("downloading", completed_count, total_count, book_name, author)
+            self._write_epub_chapter(chapter)
 
-                    print(f"[{completed_count}/{total_count}] [FAIL] {chapter.title} - 错误: {e}")
+            # 调用进度回调
+            if self.progress_callback:
+                self.progress_callback(stage, completed_count, total_count, book_name, author)
 
-        return chapters
+        try:
+            # 线程数按上限创建，实际并发由 limiter 控制
+            with ThreadPoolExecutor(max_workers=self._thread_count()) as executor:
+                for chapter in chapters:
+                    # 章节数达到阈值时再启动解析进程（进程启动开销大于少量章节的收益）
+                    if len(submitted) == self.PROCESS_PARSE_MIN_CHAPTERS:
+                        parse_pool = self._create_parse_pool()
+                        chapter_parser = self._create_chapter_parser(parse_pool)
+
+                    future = executor.submit(self._fetch_chapter, chapter, chapter_parser, refresh)
+                    future_to_chapter[future] = chapter
+                    submitted.append(chapter)
+                    future.add_done_callback(done.put)
+
+                    # 处理获取目录期间已经完成的章节
+                    while not done.empty():
+                        handle(done.get())
+
+                # 按完成顺序处理其余结果
+                while completed_count < len(submitted):
+                    handle(done.get())
+        finally:
+            if parse_pool:
+                parse_pool.shutdown(wait=True, cancel_futures=True)
+
+        return submitted
+
+    @property
+    def concurrency(self) -> int:
+        """当前的请求并发数"""
+        return self.limiter.limit
+
+    def _thread_count(self) -> int:
+        """下载线程数（并发上限）"""
+        return self.limiter.max_limit
+
+    def _create_parse_pool(self) -> Optional[ProcessPoolExecutor]:
+        """
+        创建章节解析进程池
+
+        Returns:
+            进程池，不需要或无法创建时返回 None（在下载线程内解析）
+        """
+        if self.parse_processes <= 0:
+            return None
+
+        # 解析进程数不超过下载线程数，多出来的进程没有页面可解析
+        workers = min(self.parse_processes, self.limiter.max_limit)
+        try:
+            # 统一使用 spawn，避免在多线程进程中 fork；子进程的入口在没有导入副作用的 parse_worker 中
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=parse_worker.init_parse_process,
+                initargs=(self.rule,)
+            )
+        except Exception as e:
+            print(f"创建解析进程池失败，改为在下载线程内解析: {e}")
+            return None
+
+        print(f"解析进程数: {workers}")
+        return pool
+
+    def _create_chapter_parser(self, parse_pool: Optional[ProcessPoolExecutor]) -> ChapterParser:
+        """
+        创建下载使用的章节解析器（有进程池时把单页解析提交到进程池）
+
+        Args:
+            parse_pool: 解析进程池
+
+        Returns:
+            章节解析器
+        """
+        if not parse_pool:
+            return self.chapter_parser
+
+        def page_parser(content, encoding, page_url, need_title):
+            try:
+                future = parse_pool.submit(parse_worker.parse_page, content, encoding, page_url, need_title)
+                return future.result()
+            except (BrokenProcessPool, RuntimeError, OSError):
+                # 解析进程异常退出或进程池已关闭，退回当前线程解析
+                return self.chapter_parser.parse_page(content, encoding, page_url, need_title)
+
+        return ChapterParser(self.rule, self.http_client, page_parser=page_parser)
+
+    def _fetch_chapter(self, chapter: Chapter, chapter_parser: Optional[ChapterParser] = None,
+                       refresh: bool = False) -> Chapter:
+        """
+        获取单个章节内容并校验（优先读取内容存储，只有通过校验的内容才写回存储）
+
+        Args:
+            chapter: 章节对象
+            chapter_parser: 章节解析器，默认使用 self.chapter_parser
+            refresh: 为 True 时跳过内容存储直接请求书源
+
+        Returns:
+            填充了内容的章节对象，校验失败时 error 为失败原因
+        """
+        chapter_parser = chapter_parser or self.chapter_parser
+
+        if self.content_store and not refresh:
+            stored = self.content_store.get_chapter(self.rule.name, chapter.url)
+            if stored:
+                if not chapter.title:
+                    chapter.title = stored['title']
+                chapter.content = stored['content']
+                if self._check_chapter(chapter):
+                    return chapter
+
+        chapter = chapter_parser.parse(chapter)
+        if self._check_chapter(chapter) and self.content_store:
+            self.content_store.put_chapter(self.rule.name, chapter.url, chapter.title, chapter.content)
+        return chapter
+
+    def _check_chapter(self, chapter: Chapter) -> bool:
+        """校验章节内容，失败原因写入 chapter.error"""
+        reason, hard = self.validation.validate(chapter)
+        chapter.error = reason
+        with self._hard_failures_lock:
+            if hard:
+                self._hard_failures.add(chapter.index)
+            else:
+                self._hard_failures.discard(chapter.index)
+        return reason is None
+
+    def _repair_chapters(self, chapters: List[Chapter], book_name: str, author: str) -> set:
+        """
+        重新获取校验失败的章节（每轮之前退避等待），重试耗尽后：
+        硬失败（如拦截页）的内容被丢弃，软失败（如正文过短）保留内容
+
+        Args:
+            chapters: 章节列表
+            book_name: 书名
+            author: 作者
+
+        Returns:
+            修复成功的章节序号集合
+        """
+        failed = [c for c in chapters if c.error]
+        failed_indexes = {c.index for c in failed}
+
+        for round_no in range(1, self.repair_rounds + 1):
+            if not failed:
+                break
+
+            delay = self.repair_backoff * (2 ** (round_no - 1))
+            print(f"\n{len(failed)} 章校验失败，{delay:.0f} 秒后重新获取 (第 {round_no}/{self.repair_rounds} 轮)...")
+            time.sleep(delay)
+
+            self._download_chapters(failed, book_name, author, stage="repairing", refresh=True)
+            failed = [c for c in failed if c.error]
+
+        with self._hard_failures_lock:
+            for chapter in failed:
+                if chapter.index in self._hard_failures:
+                    chapter.content = None
+
+        return failed_indexes - {c.index for c in failed}
+
+    def _report_chapters(self, chapters: List[Chapter], repaired: set):
+        """
+        汇总每个章节的结果并回调
+
+        Args:
+            chapters: 章节列表
+            repaired: 修复成功的章节序号集合
+        """
+        self.chapter_results = []
+        for chapter in chapters:
+            if not chapter.error:
+                status = 'repaired' if chapter.index in repaired else 'ok'
+            else:
+                status = 'warning' if chapter.content else 'failed'
+            self.chapter_results.append({
+                'index': chapter.index,
+                'title': chapter.title,
+                'url': chapter.url,
+                'status': status,
+                'error': chapter.error
+            })
+
+        if self.chapter_callback:
+            self.chapter_callback(self.chapter_results)
+
+    @staticmethod
+    def _book_from_dict(book_url: str, book_data: dict) -> Book:
+        """从内容存储的字典恢复书籍对象"""
+        return Book(
+            url=book_url,
+            book_name=book_data.get('book_name', ''),
+            author=book_data.get('author', ''),
+            intro=book_data.get('intro'),
+            category=book_data.get('category'),
+            cover_url=book_data.get('cover_url'),
+            latest_chapter=book_data.get('latest_chapter'),
+            status=book_data.get('status')
+        )
+
+    @staticmethod
+    def _chapters_from_dict(book_data: dict) -> List[Chapter]:
+        """从内容存储的字典恢复章节列表"""
+        return list(book_data.get('chapters') or [])
+
+    def _open_epub(self, book: Book) -> EpubWriter:
+        """创建输出 EPUB 的写入器"""
+        FileUtils.ensure_dir(self.output_dir)
+        filename = FileUtils.sanitize_filename(f"{book.book_name}-{book.author}")
+        output_path = os.path.join(self.output_dir, f"{filename}.epub")
+        return EpubWriter(output_path, book.book_name, book.author, compress_level=self.epub_compress_level)
+
+    def _write_epub_chapter(self, chapter: Chapter):
+        """校验通过的章节不会再重新获取，直接写入 EPUB 并释放正文"""
+        if self._epub and chapter.content and not chapter.error:
+            self._epub.add_chapter(chapter.index, chapter.title, chapter.content)
+            chapter.content = None
 
     def _save_book(self, book: Book, chapters: List[Chapter], format: str):
         """
@@ -214,9 +614,13 @@ class Downloader:
             FileUtils.save_as_txt(chapters, output_path, book.book_name, book.author)
 
         elif format == "epub":
-            # 保存为 EPUB 文件
-            output_path = os.path.join(self.output_dir, f"{filename}.epub")
-            FileUtils.save_as_epub(chapters, output_path, book.book_name, book.author)
+            # 已写入下载时校验通过的章节，这里补写保留了内容的可疑章节，再生成目录
+            writer, self._epub = self._epub or self._open_epub(book), None
+            for chapter in chapters:
+                if chapter.content:
+                    writer.add_chapter(chapter.index, chapter.title, chapter.content)
+            writer.close()
+            print(f"已保存为 EPUB: {writer.output_path}（{len(writer)} 章）")
 
         elif format == "chapters":
             # 保存为多个章节文件
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+对冲请求（请求耗时超过历史 p95 时补发一个重复请求，取先返回的结果）
+"""
+import math
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+
+class LatencyTracker:
+    """记录最近若干次请求的耗时，计算分位数"""
+
+    def __init__(self, window: int = 200):
+        """
+        初始化耗时记录
+
+        Args:
+            window: 保留的最近样本数
+        """
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float):
+        """
+        记录一次请求耗时
+
+        Args:
+            latency: 耗时（秒）
+        """
+        with self._lock:
+            self._samples.append(latency)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        计算分位数
+
+        Args:
+            q: 分位（0-1，如 0.95）
+
+        Returns:
+            耗时分位数（秒），没有样本时返回 None
+        """
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+
+        index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[index]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+
+class HedgePolicy:
+    """
+    对冲请求策略
+
+    请求耗时超过最近样本的 percentile 分位数时，补发一个重复请求。
+    补发数量受预算限制：每个请求积累 budget_ratio 个令牌，每次补发消耗 1 个，
+    因此补发请求占总请求数的比例不超过 budget_ratio，书源的额外负载有上限。
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        budget_ratio: float = 0.1,
+        max_tokens: float = 10.0,
+        min_delay: float = 0.05,
+        window: int = 200
+    ):
+        """
+        初始化对冲策略
+
+        Args:
+            percentile: 触发补发的耗时分位（0-1）
+            min_samples: 样本数达到该值后才开始补发
+            budget_ratio: 补发请求占总请求数的最大比例
+            max_tokens: 令牌上限（允许的突发补发数）
+            min_delay: 最短等待时间（秒），避免在极快的书源上频繁补发
+            window: 耗时样本窗口大小
+        """
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget_ratio = budget_ratio
+        self.max_tokens = max_tokens
+        self.min_delay = min_delay
+        self.latency = LatencyTracker(window)
+
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self._requests = 0
+        self._hedged = 0
+        self._hedge_wins = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        计算补发前的等待时间，并为本次请求积累预算
+
+        Returns:
+            等待时间（秒），样本不足时返回 None（不补发）
+        """
+        with self._lock:
+            self._requests += 1
+            self._tokens = min(self.max_tokens, self._tokens + self.budget_ratio)
+
+        if len(self.latency) < self.min_samples:
+            return None
+
+        delay = self.latency.percentile(self.percentile)
+        return max(delay, self.min_delay) if delay is not None else None
+
+    def try_hedge(self) -> bool:
+        """
+        尝试消耗一次补发预算
+
+        Returns:
+            预算充足时返回 True
+        """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self._hedged += 1
+            return True
+
+    def record(self, latency: float):
+        """
+        记录单个成功请求的耗时
+
+        Args:
+            latency: 耗时（秒）
+        """
+        self.latency.record(latency)
+
+    def on_hedge_win(self):
+        """记录一次补发的请求先返回"""
+        with self._lock:
+            self._hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            统计信息字典
+        """
+        p95 = self.latency.percentile(0.95)
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'hedged': self._hedged,
+                'hedge_wins': self._hedge_wins,
+                'p95': round(p95, 3) if p95 is not None else None
+            }
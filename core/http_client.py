@@ -4,9 +4,14 @@ HTTP 客户端封装
 """
 import time
 import random
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import Optional, Dict
 from urllib.parse import urljoin
+from core.concurrency import AdaptiveLimiter
+from core.circuit_breaker import CircuitBreaker
+from core.hedging import HedgePolicy
 
 
 class HttpClient:
@@ -18,7 +23,10 @@ class HttpClient:
         max_retries: int = 3,
         min_interval: int = 0,
         max_interval: int = 0,
-        verify_ssl: bool = True
+        verify_ssl: bool = True,
+        limiter: Optional[AdaptiveLimiter] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        hedge: Optional[HedgePolicy] = None
     ):
         """
         初始化 HTTP 客户端
@@ -29,12 +37,20 @@ class HttpClient:
             min_interval: 最小请求间隔（毫秒）
             max_interval: 最大请求间隔（毫秒）
             verify_ssl: 是否验证 SSL 证书
+            limiter: 自适应并发限制器，提供时每次请求都占用一个名额，并回报状态码和耗时
+            breaker: 书源熔断器，打开时直接抛出 CircuitOpenError，不再发出请求
+            hedge: 对冲策略，提供时 GET 请求超过历史耗时分位数仍未返回会补发一次
         """
         self.timeout = timeout
         self.max_retries = max_retries
         self.min_interval = min_interval / 1000.0 if min_interval else 0
         self.max_interval = max_interval / 1000.0 if max_interval else 0
         self.verify_ssl = verify_ssl
+        self.limiter = limiter
+        self.breaker = breaker
+        self.hedge = hedge
+        self._hedge_executor = None
+        self._hedge_lock = threading.Lock()
 
         self.session = requests.Session()
         self.session.headers.update({
@@ -67,26 +83,7 @@ class HttpClient:
         Returns:
             响应对象
         """
-        self._add_delay()
-
-        for attempt in range(self.max_retries):
-            try:
-                response = self.session.get(
-                    url,
-                    params=params,
-                    headers=headers,
-                    cookies=cookies,
-                    timeout=self.timeout,
-                    verify=self.verify_ssl
-                )
-                response.raise_for_status()
-                return response
-
-            except requests.RequestException as e:
-                if attempt == self.max_retries - 1:
-                    raise
-                print(f"请求失败，正在重试 ({attempt + 1}/{self.max_retries}): {e}")
-                time.sleep(1 * (attempt + 1))
+        return self._request('GET', url, params=params, headers=headers, cookies=cookies)
 
     def post(
         self,
@@ -106,31 +103,173 @@ class HttpClient:
             headers: 请求头
             cookies: Cookies
 
+        Returns:
+            响应对象
+        """
+        return self._request('POST', url, data=data, json=json, headers=headers, cookies=cookies)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        发送请求（带重试；被限流时优先按 Retry-After 等待，熔断器打开后不再重试）
+
+        Args:
+            method: 请求方法
+            url: 请求 URL
+            **kwargs: 传给 requests 的参数
+
         Returns:
             响应对象
         """
         self._add_delay()
 
         for attempt in range(self.max_retries):
+            if self.breaker:
+                self.breaker.before_request()
+
             try:
-                response = self.session.post(
-                    url,
-                    data=data,
-                    json=json,
-                    headers=headers,
-                    cookies=cookies,
-                    timeout=self.timeout,
-                    verify=self.verify_ssl
-                )
-                response.raise_for_status()
-                return response
+                if self.hedge and method == 'GET':
+                    return self._send_hedged(method, url, **kwargs)
+                return self._send(method, url, **kwargs)
 
             except requests.RequestException as e:
                 if attempt == self.max_retries - 1:
                     raise
                 print(f"请求失败，正在重试 ({attempt + 1}/{self.max_retries}): {e}")
-                time.sleep(1 * (attempt + 1))
+                time.sleep(self._retry_delay(e, attempt))
+
+    def _send(self, method: str, url: str, started: Optional[threading.Event] = None,
+              **kwargs) -> requests.Response:
+        """
+        发送单次请求，并向并发限制器和熔断器回报结果
+
+        Args:
+            method: 请求方法
+            url: 请求 URL
+            started: 占用并发名额、请求真正发出时设置的事件（对冲请求据此开始计时）
+            **kwargs: 传给 requests 的参数
+
+        Returns:
+            响应对象
+        """
+        if self.limiter:
+            self.limiter.acquire()
+        if started:
+            started.set()
+
+        start = time.time()
+        try:
+            response = self.session.request(
+                method,
+                url,
+                timeout=self.timeout,
+                verify=self.verify_ssl,
+                **kwargs
+            )
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            status = e.response.status_code if e.response is not None else None
+            if self.limiter:
+                self.limiter.on_failure(status, start)
+            if self.breaker:
+                # 4xx 说明书源仍然可以访问，只有 5xx 计为失败
+                if status is None or status >= 500:
+                    self.breaker.on_failure()
+                else:
+                    self.breaker.on_success()
+            raise
+        except requests.RequestException:
+            if self.limiter:
+                self.limiter.on_failure(started_at=start)
+            if self.breaker:
+                self.breaker.on_failure()
+            raise
+        finally:
+            if self.limiter:
+                self.limiter.release()
+
+        latency = time.time() - start
+        if self.limiter:
+            self.limiter.on_success(latency)
+        if self.breaker:
+            self.breaker.on_success()
+        if self.hedge:
+            self.hedge.record(latency)
+        return response
+
+    def _send_hedged(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        发送可对冲的请求：超过耗时分位数仍未返回时补发一次，取先成功的响应
+
+        等待时间从请求占用并发名额后开始计算（与记录的耗时样本口径一致），在并发限制器前排队的时间不计入；
+        补发请求同样经过熔断器检查，半开状态下不会绕过只放行一个探测请求的限制。
+        """
+        delay = self.hedge.hedge_delay()
+        if delay is None:
+            return self._send(method, url, **kwargs)
+
+        executor = self._get_hedge_executor()
+        started = threading.Event()
+        primary = executor.submit(self._send, method, url, started=started, **kwargs)
+        primary.add_done_callback(lambda _: started.set())
+        futures = {primary: False}  # future -> 是否为补发的请求
+
+        started.wait()
+        done, _ = wait([primary], timeout=delay)
+        if not done and self.hedge.try_hedge() and (self.breaker is None or self.breaker.allow_request()):
+            futures[executor.submit(self._send, method, url, **kwargs)] = True
+
+        pending = set(futures)
+        winner = None
+        error = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.RequestException as e:
+                    error = e
+                    continue
+
+                if winner is None:
+                    winner = response
+                    if futures[future]:
+                        self.hedge.on_hedge_win()
+                else:
+                    response.close()
+
+        if winner is None:
+            raise error
+
+        # 较慢的请求无法中止，完成后释放连接
+        for future in pending:
+            future.add_done_callback(self._close_future_response)
+        return winner
+
+    def _get_hedge_executor(self) -> ThreadPoolExecutor:
+        """获取执行对冲请求的线程池"""
+        with self._hedge_lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='hedge')
+            return self._hedge_executor
+
+    @staticmethod
+    def _close_future_response(future):
+        """关闭被丢弃的响应"""
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    @staticmethod
+    def _retry_delay(error: requests.RequestException, attempt: int) -> float:
+        """计算重试前的等待时间（秒）"""
+        response = getattr(error, 'response', None)
+        if response is not None and response.status_code in AdaptiveLimiter.THROTTLE_STATUS:
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                return min(int(retry_after), 30)
+        return 1 * (attempt + 1)
 
     def close(self):
         """关闭会话"""
+        if self._hedge_executor:
+            self._hedge_executor.shutdown(wait=False)
         self.session.close()
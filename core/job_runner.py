@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+下载任务执行器（从任务存储领取任务并在后台线程中执行）
+"""
+import threading
+from typing import Any, Callable, Dict
+from core.task_store import TaskStore
+
+
+class JobRunner:
+    """
+    下载任务执行器
+
+    定期从任务存储中领取等待执行的任务，在本进程的线程中执行，同一时间最多执行 max_jobs 个。
+    多个进程共用同一个数据库时，每个任务只会被其中一个进程领取。
+    """
+
+    def __init__(
+        self,
+        task_store: TaskStore,
+        run_func: Callable[[Dict[str, Any]], None],
+        max_jobs: int = 2,
+        poll_interval: float = 1.0
+    ):
+        """
+        初始化任务执行器
+
+        Args:
+            task_store: 任务存储
+            run_func: 执行任务的函数，参数为领取到的任务数据
+            max_jobs: 本进程同时执行的最大任务数
+            poll_interval: 检查新任务的间隔（秒）
+        """
+        self.task_store = task_store
+        self.run_func = run_func
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+
+        self._active = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动后台领取线程（重复调用无效）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """有新任务时立即唤醒领取线程"""
+        self._wakeup.set()
+
+    @property
+    def active(self) -> int:
+        """正在执行的任务数"""
+        with self._lock:
+            return self._active
+
+    def _loop(self):
+        """后台领取任务"""
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+            with self._lock:
+                free = self.max_jobs - self._active
+            if free <= 0:
+                continue
+
+            try:
+                tasks = self.task_store.claim(free)
+            except Exception as e:
+                print(f"领取下载任务失败: {e}")
+                continue
+
+            for task in tasks:
+                with self._lock:
+                    self._active += 1
+                thread = threading.Thread(target=self._run, args=(task,), daemon=True)
+                thread.start()
+
+    def _run(self, task: Dict[str, Any]):
+        """执行单个任务"""
+        try:
+            self.run_func(task)
+        except Exception as e:
+            self.task_store.update(task['id'], status='failed', error=str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+            # 空出位置后马上领取下一个任务
+            self._wakeup.set()
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+多书源下载（在其他书源中匹配同一本书，按章节标题对齐目录，多个书源并行下载并互为备份）
+"""
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from models.book import Book
+from models.chapter import Chapter
+from models.rule import Rule
+from core.circuit_breaker import CircuitBreakerRegistry
+from core.downloader import Downloader
+from core.http_client import HttpClient
+from parsers.search_parser import SearchParser
+
+
+_CN_DIGITS = {
+    '零': 0, '〇': 0, '一': 1, '二': 2, '两': 2, '三': 3, '四': 4,
+    '五': 5, '六': 6, '七': 7, '八': 8, '九': 9
+}
+_CN_UNITS = {'十': 10, '百': 100, '千': 1000}
+
+# 章节序号（第12章、第一百零二章、第三十回等）
+_CHAPTER_NUMBER = re.compile(r'第\s*([0-9０-９零〇一二两三四五六七八九十百千万]+)\s*[章节回]')
+
+# 标题中的括号附注（如"（求月票）"），各书源之间经常不同
+_TITLE_NOTE = re.compile(r'[（(【\[].*?[）)】\]]')
+
+# 标点和空白
+_PUNCTUATION = re.compile(r'[\W_]+')
+
+
+def chinese_to_int(text: str) -> Optional[int]:
+    """
+    将阿拉伯数字或中文数字转换为整数
+
+    Args:
+        text: 数字文本（如 "12"、"一百零二"、"一零二"）
+
+    Returns:
+        整数，无法识别时返回 None
+    """
+    if text.isdigit():
+        return int(text)
+
+    # 没有单位的逐位写法（一零二）
+    if not any(ch in _CN_UNITS or ch == '万' for ch in text):
+        if all(ch in _CN_DIGITS for ch in text):
+            return int(''.join(str(_CN_DIGITS[ch]) for ch in text))
+        return None
+
+    total = section = number = 0
+    for ch in text:
+        if ch in _CN_DIGITS:
+            number = _CN_DIGITS[ch]
+        elif ch in _CN_UNITS:
+            section += (number or 1) * _CN_UNITS[ch]
+            number = 0
+        elif ch == '万':
+            total = (total + section + number) * 10000
+            section = number = 0
+        else:
+            return None
+    return total + section + number
+
+
+def chapter_number(title: str) -> Optional[int]:
+    """
+    提取章节序号
+
+    Args:
+        title: 章节标题
+
+    Returns:
+        序号，标题中没有"第X章"时返回 None
+    """
+    match = _CHAPTER_NUMBER.search(title or '')
+    return chinese_to_int(match.group(1)) if match else None
+
+
+def normalize_title(title: str) -> str:
+    """
+    规范化章节标题（序号统一为阿拉伯数字，去掉括号附注、标点和空白）
+
+    Args:
+        title: 章节标题
+
+    Returns:
+        规范化后的标题
+    """
+    title = _TITLE_NOTE.sub('', title or '')
+    number = chapter_number(title)
+    if number is not None:
+        title = _CHAPTER_NUMBER.sub(f'第{number}章', title, count=1)
+    return _PUNCTUATION.sub('', title).lower()
+
+
+def normalize_name(name: str) -> str:
+    """规范化书名或作者名（去掉标点和空白）"""
+    return _PUNCTUATION.sub('', name or '').lower()
+
+
+def is_same_book(book: Book, other: Book) -> bool:
+    """
+    书名相同且作者相同（任意一方缺少作者时只比较书名）
+
+    Args:
+        book: 书籍
+        other: 另一个书源中的书籍
+
+    Returns:
+        是否为同一本书
+    """
+    if not book.book_name or normalize_name(book.book_name) != normalize_name(other.book_name):
+        return False
+    if book.author and other.author:
+        return normalize_name(book.author) == normalize_name(other.author)
+    return True
+
+
+def align_chapters(chapters: List[Chapter], other_chapters: List[Chapter]) -> Dict[int, Chapter]:
+    """
+    按规范化标题对齐两个书源的目录，标题对不上时按章节序号对齐（只使用两边都唯一的序号）
+
+    Args:
+        chapters: 主书源的章节列表
+        other_chapters: 其他书源的章节列表
+
+    Returns:
+        主书源章节序号 -> 其他书源中对应的章节
+    """
+    by_title: Dict[str, Chapter] = {}
+    by_number: Dict[int, Chapter] = {}
+    repeated_numbers = set()
+    for chapter in other_chapters:
+        by_title.setdefault(normalize_title(chapter.title), chapter)
+        number = chapter_number(chapter.title)
+        if number is not None:
+            if number in by_number:
+                repeated_numbers.add(number)
+            by_number[number] = chapter
+
+    numbers = [chapter_number(c.title) for c in chapters]
+    for number in numbers:
+        if number is not None and numbers.count(number) > 1:
+            repeated_numbers.add(number)
+
+    aligned = {}
+    for chapter, number in zip(chapters, numbers):
+        match = by_title.get(normalize_title(chapter.title))
+        if match is None and number is not None and number not in repeated_numbers:
+            match = by_number.get(number)
+        if match is not None:
+            aligned[chapter.index] = match
+    return aligned
+
+
+class MultiSourceDownloader(Downloader):
+    """
+    多书源下载器
+
+    主书源提供书籍信息和目录，其他书源按书名和作者搜索到同一本书后，按章节标题与主书源的目录对齐。
+    章节按序号轮流分配给拥有该章节的书源，每个书源使用各自的自适应并发和请求间隔，
+    一本书可用的请求速率随书源数量成倍增加；某个书源获取失败或校验不通过时，依次换用其他书源。
+    """
+
+    # 对齐的章节数占下载范围的比例低于该值时不使用该书源（多半不是同一本书，或目录差异过大）
+    MIN_ALIGNED_RATIO = 0.5
+
+    # 在其他书源中搜索的超时时间（秒）
+    SEARCH_TIMEOUT = 5
+
+    def __init__(
+        self,
+        rule: Rule,
+        mirror_rules: List[Rule],
+        output_dir: str = "downloads",
+        max_sources: int = 3,
+        breakers: Optional[CircuitBreakerRegistry] = None,
+        **options
+    ):
+        """
+        初始化多书源下载器
+
+        Args:
+            rule: 主书源规则
+            mirror_rules: 候选书源规则（需要支持搜索，按优先顺序排列）
+            output_dir: 输出目录
+            max_sources: 同时使用的最大书源数（包括主书源）
+            breakers: 书源熔断器注册表，熔断中的书源不参与匹配
+            **options: Downloader 的其他参数，其他书源的下载器同样使用（回调函数除外）
+        """
+        super().__init__(rule, output_dir, **options)
+        self.mirror_rules = [r for r in mirror_rules if r.name != rule.name]
+        self.max_sources = max_sources
+        self.breakers = breakers
+
+        # 其他书源的下载器只负责获取章节，不回调进度，解析在下载线程内进行
+        self._mirror_options = {
+            k: v for k, v in options.items()
+            if k not in ('progress_callback', 'chapter_callback', 'parse_processes')
+        }
+        self.mirrors: List[Downloader] = []
+
+        # 章节序号 -> 可用的 (下载器, 章节 URL)，主书源在前
+        self._routes: Dict[int, List[Tuple[Downloader, str]]] = {}
+
+        # 各书源成功获取的章节数
+        self._fetched: Dict[str, int] = {}
+        self._fetched_lock = threading.Lock()
+
+    def download(self, book_url: str, start_chapter: int = 1, end_chapter: int = -1, format: str = "txt") -> bool:
+        """下载小说（参数同 Downloader.download），结束后关闭其他书源的连接"""
+        try:
+            return super().download(book_url, start_chapter, end_chapter, format)
+        finally:
+            for mirror in self.mirrors:
+                mirror.http_client.close()
+
+    @property
+    def concurrency(self) -> int:
+        """所有书源的请求并发数之和"""
+        return self.limiter.limit + sum(m.concurrency for m in self.mirrors)
+
+    def _thread_count(self) -> int:
+        """下载线程数（所有书源的并发上限之和）"""
+        return self.limiter.max_limit + sum(m.limiter.max_limit for m in self.mirrors)
+
+    def _prepare_download(self, book: Book, chapters: Iterable[Chapter]) -> List[Chapter]:
+        """匹配其他书源并对齐目录（对齐需要完整的目录，不能边获取目录边下载）"""
+        chapters = list(chapters)
+        self._routes = {c.index: [(self, c.url)] for c in chapters}
+        if not chapters:
+            return chapters
+
+        if self.max_sources > 1 and self.mirror_rules:
+            print("正在其他书源中匹配同一本书...")
+            if self.progress_callback:
+                self.progress_callback("matching_sources", 0, 0, book.book_name, book.author)
+
+            for mirror, aligned in self._find_mirrors(book, chapters):
+                self.mirrors.append(mirror)
+                for index, mirror_chapter in aligned.items():
+                    self._routes[index].append((mirror, mirror_chapter.url))
+
+        names = [self.rule.name] + [m.rule.name for m in self.mirrors]
+        print(f"使用书源: {', '.join(names)}\n")
+        return chapters
+
+    def _find_mirrors(self, book: Book, chapters: List[Chapter]) -> List[Tuple[Downloader, Dict[int, Chapter]]]:
+        """
+        在其他书源中搜索同一本书，获取目录并与主书源对齐
+
+        Args:
+            book: 主书源的书籍
+            chapters: 要下载的章节列表
+
+        Returns:
+            按书源优先顺序排列的 (下载器, 对齐结果) 列表，最多 max_sources - 1 个
+        """
+        candidates = [
+            rule for rule in self.mirror_rules
+            if rule.search and not rule.search.disabled
+            and not (self.breakers and self.breakers.get(rule.name).is_open())
+        ]
+        if not candidates:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(8, len(candidates))) as executor:
+            urls = list(executor.map(lambda rule: self._search_mirror(rule, book), candidates))
+            matched = [(rule, url) for rule, url in zip(candidates, urls) if url]
+            results = list(executor.map(lambda item: self._load_mirror(item[0], item[1], chapters), matched))
+
+        mirrors = [result for result in results if result]
+        for mirror, _ in mirrors[self.max_sources - 1:]:
+            mirror.http_client.close()
+        return mirrors[:self.max_sources - 1]
+
+    def _search_mirror(self, rule: Rule, book: Book) -> Optional[str]:
+        """
+        在书源中按书名搜索，返回同一本书的详情页 URL
+
+        Args:
+            rule: 书源规则
+            book: 主书源的书籍
+
+        Returns:
+            书籍详情页 URL，没有找到时返回 None
+        """
+        http_client = HttpClient(
+            verify_ssl=not rule.ignore_ssl,
+            timeout=self.SEARCH_TIMEOUT,
+            breaker=self.breakers.get(rule.name) if self.breakers else None
+        )
+        try:
+            for result in SearchParser(rule, http_client).search(book.book_name):
+                if is_same_book(book, result):
+                    return result.url
+        except Exception as e:
+            print(f"在书源 {rule.name} 中搜索失败: {e}")
+        finally:
+            http_client.close()
+        return None
+
+    def _load_mirror(self, rule: Rule, book_url: str,
+                     chapters: List[Chapter]) -> Optional[Tuple[Downloader, Dict[int, Chapter]]]:
+        """
+        获取其他书源的目录并与主书源对齐
+
+        Args:
+            rule: 书源规则
+            book_url: 该书源中的书籍详情页 URL
+            chapters: 要下载的章节列表
+
+        Returns:
+            (下载器, 对齐结果)，对齐的章节过少时返回 None
+        """
+        mirror = Downloader(rule, self.output_dir, parse_processes=0, **self._mirror_options)
+
+        # 与主书源共用校验状态：重复内容跨书源比较，硬失败按章节序号统一记录（共用集合和锁）
+        mirror.validation = self.validation
+        mirror._hard_failures = self._hard_failures
+        mirror._hard_failures_lock = self._hard_failures_lock
+
+        try:
+            _, mirror_chapters = mirror._load_book(book_url)
+            aligned = align_chapters(chapters, mirror_chapters)
+        except Exception as e:
+            print(f"获取书源 {rule.name} 的目录失败: {e}")
+            aligned = {}
+
+        if len(aligned) < len(chapters) * self.MIN_ALIGNED_RATIO:
+            print(f"书源 {rule.name} 只对齐了 {len(aligned)}/{len(chapters)} 章，不使用")
+            mirror.http_client.close()
+            return None
+
+        print(f"书源 {rule.name} 对齐了 {len(aligned)}/{len(chapters)} 章")
+        return mirror, aligned
+
+    def _fetch_chapter(self, chapter: Chapter, chapter_parser=None, refresh: bool = False) -> Chapter:
+        """
+        获取单个章节，从分配到的书源开始依次尝试拥有该章节的书源
+
+        Args:
+            chapter: 章节对象（主书源）
+            chapter_parser: 主书源的章节解析器
+            refresh: 为 True 时跳过内容存储直接请求书源
+
+        Returns:
+            填充了内容的章节对象，所有书源都失败时 error 为各书源的失败原因
+        """
+        routes = self._routes.get(chapter.index) or [(self, chapter.url)]
+        start = chapter.index % len(routes)
+        errors = []
+        fallback_content = None  # 软失败的内容，所有书源都失败时保留
+
+        for downloader, url in routes[start:] + routes[:start]:
+            attempt = Chapter(title=chapter.title, url=url, index=chapter.index)
+            try:
+                if downloader is self:
+                    result = super()._fetch_chapter(attempt, chapter_parser, refresh)
+                else:
+                    result = downloader._fetch_chapter(attempt, refresh=refresh)
+            except Exception as e:
+                errors.append(f"{downloader.rule.name}: {e}")
+                continue
+
+            if not result.error:
+                chapter.content = result.content
+                chapter.error = None
+                if not chapter.title:
+                    chapter.title = result.title
+                with self._fetched_lock:
+                    self._fetched[downloader.rule.name] = self._fetched.get(downloader.rule.name, 0) + 1
+                return chapter
+
+            errors.append(f"{downloader.rule.name}: {result.error}")
+            if result.content and fallback_content is None:
+                with self._hard_failures_lock:
+                    hard = chapter.index in self._hard_failures
+                if not hard:
+                    fallback_content = result.content
+
+        chapter.content = fallback_content
+        chapter.error = '；'.join(errors)
+        if fallback_content:
+            with self._hard_failures_lock:
+                self._hard_failures.discard(chapter.index)
+        return chapter
+
+    def _report_chapters(self, chapters: List[Chapter], repaired: set):
+        """汇总章节结果，并输出各书源获取的章节数"""
+        super()._report_chapters(chapters, repaired)
+        if self.mirrors:
+            print("各书源获取章节数: " + ", ".join(f"{name} {count}" for name, count in self._fetched.items()))
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+章节解析进程的入口
+
+解析进程池使用 spawn 方式启动，子进程只需要导入本模块和解析器；本模块导入时没有副作用
+（不打开数据库、不启动线程），不要在这里引入 server 等带有全局对象的模块。
+"""
+from typing import List, Optional, Tuple
+from models.rule import Rule
+from parsers.chapter_parser import ChapterParser
+
+
+# 解析进程中的章节解析器（由进程池的 initializer 创建，每个进程只创建一次）
+_chapter_parser: Optional[ChapterParser] = None
+
+
+def init_parse_process(rule: Rule):
+    """解析进程初始化"""
+    global _chapter_parser
+    _chapter_parser = ChapterParser(rule)
+
+
+def parse_page(content: bytes, encoding: Optional[str], page_url: str,
+               need_title: bool) -> Tuple[Optional[str], List[str], Optional[str]]:
+    """在解析进程中解析单页章节"""
+    return _chapter_parser.parse_page(content, encoding, page_url, need_title)
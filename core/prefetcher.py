@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""
+阅读器预读（后台低优先级预取后续章节）
+"""
+import itertools
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Sequence
+from models.chapter import Chapter
+
+
+class Prefetcher:
+    """
+    章节预读器
+
+    读者每读一章，就把后面 K 章放入后台队列；K 根据读者翻页速度自适应调整。
+    每个书源同一时间只有一个预读请求，且在有前台请求时让路，避免抢占书源的访问频率。
+    """
+
+    def __init__(
+        self,
+        fetch_func: Callable[[Any, str], None],
+        min_ahead: int = 1,
+        max_ahead: int = 8,
+        initial_ahead: int = 2,
+        num_workers: int = 2,
+        fast_interval: float = 30.0,
+        slow_interval: float = 180.0,
+        session_ttl: float = 3600.0
+    ):
+        """
+        初始化预读器
+
+        Args:
+            fetch_func: 预取函数，参数为 (上下文, 章节 URL)，负责抓取并写入缓存
+            min_ahead: 最少预读章节数
+            max_ahead: 最多预读章节数
+            initial_ahead: 新读者的初始预读章节数
+            num_workers: 后台工作线程数
+            fast_interval: 翻页间隔小于该值（秒）时增大预读数
+            slow_interval: 翻页间隔大于该值（秒）时减小预读数
+            session_ttl: 阅读会话过期时间（秒）
+        """
+        self.fetch_func = fetch_func
+        self.min_ahead = min_ahead
+        self.max_ahead = max_ahead
+        self.initial_ahead = initial_ahead
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.session_ttl = session_ttl
+
+        self._queue = queue.PriorityQueue()
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = set()  # 已排队或正在预取的 (书源, 章节 URL)
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._source_locks: Dict[str, threading.Lock] = {}
+        self._foreground: Dict[str, int] = {}
+
+        for _ in range(num_workers):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+
+    def on_read(self, session_key: str, source: str, chapters: Sequence[Chapter], index: int,
+                context: Any = None, is_cached: Callable[[str], bool] = None) -> int:
+        """
+        记录一次章节阅读并安排预读
+
+        Args:
+            session_key: 阅读会话标识（如客户端地址 + 书籍）
+            source: 书源名称，同一书源的预读串行执行
+            chapters: 目录（ChapterTable 或章节列表）
+            index: 当前章节在目录中的位置（从 0 开始）
+            context: 传给预取函数的上下文（如书源规则）
+            is_cached: 判断章节 URL 是否已缓存的函数，已缓存的章节不再预取
+
+        Returns:
+            本次预读的章节数
+        """
+        ahead = self._update_session(session_key, index)
+
+        for distance, chapter in enumerate(chapters[index + 1:index + 1 + ahead], 1):
+            url = chapter.url
+            if not url or (is_cached and is_cached(url)):
+                continue
+
+            key = (source, url)
+            with self._lock:
+                if key in self._pending:
+                    continue
+                self._pending.add(key)
+
+            # 距离越近优先级越高
+            self._queue.put((distance, next(self._counter), source, url, context))
+
+        return ahead
+
+    @contextmanager
+    def foreground(self, source: str):
+        """
+        标记书源正在处理前台请求，期间该书源的预读会暂停
+
+        Args:
+            source: 书源名称
+        """
+        with self._lock:
+            self._foreground[source] = self._foreground.get(source, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._foreground[source] -= 1
+                if self._foreground[source] <= 0:
+                    del self._foreground[source]
+
+    def _update_session(self, session_key: str, index: int) -> int:
+        """根据翻页速度更新会话的预读章节数"""
+        now = time.time()
+
+        with self._lock:
+            # 清理过期会话
+            expired = [k for k, s in self._sessions.items() if now - s['last_time'] > self.session_ttl]
+            for key in expired:
+                del self._sessions[key]
+
+            session = self._sessions.get(session_key)
+            if session is None:
+                session = {'ahead': self.initial_ahead, 'last_index': index, 'last_time': now}
+                self._sessions[session_key] = session
+                return session['ahead']
+
+            interval = now - session['last_time']
+            if index == session['last_index'] + 1:
+                # 顺序阅读：读得快就多预读，读得慢就少预读
+                if interval < self.fast_interval:
+                    session['ahead'] = min(self.max_ahead, session['ahead'] * 2)
+                elif interval > self.slow_interval:
+                    session['ahead'] = max(self.min_ahead, session['ahead'] - 1)
+            elif index != session['last_index']:
+                # 跳章阅读，回到初始值
+                session['ahead'] = self.initial_ahead
+
+            session['last_index'] = index
+            session['last_time'] = now
+            return session['ahead']
+
+    def _source_lock(self, source: str) -> threading.Lock:
+        """获取书源的预读锁"""
+        with self._lock:
+            lock = self._source_locks.get(source)
+            if lock is None:
+                lock = threading.Lock()
+                self._source_locks[source] = lock
+            return lock
+
+    def _wait_foreground(self, source: str, timeout: float = 10.0):
+        """等待书源的前台请求结束"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                if not self._foreground.get(source):
+                    return
+            time.sleep(0.1)
+
+    def _worker(self):
+        """后台预读线程"""
+        while True:
+            _, _, source, url, context = self._queue.get()
+            try:
+                with self._source_lock(source):
+                    self._wait_foreground(source)
+                    self.fetch_func(context, url)
+            except Exception as e:
+                print(f"预读章节失败 ({url}): {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard((source, url))
+                self._queue.task_done()
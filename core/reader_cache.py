@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+阅读器缓存（线程安全的 LRU 缓存，支持字节预算、TTL 和章节压缩）
+"""
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from models.chapter_table import ChapterTable
+
+
+class ReaderCache:
+    """阅读器缓存，按字节预算做 LRU 淘汰，目录与章节使用不同的过期时间"""
+
+    KIND_BOOK = 'book'
+    KIND_CHAPTER = 'chapter'
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        book_ttl: int = 10 * 60,
+        chapter_ttl: int = 24 * 60 * 60,
+        compress_chapters: bool = True,
+        compress_level: int = 6
+    ):
+        """
+        初始化阅读器缓存
+
+        Args:
+            max_bytes: 缓存总字节预算
+            book_ttl: 书籍信息/目录过期时间（秒），目录会更新，应较短
+            chapter_ttl: 章节内容过期时间（秒）
+            compress_chapters: 是否使用 zlib 压缩章节正文
+            compress_level: zlib 压缩级别（1-9）
+        """
+        self.max_bytes = max_bytes
+        self.ttls = {
+            self.KIND_BOOK: book_ttl,
+            self.KIND_CHAPTER: chapter_ttl
+        }
+        self.compress_chapters = compress_chapters
+        self.compress_level = compress_level
+
+        # key -> (kind, value, size, expires_at)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        # 统计信息
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        获取缓存项
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的数据，不存在或已过期返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+
+            kind, value, size, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self._misses += 1
+                return None
+
+            # 标记为最近使用
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+        return self._unpack(kind, value)
+
+    def set(self, key: str, value: Dict[str, Any], kind: str = KIND_CHAPTER):
+        """
+        写入缓存项
+
+        Args:
+            key: 缓存键
+            value: 要缓存的数据（字典）
+            kind: 数据类型（book 或 chapter），决定 TTL 和是否压缩
+        """
+        packed = self._pack(kind, value)
+        size = self._estimate_size(packed)
+
+        # 单项超过预算时不缓存
+        if size > self.max_bytes:
+            return
+
+        expires_at = time.time() + self.ttls.get(kind, self.ttls[self.KIND_CHAPTER])
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (kind, packed, size, expires_at)
+            self._total_bytes += size
+            self._evict()
+
+    def delete(self, key: str):
+        """
+        删除缓存项
+
+        Args:
+            key: 缓存键
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[3] > time.time()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            统计信息字典
+        """
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions
+            }
+
+    def _remove(self, key: str):
+        """删除缓存项（调用方需持有锁）"""
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry[2]
+
+    def _evict(self):
+        """淘汰过期项和最久未使用的项，直到满足字节预算（调用方需持有锁）"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        # 先清理已过期的项
+        now = time.time()
+        expired = [k for k, entry in self._entries.items() if entry[3] <= now]
+        for key in expired:
+            self._remove(key)
+            self._evictions += 1
+
+        # 再按 LRU 顺序淘汰
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self._evictions += 1
+
+    def _pack(self, kind: str, value: Dict[str, Any]) -> Dict[str, Any]:
+        """压缩章节正文"""
+        if kind != self.KIND_CHAPTER or not self.compress_chapters:
+            return value
+
+        content = value.get('content')
+        if not isinstance(content, str) or not content:
+            return value
+
+        packed = dict(value)
+        packed['content'] = zlib.compress(content.encode('utf-8'), self.compress_level)
+        return packed
+
+    def _unpack(self, kind: str, value: Dict[str, Any]) -> Dict[str, Any]:
+        """解压章节正文"""
+        content = value.get('content') if kind == self.KIND_CHAPTER else None
+        if not isinstance(content, bytes):
+            return value
+
+        unpacked = dict(value)
+        unpacked['content'] = zlib.decompress(content).decode('utf-8')
+        return unpacked
+
+    @staticmethod
+    def _estimate_size(value: Any) -> int:
+        """估算缓存项占用的字节数"""
+        if isinstance(value, dict):
+            return sys.getsizeof(value) + sum(
+                sys.getsizeof(k) + ReaderCache._estimate_size(v) for k, v in value.items()
+            )
+        if isinstance(value, (list, tuple)):
+            return sys.getsizeof(value) + sum(ReaderCache._estimate_size(v) for v in value)
+        if isinstance(value, ChapterTable):
+            return value.nbytes
+        return sys.getsizeof(value)
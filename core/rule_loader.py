@@ -31,7 +31,7 @@ class RuleLoader:
 
     def load_rules(self, rule_file: str = "main-rules.json") -> List[Rule]:
         """
-        加载规则文件
+        加载规则文件（按文件修改时间缓存解析结果）
 
         Args:
             rule_file: 规则文件名
@@ -44,6 +44,12 @@ class RuleLoader:
         if not rule_path.exists():
             raise FileNotFoundError(f"规则文件不存在: {rule_path}")
 
+        # 规则文件未修改时直接返回缓存
+        mtime = rule_path.stat().st_mtime
+        cached = self._rules_cache.get(rule_file)
+        if cached and cached[0] == mtime:
+            return list(cached[1])
+
         with open(rule_path, 'r', encoding='utf-8') as f:
             rules_data = json.load(f)
 
@@ -53,7 +59,8 @@ class RuleLoader:
             if rule and not rule.disabled:
                 rules.append(rule)
 
-        return rules
+        self._rules_cache[rule_file] = (mtime, rules)
+        return list(rules)
 
     def _parse_rule(self, rule_dict: dict) -> Optional[Rule]:
         """
@@ -141,6 +148,8 @@ class RuleLoader:
                 crawl_dict = rule_dict['crawl']
                 crawl_config = CrawlConfig(
                     threads=crawl_dict.get('threads'),
+                    min_threads=crawl_dict.get('minThreads'),
+                    max_threads=crawl_dict.get('maxThreads'),
                     min_interval=crawl_dict.get('minInterval'),
                     max_interval=crawl_dict.get('maxInterval'),
                     max_attempts=crawl_dict.get('maxAttempts'),
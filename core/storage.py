@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+SQLite 存储层（WAL 模式，每个线程独立连接）
+"""
+import os
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence
+
+
+SCHEMA = [
+    # 书源检查结果（只保留最新一条）
+    '''
+    CREATE TABLE IF NOT EXISTS source_check_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        results TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        timestamp INTEGER NOT NULL
+    )
+    ''',
+    # 下载任务（owner 为领取任务的进程，heartbeat/updated_at 为毫秒时间戳）
+    '''
+    CREATE TABLE IF NOT EXISTS tasks (
+        id TEXT PRIMARY KEY,
+        status TEXT NOT NULL,
+        owner TEXT,
+        data TEXT NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at INTEGER NOT NULL,
+        heartbeat INTEGER NOT NULL DEFAULT 0
+    )
+    ''',
+    # 下载任务的章节状态
+    '''
+    CREATE TABLE IF NOT EXISTS task_chapters (
+        task_id TEXT NOT NULL,
+        chapter_index INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        url TEXT NOT NULL,
+        status TEXT NOT NULL,
+        error TEXT,
+        updated_at INTEGER NOT NULL,
+        PRIMARY KEY (task_id, chapter_index)
+    )
+    ''',
+    # 内容缓存索引（书籍目录、章节正文），正文对象保存在磁盘上
+    '''
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        kind TEXT NOT NULL,
+        source TEXT NOT NULL,
+        url TEXT NOT NULL,
+        title TEXT NOT NULL DEFAULT '',
+        hash TEXT NOT NULL,
+        updated_at INTEGER NOT NULL,
+        PRIMARY KEY (kind, source, url)
+    )
+    ''',
+    # 书源统计
+    '''
+    CREATE TABLE IF NOT EXISTS source_stats (
+        source TEXT PRIMARY KEY,
+        status TEXT,
+        message TEXT,
+        success_count INTEGER NOT NULL DEFAULT 0,
+        failure_count INTEGER NOT NULL DEFAULT 0,
+        checked_at INTEGER,
+        updated_at INTEGER NOT NULL
+    )
+    ''',
+    # 书源熔断器状态（多进程共享，opened_at/probe_at 为秒级时间戳）
+    '''
+    CREATE TABLE IF NOT EXISTS circuit_breakers (
+        name TEXT PRIMARY KEY,
+        state TEXT NOT NULL,
+        failures INTEGER NOT NULL DEFAULT 0,
+        opened_at REAL NOT NULL DEFAULT 0,
+        probe_at REAL NOT NULL DEFAULT 0,
+        updated_at INTEGER NOT NULL
+    )
+    ''',
+]
+
+# 旧版本数据库中缺少的列：(表名, 列名, 列定义)
+COLUMNS = [
+    ('tasks', 'owner', 'TEXT'),
+    ('tasks', 'heartbeat', 'INTEGER NOT NULL DEFAULT 0'),
+]
+
+# 依赖新增列的索引，在补齐列之后创建
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)',
+    'CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks (updated_at)',
+]
+
+
+def _close_connection(conn: sqlite3.Connection, pid: int):
+    """关闭连接（只在创建连接的进程中关闭，fork 出的子进程直接丢弃继承的连接）"""
+    if os.getpid() != pid:
+        return
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
+
+class _ConnectionHolder:
+    """
+    线程的连接（保存在 threading.local 中）
+
+    线程结束时 threading.local 中的数据被释放，holder 被回收，finalizer 随之关闭连接。
+    """
+
+    __slots__ = ('conn', 'pid', 'finalizer', '__weakref__')
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.pid = os.getpid()
+        self.finalizer = weakref.finalize(self, _close_connection, conn, self.pid)
+        # 进程退出时不自动关闭：后台线程（如任务同步）可能仍在使用连接
+        self.finalizer.atexit = False
+
+
+class Storage:
+    """
+    SQLite 存储，WAL 模式下读写互不阻塞，每个线程复用自己的连接
+
+    连接在所属线程结束时关闭，请求线程、临时线程池中的线程不会留下连接和文件描述符。
+    多个进程（如多 worker 部署）可以同时打开同一个数据库文件，fork 出的子进程会重新建立连接。
+    """
+
+    def __init__(self, db_path: str = "zreader.db", timeout: float = 30.0):
+        """
+        初始化存储并创建表结构
+
+        Args:
+            db_path: 数据库文件路径
+            timeout: 等待写锁的超时时间（秒）
+        """
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+
+        self._local = threading.local()
+        self._holders = weakref.WeakSet()  # 各线程的连接（不阻止线程结束后回收）
+        self._holders_lock = threading.Lock()
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_schema()
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        获取当前线程的数据库连接
+
+        Returns:
+            数据库连接
+        """
+        holder = getattr(self._local, 'holder', None)
+        # 连接不能跨进程使用，fork 后需要重新连接
+        if holder is None or holder.pid != os.getpid():
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            holder = _ConnectionHolder(conn)
+            self._local.holder = holder
+            with self._holders_lock:
+                self._holders.add(holder)
+        return holder.conn
+
+    @property
+    def connection_count(self) -> int:
+        """当前进程中打开的连接数"""
+        with self._holders_lock:
+            return sum(1 for holder in self._holders if holder.finalizer.alive and holder.pid == os.getpid())
+
+    @contextmanager
+    def transaction(self):
+        """
+        在事务中执行（正常结束时提交，异常时回滚）
+
+        Yields:
+            数据库连接
+        """
+        conn = self.connection()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def execute(self, sql: str, params: Sequence[Any] = ()):
+        """
+        执行单条写入语句并提交
+
+        Args:
+            sql: SQL 语句
+            params: 参数
+        """
+        with self.transaction() as conn:
+            conn.execute(sql, params)
+
+    def execute_many(self, sql: str, rows: Iterable[Sequence[Any]]):
+        """
+        批量执行写入语句（同一事务内提交）
+
+        Args:
+            sql: SQL 语句
+            rows: 参数列表
+        """
+        with self.transaction() as conn:
+            conn.executemany(sql, rows)
+
+    def query(self, sql: str, params: Sequence[Any] = ()) -> List[tuple]:
+        """
+        查询多行
+
+        Args:
+            sql: SQL 语句
+            params: 参数
+
+        Returns:
+            结果行列表
+        """
+        return self.connection().execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params: Sequence[Any] = ()) -> Optional[tuple]:
+        """
+        查询单行
+
+        Args:
+            sql: SQL 语句
+            params: 参数
+
+        Returns:
+            结果行，不存在返回 None
+        """
+        return self.connection().execute(sql, params).fetchone()
+
+    def close(self):
+        """关闭所有线程的连接"""
+        with self._holders_lock:
+            holders = list(self._holders)
+            self._holders.clear()
+        for holder in holders:
+            holder.finalizer()
+        self._local = threading.local()
+
+    def _init_schema(self):
+        """创建表结构，并为旧版本数据库补齐新增的列"""
+        with self.transaction() as conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+            for table, column, definition in COLUMNS:
+                columns = {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+                if column not in columns:
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+            for statement in INDEXES:
+                conn.execute(statement)
@@ -0,0 +1,467 @@
+# -*- coding: utf-8 -*-
+"""
+下载任务进度存储（分片加锁，支持按版本号拉取增量变化，可通过 SQLite 在多个进程间共享）
+"""
+import atexit
+import json
+import os
+import socket
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from core.storage import Storage
+
+
+class TaskStore:
+    """
+    下载任务存储
+
+    任务按 ID 哈希分布到多个分片，每个分片独立加锁，下载线程更新进度时互不争用同一把锁。
+    每次修改都会分配一个递增的版本号，推送端可以据此只拉取发生变化的任务。对外的版本号是已提交水位：
+    不超过它的版本对应的记录都已写入分片，按水位推进游标不会漏掉仍在写入中的修改。
+
+    提供 storage 时，数据库中的任务表由所有进程共享：新任务立即写入数据库，由某个进程领取（claim）后执行；
+    本进程领取的任务修改后由后台线程批量写回，其他进程的修改由同一线程定期同步到内存中。
+    领取任务的进程会定期刷新心跳，心跳超时的任务重新排队，由其他进程接手。
+    """
+
+    def __init__(
+        self,
+        num_shards: int = 16,
+        max_deleted: int = 1000,
+        storage: Optional[Storage] = None,
+        flush_interval: float = 1.0,
+        stale_timeout: float = 60.0,
+        worker_id: Optional[str] = None
+    ):
+        """
+        初始化任务存储
+
+        Args:
+            num_shards: 分片数量
+            max_deleted: 保留的删除记录数量（供增量拉取使用）
+            storage: SQLite 存储，为 None 时只保存在内存中
+            flush_interval: 写回和同步数据库的间隔（秒）
+            stale_timeout: 执行中任务的心跳超时时间（秒），超时后重新排队
+            worker_id: 当前进程的标识，默认使用主机名和进程号
+        """
+        self._shards: List[Dict[str, Dict[str, Any]]] = [{} for _ in range(num_shards)]
+        self._locks = [threading.Lock() for _ in range(num_shards)]
+        # 版本号分配和已提交水位（_pending 为已分配但记录尚未写入分片的版本）
+        self._version_lock = threading.Lock()
+        self._last_version = 0
+        self._committed_version = 0
+        self._pending = set()
+
+        # (版本号, 任务 ID)
+        self._deleted = deque(maxlen=max_deleted)
+        self._deleted_lock = threading.Lock()
+
+        # 每个分片中本进程领取的任务 ID 和待写回的任务 ID（在分片锁内修改）
+        self._owned = [set() for _ in range(num_shards)]
+        self._dirty = [set() for _ in range(num_shards)]
+
+        # 不使用数据库时的章节结果（任务 ID -> 章节结果列表）
+        self._chapters: Dict[str, List[Dict[str, Any]]] = {}
+        self._chapters_lock = threading.Lock()
+
+        self.storage = storage
+        self.flush_interval = flush_interval
+        self.stale_timeout = stale_timeout
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self._synced_at = 0  # 已同步到的数据库修改时间（毫秒）
+
+        if storage:
+            self.sync()
+            thread = threading.Thread(target=self._flush_loop, daemon=True)
+            thread.start()
+            atexit.register(self.flush)
+
+    def _shard(self, task_id: str) -> int:
+        """计算任务所在的分片"""
+        return zlib.crc32(task_id.encode('utf-8')) % len(self._shards)
+
+    def _next_version(self) -> int:
+        """分配新的版本号（记录写入后需调用 _commit_version）"""
+        with self._version_lock:
+            self._last_version += 1
+            self._pending.add(self._last_version)
+            return self._last_version
+
+    def _commit_version(self, version: int):
+        """标记版本对应的记录已写入，推进已提交水位"""
+        with self._version_lock:
+            self._pending.discard(version)
+            self._committed_version = min(self._pending) - 1 if self._pending else self._last_version
+
+    @property
+    def version(self) -> int:
+        """已提交水位（不超过它的版本对应的记录都已写入）"""
+        with self._version_lock:
+            return self._committed_version
+
+    def create(self, task: Dict[str, Any]):
+        """
+        创建任务（使用数据库时立即写入，其他进程可以马上领取）
+
+        Args:
+            task: 任务数据（必须包含 id）
+        """
+        if self.storage:
+            now = self._now_ms()
+            self.storage.execute(
+                'INSERT OR REPLACE INTO tasks (id, status, owner, data, created_at, updated_at, heartbeat) '
+                'VALUES (?, ?, NULL, ?, ?, ?, 0)',
+                (task['id'], task.get('status', ''), self._dumps(task), task.get('created_at', ''), now)
+            )
+
+        self._put(task)
+
+    def claim(self, limit: int = 1) -> List[Dict[str, Any]]:
+        """
+        领取等待执行的任务（多个进程同时领取时，每个任务只会被一个进程领取）
+
+        Args:
+            limit: 最多领取的任务数
+
+        Returns:
+            领取到的任务列表（状态已改为 downloading）
+        """
+        if limit <= 0:
+            return []
+
+        if not self.storage:
+            return self._claim_local(limit)
+
+        rows = self.storage.query(
+            "SELECT id FROM tasks WHERE status = 'pending' AND owner IS NULL ORDER BY created_at LIMIT ?",
+            (limit,)
+        )
+
+        claimed = []
+        for (task_id,) in rows:
+            now = self._now_ms()
+            with self.storage.transaction() as conn:
+                # 条件更新保证只有一个进程能领取成功
+                cursor = conn.execute(
+                    "UPDATE tasks SET status = 'downloading', owner = ?, updated_at = ?, heartbeat = ? "
+                    "WHERE id = ? AND status = 'pending' AND owner IS NULL",
+                    (self.worker_id, now, now, task_id)
+                )
+                if cursor.rowcount != 1:
+                    continue
+                row = conn.execute('SELECT data FROM tasks WHERE id = ?', (task_id,)).fetchone()
+
+            task = self._loads(row[0]) if row else None
+            if task is None:
+                continue
+
+            task['status'] = 'downloading'
+            self._put(task, owned=True)
+            claimed.append(self.get(task_id))
+
+        return claimed
+
+    def update(self, task_id: str, **fields) -> bool:
+        """
+        更新任务字段（只有本进程领取的任务会写回数据库）
+
+        Args:
+            task_id: 任务 ID
+            **fields: 要更新的字段
+
+        Returns:
+            任务是否存在
+        """
+        index = self._shard(task_id)
+        with self._locks[index]:
+            record = self._shards[index].get(task_id)
+            if record is None:
+                return False
+
+            # 字段没有变化时不分配新版本，避免推送空的增量
+            if all(record.get(k) == v for k, v in fields.items()):
+                return True
+
+            record.update(fields)
+            record['_version'] = version = self._next_version()
+            self._commit_version(version)
+            if task_id in self._owned[index]:
+                self._dirty[index].add(task_id)
+            return True
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取任务
+
+        Args:
+            task_id: 任务 ID
+
+        Returns:
+            任务数据副本，不存在返回 None
+        """
+        index = self._shard(task_id)
+        with self._locks[index]:
+            record = self._shards[index].get(task_id)
+            return self._public(record) if record else None
+
+    def delete(self, task_id: str) -> bool:
+        """
+        删除任务（使用数据库时立即删除，其他进程在下次同步时移除）
+
+        Args:
+            task_id: 任务 ID
+
+        Returns:
+            任务是否存在
+        """
+        if self.storage:
+            with self.storage.transaction() as conn:
+                conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+                conn.execute('DELETE FROM task_chapters WHERE task_id = ?', (task_id,))
+        else:
+            with self._chapters_lock:
+                self._chapters.pop(task_id, None)
+
+        return self._remove(task_id)
+
+    def save_chapters(self, task_id: str, chapters: List[Dict[str, Any]]):
+        """
+        保存任务的章节结果（覆盖同序号的旧结果）
+
+        Args:
+            task_id: 任务 ID
+            chapters: 章节结果列表，每项包含 index、title、url、status、error
+        """
+        if not self.storage:
+            with self._chapters_lock:
+                self._chapters[task_id] = [dict(c) for c in chapters]
+            return
+
+        now = self._now_ms()
+        self.storage.execute_many(
+            'INSERT OR REPLACE INTO task_chapters '
+            '(task_id, chapter_index, title, url, status, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(task_id, c['index'], c.get('title') or '', c.get('url') or '', c['status'], c.get('error'), now)
+             for c in chapters]
+        )
+
+    def get_chapters(self, task_id: str) -> List[Dict[str, Any]]:
+        """
+        获取任务的章节结果
+
+        Args:
+            task_id: 任务 ID
+
+        Returns:
+            按章节序号排序的章节结果列表
+        """
+        if not self.storage:
+            with self._chapters_lock:
+                return [dict(c) for c in self._chapters.get(task_id, [])]
+
+        rows = self.storage.query(
+            'SELECT chapter_index, title, url, status, error FROM task_chapters '
+            'WHERE task_id = ? ORDER BY chapter_index',
+            (task_id,)
+        )
+        return [
+            {'index': row[0], 'title': row[1], 'url': row[2], 'status': row[3], 'error': row[4]}
+            for row in rows
+        ]
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        获取所有任务
+
+        Returns:
+            任务数据副本列表
+        """
+        tasks = []
+        for index, shard in enumerate(self._shards):
+            with self._locks[index]:
+                tasks.extend(self._public(record) for record in shard.values())
+        return tasks
+
+    def changes_since(self, version: int) -> Tuple[List[Dict[str, Any]], List[str], int]:
+        """
+        获取指定版本之后发生变化的任务
+
+        Args:
+            version: 上次拉取时的版本号
+
+        Returns:
+            (变化的任务列表, 被删除的任务 ID 列表, 扫描前的已提交水位)
+
+        分片逐个扫描，扫描期间其他分片可能写入更新的版本，因此返回扫描前读取的水位而不是扫描到的最大版本；
+        超过水位的修改下次还会返回一次，调用方按任务的 version 去重。
+        """
+        current = self.version
+        changed = []
+        for index, shard in enumerate(self._shards):
+            with self._locks[index]:
+                changed.extend(
+                    self._public(record) for record in shard.values()
+                    if record['_version'] > version
+                )
+
+        with self._deleted_lock:
+            deleted = [task_id for v, task_id in self._deleted if v > version]
+
+        return changed, deleted, current
+
+    def flush(self):
+        """将本进程修改过的任务批量写回数据库，并刷新执行中任务的心跳"""
+        if not self.storage:
+            return
+
+        rows = []
+        now = self._now_ms()
+        for index, shard in enumerate(self._shards):
+            with self._locks[index]:
+                for task_id in self._dirty[index]:
+                    record = shard.get(task_id)
+                    if record is None:
+                        continue
+                    task = {k: v for k, v in record.items() if k != '_version'}
+                    rows.append((task.get('status', ''), self._dumps(task), now, now, task_id, self.worker_id))
+
+                    # 已结束的任务写回后不再由本进程负责
+                    if task.get('status') not in ('pending', 'downloading'):
+                        self._owned[index].discard(task_id)
+                self._dirty[index] = set()
+
+        with self.storage.transaction() as conn:
+            if rows:
+                # 只更新仍归本进程所有的记录，任务已被删除或被其他进程接手时不会写回
+                conn.executemany(
+                    'UPDATE tasks SET status = ?, data = ?, updated_at = ?, heartbeat = ? WHERE id = ? AND owner = ?',
+                    rows
+                )
+            conn.execute(
+                "UPDATE tasks SET heartbeat = ? WHERE owner = ? AND status = 'downloading'",
+                (now, self.worker_id)
+            )
+
+    def sync(self):
+        """从数据库同步其他进程的修改，并重新排队心跳超时的任务"""
+        if not self.storage:
+            return
+
+        now = self._now_ms()
+        self.storage.execute(
+            "UPDATE tasks SET status = 'pending', owner = NULL, updated_at = ? "
+            "WHERE status = 'downloading' AND heartbeat < ?",
+            (now, now - int(self.stale_timeout * 1000))
+        )
+
+        # 修改时间精度为毫秒，用 >= 避免漏掉同一毫秒内的修改，重复应用不会产生新版本
+        rows = self.storage.query(
+            'SELECT id, status, data, updated_at FROM tasks WHERE updated_at >= ?',
+            (self._synced_at,)
+        )
+        existing = {task_id for (task_id,) in self.storage.query('SELECT id FROM tasks')}
+
+        for task_id, status, data, updated_at in rows:
+            self._synced_at = max(self._synced_at, updated_at)
+            if task_id not in existing or self._is_owned(task_id):
+                continue
+
+            task = self._loads(data)
+            if task is None:
+                continue
+            task['status'] = status
+
+            if not self.update(task_id, **task):
+                self._put(task)
+
+        # 其他进程删除的任务
+        for task in self.list():
+            if task['id'] not in existing:
+                self._remove(task['id'])
+
+    def _put(self, task: Dict[str, Any], owned: bool = False):
+        """写入内存中的任务记录"""
+        index = self._shard(task['id'])
+        with self._locks[index]:
+            record = dict(task)
+            record['_version'] = version = self._next_version()
+            self._shards[index][task['id']] = record
+            self._commit_version(version)
+            if owned:
+                self._owned[index].add(task['id'])
+
+    def _remove(self, task_id: str) -> bool:
+        """删除内存中的任务记录"""
+        index = self._shard(task_id)
+        with self._locks[index]:
+            if self._shards[index].pop(task_id, None) is None:
+                return False
+
+            with self._deleted_lock:
+                version = self._next_version()
+                self._deleted.append((version, task_id))
+            self._commit_version(version)
+            self._owned[index].discard(task_id)
+            self._dirty[index].discard(task_id)
+        return True
+
+    def _is_owned(self, task_id: str) -> bool:
+        """任务是否由本进程执行"""
+        index = self._shard(task_id)
+        with self._locks[index]:
+            return task_id in self._owned[index]
+
+    def _claim_local(self, limit: int) -> List[Dict[str, Any]]:
+        """不使用数据库时，直接在内存中领取任务"""
+        claimed = []
+        for index, shard in enumerate(self._shards):
+            with self._locks[index]:
+                for task_id, record in shard.items():
+                    if len(claimed) >= limit:
+                        break
+                    if record.get('status') != 'pending' or task_id in self._owned[index]:
+                        continue
+                    record['status'] = 'downloading'
+                    record['_version'] = version = self._next_version()
+                    self._commit_version(version)
+                    self._owned[index].add(task_id)
+                    claimed.append(self._public(record))
+        return sorted(claimed, key=lambda t: t.get('created_at', ''))
+
+    def _flush_loop(self):
+        """后台定期写回和同步数据库"""
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+                self.sync()
+            except Exception as e:
+                print(f"同步任务状态失败: {e}")
+
+    @staticmethod
+    def _now_ms() -> int:
+        """当前时间（毫秒）"""
+        return int(time.time() * 1000)
+
+    @staticmethod
+    def _dumps(task: Dict[str, Any]) -> str:
+        """序列化任务数据"""
+        return json.dumps(task, ensure_ascii=False)
+
+    @staticmethod
+    def _loads(data: str) -> Optional[Dict[str, Any]]:
+        """反序列化任务数据"""
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _public(record: Dict[str, Any]) -> Dict[str, Any]:
+        """转换为对外的任务数据（版本号改为公开字段）"""
+        task = {k: v for k, v in record.items() if k != '_version'}
+        task['version'] = record['_version']
+        return task
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+章节内容校验（识别验证码页、限流提示页、截断和重复内容等"软失败"）
+"""
+import hashlib
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+from models.chapter import Chapter
+
+
+class ChapterValidator:
+    """
+    章节校验器基类
+
+    validate 返回失败原因（通过时返回 None）。hard 为 True 的校验器失败时，
+    即使重试后仍然失败，内容也不会写入输出文件；软校验器在重试耗尽后保留内容并标记为可疑。
+    """
+
+    name = 'base'
+    hard = False
+
+    def validate(self, chapter: Chapter) -> Optional[str]:
+        """
+        校验章节
+
+        Args:
+            chapter: 已获取内容的章节
+
+        Returns:
+            失败原因，通过时返回 None
+        """
+        raise NotImplementedError
+
+    def accept(self, chapter: Chapter):
+        """
+        记录通过校验的章节（有状态的校验器用来和后续章节比较）
+
+        Args:
+            chapter: 通过校验的章节
+        """
+
+
+class MinLengthValidator(ChapterValidator):
+    """正文过短（截断的响应或空白页）"""
+
+    name = 'min_length'
+
+    def __init__(self, min_length: int = 50):
+        """
+        Args:
+            min_length: 最少字符数
+        """
+        self.min_length = min_length
+
+    def validate(self, chapter: Chapter) -> Optional[str]:
+        length = len(chapter.content or '')
+        if length < self.min_length:
+            return f"正文过短 ({length} 字)"
+        return None
+
+
+class BlockPageValidator(ChapterValidator):
+    """验证码、限流、"请稍候"等拦截页面"""
+
+    name = 'block_page'
+    hard = True
+
+    # 常见拦截页面的特征文本
+    DEFAULT_PATTERNS = [
+        r'请输入验证码',
+        r'验证码错误',
+        r'访问(过于|太)频繁',
+        r'请求(过于|太)频繁',
+        r'请稍(后|候)(再试|访问|重试)',
+        r'正在(进行)?安全(检查|验证)',
+        r'请(完成|进行)(人机|安全)验证',
+        r'您的(IP|访问)已被(限制|封禁)',
+        r'Just a moment\.\.\.',
+        r'Checking your browser',
+        r'Access denied',
+        r'Too Many Requests',
+        r'cf-browser-verification',
+    ]
+
+    def __init__(self, patterns: Optional[List[str]] = None, max_length: int = 2000):
+        """
+        Args:
+            patterns: 拦截页特征正则，默认使用 DEFAULT_PATTERNS
+            max_length: 只检查不超过该长度的正文（正常章节里偶尔出现这些词不算拦截页）
+        """
+        self.pattern = re.compile('|'.join(patterns or self.DEFAULT_PATTERNS), re.IGNORECASE)
+        self.max_length = max_length
+
+    def validate(self, chapter: Chapter) -> Optional[str]:
+        content = chapter.content or ''
+        if len(content) > self.max_length:
+            return None
+
+        match = self.pattern.search(content)
+        if match:
+            return f"疑似拦截页面 ({match.group(0)})"
+        return None
+
+
+class RepeatedContentValidator(ChapterValidator):
+    """与其他章节内容相同，或正文内部大量重复的段落"""
+
+    name = 'repeated'
+
+    def __init__(self, max_repeat_ratio: float = 0.5, min_paragraphs: int = 6):
+        """
+        Args:
+            max_repeat_ratio: 重复段落占比超过该值时视为失败
+            min_paragraphs: 段落数少于该值时不检查内部重复
+        """
+        self.max_repeat_ratio = max_repeat_ratio
+        self.min_paragraphs = min_paragraphs
+        self._seen: Dict[str, int] = {}  # 内容哈希 -> 章节序号
+        self._lock = threading.Lock()
+
+    def validate(self, chapter: Chapter) -> Optional[str]:
+        content = chapter.content or ''
+
+        with self._lock:
+            other = self._seen.get(self._hash(content))
+        if other is not None and other != chapter.index:
+            return f"与第 {other} 章内容相同"
+
+        paragraphs = [p for p in content.split('\n') if p.strip()]
+        if len(paragraphs) >= self.min_paragraphs:
+            repeat_ratio = 1 - len(set(paragraphs)) / len(paragraphs)
+            if repeat_ratio > self.max_repeat_ratio:
+                return f"段落重复 ({repeat_ratio:.0%})"
+        return None
+
+    def accept(self, chapter: Chapter):
+        with self._lock:
+            self._seen.setdefault(self._hash(chapter.content or ''), chapter.index)
+
+    @staticmethod
+    def _hash(content: str) -> str:
+        """计算正文哈希"""
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+class ChapterValidation:
+    """按顺序执行一组校验器"""
+
+    def __init__(self, validators: Optional[List[ChapterValidator]] = None):
+        """
+        Args:
+            validators: 校验器列表，默认使用 default_validators()
+        """
+        self.validators = validators if validators is not None else self.default_validators()
+
+    @staticmethod
+    def default_validators() -> List[ChapterValidator]:
+        """默认校验器：拦截页、过短、重复内容"""
+        return [BlockPageValidator(), MinLengthValidator(), RepeatedContentValidator()]
+
+    def validate(self, chapter: Chapter) -> Tuple[Optional[str], bool]:
+        """
+        校验章节，全部通过时记录到有状态的校验器中
+
+        Args:
+            chapter: 已获取内容的章节
+
+        Returns:
+            (失败原因, 是否为硬失败)，通过时为 (None, False)
+        """
+        if not chapter.content:
+            return "正文为空", False
+
+        for validator in self.validators:
+            reason = validator.validate(chapter)
+            if reason:
+                return reason, validator.hard
+
+        for validator in self.validators:
+            validator.accept(chapter)
+        return None, False
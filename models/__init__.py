@@ -4,11 +4,13 @@
 """
 from .book import Book
 from .chapter import Chapter
+from .chapter_table import ChapterTable
 from .rule import Rule, SearchRule, BookRule, TocRule, ChapterRule, CrawlConfig
 
 __all__ = [
     'Book',
     'Chapter',
+    'ChapterTable',
     'Rule',
     'SearchRule',
     'BookRule',
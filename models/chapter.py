@@ -13,6 +13,7 @@ class Chapter:
     url: str = ""
     content: Optional[str] = None
     index: int = 0
+    error: Optional[str] = None  # 校验失败的原因
 
     def __str__(self):
         return f"第{self.index}章 {self.title}"
@@ -23,5 +24,6 @@ class Chapter:
             'title': self.title,
             'url': self.url,
             'content': self.content,
-            'index': self.index
+            'index': self.index,
+            'error': self.error
         }
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+章节目录表（按列存储的紧凑目录）
+"""
+import hashlib
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Union
+from .chapter import Chapter
+
+
+class ChapterTable:
+    """
+    紧凑的章节目录
+
+    标题和 URL 按列存放在两个列表中，URL 只保存去掉公共前缀后的部分，标题经过 intern，
+    章节序号由起始序号和位置推算，不为每个章节创建对象。上万章的目录只占原来的一小部分内存，
+    序列化后的 JSON 也小得多。按位置取值时返回新的 Chapter 对象，切片返回新的目录表。
+    """
+
+    __slots__ = ('prefix', 'start_index', '_titles', '_suffixes', '_version')
+
+    def __init__(self, prefix: str = '', start_index: int = 1):
+        """
+        初始化目录表
+
+        Args:
+            prefix: URL 公共前缀
+            start_index: 第一章的序号
+        """
+        self.prefix = prefix
+        self.start_index = start_index
+        self._titles: List[str] = []
+        self._suffixes: List[str] = []
+        self._version = None
+
+    @classmethod
+    def from_chapters(cls, chapters: Iterable[Chapter]) -> 'ChapterTable':
+        """
+        从章节列表创建目录表（序号取第一章的序号，之后连续编号）
+
+        Args:
+            chapters: 章节列表
+
+        Returns:
+            目录表
+        """
+        table = cls()
+        table.extend(chapters)
+        return table
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ChapterTable':
+        """
+        从 to_dict 的结果恢复目录表
+
+        Args:
+            data: 紧凑格式的字典
+
+        Returns:
+            目录表
+        """
+        table = cls(data.get('prefix', ''), data.get('start', 1))
+        table._titles = [sys.intern(title) for title in data.get('titles', [])]
+        table._suffixes = list(data.get('urls', []))
+        return table
+
+    @classmethod
+    def from_list(cls, chapters: List[Dict[str, Any]]) -> 'ChapterTable':
+        """
+        从字典列表（index/title/url）创建目录表
+
+        Args:
+            chapters: 章节字典列表
+
+        Returns:
+            目录表
+        """
+        table = cls(start_index=chapters[0].get('index', 1) if chapters else 1)
+        for chapter in chapters:
+            table.append(chapter.get('title', ''), chapter.get('url', ''))
+        return table
+
+    def append(self, title: str, url: str):
+        """
+        追加一章
+
+        Args:
+            title: 章节标题
+            url: 章节 URL
+        """
+        if not self._suffixes:
+            # 公共前缀取到最后一个 "/"，章节 URL 通常只有文件名不同
+            self.prefix = url[:url.rfind('/') + 1]
+        elif not url.startswith(self.prefix):
+            self._shrink_prefix(url)
+
+        self._titles.append(sys.intern(title or ''))
+        self._suffixes.append(url[len(self.prefix):])
+        self._version = None
+
+    def extend(self, chapters: Iterable[Chapter]):
+        """
+        追加多章（目录表为空时以第一章的序号为起始序号）
+
+        Args:
+            chapters: 章节列表
+        """
+        for chapter in chapters:
+            if not self._suffixes and chapter.index:
+                self.start_index = chapter.index
+            self.append(chapter.title, chapter.url)
+
+    def title(self, position: int) -> str:
+        """按位置（从 0 开始）获取标题"""
+        return self._titles[position]
+
+    def url(self, position: int) -> str:
+        """按位置（从 0 开始）获取完整 URL"""
+        return self.prefix + self._suffixes[position]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为紧凑格式的字典（用于序列化）
+
+        Returns:
+            包含 prefix、start、titles、urls（去掉前缀的部分）的字典
+        """
+        return {
+            'prefix': self.prefix,
+            'start': self.start_index,
+            'titles': list(self._titles),
+            'urls': list(self._suffixes)
+        }
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """
+        转换为字典列表（index/title/url）
+
+        Returns:
+            章节字典列表
+        """
+        return [
+            {'index': self.start_index + i, 'title': title, 'url': self.prefix + suffix}
+            for i, (title, suffix) in enumerate(zip(self._titles, self._suffixes))
+        ]
+
+    @property
+    def version(self) -> str:
+        """目录内容的哈希（标题或 URL 变化时改变），用作目录的版本号和 ETag"""
+        if self._version is None:
+            digest = hashlib.sha1(self.prefix.encode('utf-8'))
+            digest.update('\n'.join(self._titles).encode('utf-8'))
+            digest.update(b'\0')
+            digest.update('\n'.join(self._suffixes).encode('utf-8'))
+            self._version = digest.hexdigest()[:16]
+        return self._version
+
+    @property
+    def nbytes(self) -> int:
+        """估算占用的内存字节数"""
+        return (
+            sys.getsizeof(self.prefix)
+            + sys.getsizeof(self._titles) + sum(sys.getsizeof(t) for t in self._titles)
+            + sys.getsizeof(self._suffixes) + sum(sys.getsizeof(s) for s in self._suffixes)
+        )
+
+    def __len__(self) -> int:
+        return len(self._suffixes)
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Chapter, 'ChapterTable']:
+        if isinstance(key, slice):
+            start, _, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("ChapterTable 不支持步长切片")
+            table = ChapterTable(self.prefix, self.start_index + start)
+            table._titles = self._titles[key]
+            table._suffixes = self._suffixes[key]
+            return table
+
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("章节位置超出范围")
+        return Chapter(title=self._titles[key], url=self.prefix + self._suffixes[key], index=self.start_index + key)
+
+    def __iter__(self) -> Iterator[Chapter]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def _shrink_prefix(self, url: str):
+        """新 URL 不以当前前缀开头时缩短前缀，已有章节的后缀补上被去掉的部分"""
+        length = 0
+        for a, b in zip(self.prefix, url):
+            if a != b:
+                break
+            length += 1
+        prefix = self.prefix[:self.prefix.rfind('/', 0, length) + 1]
+
+        removed = self.prefix[len(prefix):]
+        self._suffixes = [removed + suffix for suffix in self._suffixes]
+        self.prefix = prefix
@@ -71,6 +71,8 @@ class ChapterRule:
 class CrawlConfig:
     """爬取配置"""
     threads: Optional[int] = None
+    min_threads: Optional[int] = None
+    max_threads: Optional[int] = None
     min_interval: Optional[int] = None
     max_interval: Optional[int] = None
     max_attempts: Optional[int] = None
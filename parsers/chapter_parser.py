@@ -3,7 +3,8 @@
 章节内容解析器（重构版 - 忠实于规则配置）
 """
 import re
-from typing import Optional
+from typing import Callable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
 from models.chapter import Chapter
 from models.rule import Rule
 from core.http_client import HttpClient
@@ -14,16 +15,19 @@ from utils.content_filter import ContentFilter
 class ChapterParser:
     """章节内容解析器"""
 
-    def __init__(self, rule: Rule, http_client: HttpClient = None):
+    def __init__(self, rule: Rule, http_client: HttpClient = None, page_parser: Optional[Callable] = None):
         """
         初始化章节解析器
 
         Args:
             rule: 书源规则
             http_client: HTTP 客户端
+            page_parser: 单页解析函数，参数与 parse_page 相同，默认在当前线程调用 parse_page
+                （下载器用它把解析交给进程池）
         """
         self.rule = rule
         self.http_client = http_client or HttpClient()
+        self.page_parser = page_parser or self.parse_page
 
     def parse(self, chapter: Chapter) -> Chapter:
         """
@@ -39,80 +43,11 @@ class ChapterParser:
             print(f"书源 {self.rule.name} 没有配置章节规则")
             return chapter
 
-        chapter_rule = self.rule.chapter
-
         try:
-            # 获取所有分页内容
-            all_content = []
-            current_url = chapter.url
-            page_count = 0
-            max_pages = 50  # 防止无限循环
-
-            while current_url and page_count < max_pages:
-                page_count += 1
-
-                # 发送请求
-                response = self.http_client.get(current_url)
-
-                # 智能检测编码
-                encoding = ContentFilter.detect_encoding(response)
-                response.encoding = encoding
-
-                html = response.text
-
-                # 创建选择器
-                selector = Selector(html, current_url)
-
-                # 提取章节标题（仅第一页）
-                if page_count == 1:
-                    if not chapter.title and chapter_rule.title:
-                        title = selector.select_one(chapter_rule.title)
-                        if title:
-                            chapter.title = title.strip()
-
-                # 提取本页内容（使用规则中的filterTag）
-                content = selector.extract_content(
-                    chapter_rule.content,
-                    chapter_rule.paragraph_tag_closed,
-                    chapter_rule.paragraph_tag,
-                    chapter_rule.filter_tag  # 使用规则配置的filterTag
-                )
-
-                if content:
-                    all_content.append(content)
-
-                # 检查是否有下一页
-                if chapter_rule.pagination and chapter_rule.next_page:
-                    next_url = selector.select_one(chapter_rule.next_page, 'href')
-                    if next_url and next_url != current_url:
-                        # 处理相对路径
-                        if not next_url.startswith('http'):
-                            from urllib.parse import urljoin
-                            next_url = urljoin(current_url, next_url)
-                        current_url = next_url
-                    else:
-                        break
-                else:
-                    break
-
             # 合并所有分页内容
-            full_content = '\n'.join(all_content)
-
-            # 分割段落（依赖selector.extract_content已完成的分段，不使用ContentFilter）
-            # selector.extract_content已经使用了规则的paragraphTag和paragraphTagClosed参数
-            paragraphs = [p.strip() for p in full_content.split('\n') if p.strip()]
-
-            # 应用规则中的过滤器（如果有filterTxt）
-            if chapter_rule.filter_txt:
-                filtered_paragraphs = []
-                for p in paragraphs:
-                    filtered = self._filter_text(p, chapter_rule.filter_txt)
-                    if filtered and filtered.strip():
-                        filtered_paragraphs.append(filtered)
-                paragraphs = filtered_paragraphs
-
-            # 基础清理（仅去除明显无效的段落，不使用激进的广告过滤）
-            paragraphs = self._basic_clean(paragraphs)
+            paragraphs = []
+            for page_paragraphs in self.iter_pages(chapter):
+                paragraphs.extend(page_paragraphs)
 
             # 合并段落
             chapter.content = '\n'.join(paragraphs)
@@ -127,6 +62,122 @@ class ChapterParser:
 
         return chapter
 
+    def iter_pages(self, chapter: Chapter) -> Iterator[List[str]]:
+        """
+        逐页解析章节内容，每解析完一页就产出该页清理后的段落，
+        便于流式返回给阅读器（首段出现时间不再取决于分页数量）
+
+        Args:
+            chapter: 章节对象（包含 URL），第一页解析后会填充标题
+
+        Yields:
+            每一页的段落列表
+        """
+        if not self.rule.chapter:
+            print(f"书源 {self.rule.name} 没有配置章节规则")
+            return
+
+        current_url = chapter.url
+        page_count = 0
+        max_pages = 50  # 防止无限循环
+
+        while current_url and page_count < max_pages:
+            page_count += 1
+
+            # 发送请求（只取原始字节，解码和解析交给 page_parser）
+            response = self.http_client.get(current_url)
+
+            # 提取章节标题（仅第一页）
+            need_title = page_count == 1 and not chapter.title
+            title, paragraphs, next_url = self.page_parser(
+                response.content, response.encoding, current_url, need_title
+            )
+            if need_title and title:
+                chapter.title = title
+
+            if paragraphs:
+                yield paragraphs
+
+            current_url = next_url
+
+    def parse_page(self, content: bytes, encoding: Optional[str], page_url: str,
+                   need_title: bool = False) -> Tuple[Optional[str], List[str], Optional[str]]:
+        """
+        解析单页章节 HTML（纯计算，不发送请求，可以在其他进程中执行）
+
+        Args:
+            content: 页面原始字节
+            encoding: 响应头声明的编码
+            page_url: 页面 URL
+            need_title: 是否提取章节标题
+
+        Returns:
+            (章节标题, 清理后的段落列表, 下一页 URL)
+        """
+        chapter_rule = self.rule.chapter
+
+        # 智能检测编码
+        html = content.decode(ContentFilter.detect_encoding_from_bytes(content, encoding), errors='replace')
+
+        # 创建选择器
+        selector = Selector(html, page_url)
+
+        title = None
+        if need_title and chapter_rule.title:
+            title = selector.select_one(chapter_rule.title)
+            if title:
+                title = title.strip()
+
+        # 提取本页内容（使用规则中的filterTag）
+        content_text = selector.extract_content(
+            chapter_rule.content,
+            chapter_rule.paragraph_tag_closed,
+            chapter_rule.paragraph_tag,
+            chapter_rule.filter_tag  # 使用规则配置的filterTag
+        )
+        paragraphs = self._clean_paragraphs(content_text) if content_text else []
+
+        # 检查是否有下一页
+        next_url = None
+        if chapter_rule.pagination and chapter_rule.next_page:
+            next_url = selector.select_one(chapter_rule.next_page, 'href')
+            if next_url and next_url != page_url:
+                # 处理相对路径
+                if not next_url.startswith('http'):
+                    next_url = urljoin(page_url, next_url)
+            else:
+                next_url = None
+
+        return title, paragraphs, next_url
+
+    def _clean_paragraphs(self, content: str) -> List[str]:
+        """
+        分割并清理单页内容的段落
+
+        Args:
+            content: 本页提取的内容
+
+        Returns:
+            清理后的段落列表
+        """
+        chapter_rule = self.rule.chapter
+
+        # 分割段落（依赖selector.extract_content已完成的分段，不使用ContentFilter）
+        # selector.extract_content已经使用了规则的paragraphTag和paragraphTagClosed参数
+        paragraphs = [p.strip() for p in content.split('\n') if p.strip()]
+
+        # 应用规则中的过滤器（如果有filterTxt）
+        if chapter_rule.filter_txt:
+            filtered_paragraphs = []
+            for p in paragraphs:
+                filtered = self._filter_text(p, chapter_rule.filter_txt)
+                if filtered and filtered.strip():
+                    filtered_paragraphs.append(filtered)
+            paragraphs = filtered_paragraphs
+
+        # 基础清理（仅去除明显无效的段落，不使用激进的广告过滤）
+        return self._basic_clean(paragraphs)
+
     def _filter_text(self, text: str, filter_pattern: str) -> str:
         """
         清理文本中的垃圾内容（保留段落主体）
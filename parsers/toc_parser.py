@@ -2,9 +2,12 @@
 """
 目录解析器
 """
-from typing import List
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional
 from urllib.parse import urljoin
 from models.chapter import Chapter
+from models.chapter_table import ChapterTable
 from models.rule import Rule
 from core.http_client import HttpClient
 from core.selector import Selector
@@ -13,6 +16,12 @@ from core.selector import Selector
 class TocParser:
     """章节目录解析器"""
 
+    # 分页目录并发请求的页面数
+    PAGE_WORKERS = 4
+
+    # 分页目录最多获取的页面数
+    MAX_PAGES = 500
+
     def __init__(self, rule: Rule, http_client: HttpClient = None):
         """
         初始化目录解析器
@@ -24,7 +33,7 @@ class TocParser:
         self.rule = rule
         self.http_client = http_client or HttpClient()
 
-    def parse(self, book_url: str, start_index: int = 1, end_index: int = -1) -> List[Chapter]:
+    def parse(self, book_url: str, start_index: int = 1, end_index: int = -1) -> ChapterTable:
         """
         解析章节目录
 
@@ -34,84 +43,273 @@ class TocParser:
             end_index: 结束章节索引（-1 表示到最后）
 
         Returns:
-            章节列表
+            章节目录表
+        """
+        chapters = ChapterTable()
+        for batch in self.iter_batches(book_url):
+            chapters.extend(batch)
+
+        # 截取指定范围
+        if end_index == -1:
+            end_index = len(chapters)
+
+        chapters = chapters[start_index - 1:end_index]
+
+        if chapters:
+            print(f"成功解析目录，共 {len(chapters)} 章")
+        return chapters
+
+    def iter_batches(self, book_url: str) -> Iterator[List[Chapter]]:
+        """
+        逐页解析章节目录，每解析完一页产出该页的章节（已设置索引、已去重），
+        调用方可以在目录获取完之前开始下载。倒序目录需要全部获取后才能确定索引，一次性产出。
+
+        Args:
+            book_url: 书籍详情页 URL
+
+        Yields:
+            每页的章节列表
         """
         if not self.rule.toc:
             print(f"书源 {self.rule.name} 没有配置目录规则")
-            return []
+            return
 
         toc_rule = self.rule.toc
+        seen = set()  # 已产出的章节 URL（分页目录的每一页常带有相同的"最新章节"区块）
+        count = 0
+        desc_chapters = []
 
         try:
-            # 确定目录页 URL
-            toc_url = toc_rule.url if toc_rule.url else book_url
-
-            # 如果 toc_url 包含 %s，需要从 book_url 中提取 ID
-            if toc_rule.url and '%s' in toc_rule.url:
-                # 从 book_url 中提取书籍 ID
-                # 例如：http://www.yeudusk.com/book/1234916/ -> 1234916
-                import re
-                match = re.search(r'/(\d+)/?$', book_url)
-                if match:
-                    book_id = match.group(1)
-                    toc_url = toc_rule.url.replace('%s', book_id)
-                else:
-                    # 如果无法提取 ID，使用原 URL
-                    print(f"无法从 {book_url} 中提取书籍 ID")
-                    toc_url = book_url
-
-            # 处理相对路径
-            if toc_rule.url and not toc_url.startswith('http'):
-                toc_url = urljoin(book_url, toc_url)
-
-            # 发送请求
-            response = self.http_client.get(toc_url)
-            response.encoding = response.apparent_encoding
-            html = response.text
-
-            # 解析目录
-            chapters = self._parse_toc_page(html, toc_url, toc_rule)
-
-            # 处理倒序
-            if toc_rule.is_desc:
-                chapters.reverse()
-
-            # 设置章节索引
-            for i, chapter in enumerate(chapters, 1):
-                chapter.index = i
-
-            # 截取指定范围
-            if end_index == -1:
-                end_index = len(chapters)
-
-            chapters = chapters[start_index - 1:end_index]
+            for page_chapters in self._iter_pages(book_url):
+                # 页内保留最后一次出现的位置，跨页保留先出现的页面中的章节
+                batch = [chapter for chapter in self._dedupe_page(page_chapters) if chapter.url not in seen]
+                seen.update(chapter.url for chapter in batch)
 
-            print(f"成功解析目录，共 {len(chapters)} 章")
-            return chapters
+                # 处理倒序
+                if toc_rule.is_desc:
+                    desc_chapters.extend(batch)
+                    continue
+
+                # 设置章节索引
+                for chapter in batch:
+                    count += 1
+                    chapter.index = count
+                if batch:
+                    yield batch
+
+            if desc_chapters:
+                desc_chapters.reverse()
+                for i, chapter in enumerate(desc_chapters, 1):
+                    chapter.index = i
+                yield desc_chapters
 
         except Exception as e:
             print(f"解析目录失败: {e}")
+
+    @staticmethod
+    def _dedupe_page(chapters: List[Chapter]) -> List[Chapter]:
+        """
+        页内按 URL 去重，保留最后一次出现的位置
+
+        笔趣阁类目录页的"最新章节"区块在完整目录之前（如 #list > dl > dd > a 同时选中两者），
+        保留第一次出现会把最新的章节排到最前面。
+
+        Args:
+            chapters: 单页的章节列表
+
+        Returns:
+            去重后的章节列表
+        """
+        seen = set()
+        unique = []
+        for chapter in reversed(chapters):
+            if chapter.url not in seen:
+                seen.add(chapter.url)
+                unique.append(chapter)
+        unique.reverse()
+        return unique
+
+    def _iter_pages(self, book_url: str) -> Iterator[List[Chapter]]:
+        """
+        按顺序逐页获取目录
+
+        分页目录能列举出全部页面地址时（分页下拉框、页码链接）并发请求、按顺序产出；
+        否则沿"下一页"链接逐页请求。列举的最后一页仍有未访问的下一页时继续沿链接请求。
+
+        Args:
+            book_url: 书籍详情页 URL
+
+        Yields:
+            每页的章节列表（未去重）
+        """
+        toc_rule = self.rule.toc
+        toc_url = self._resolve_toc_url(book_url)
+
+        # 第一页失败时整个目录失败
+        html = self._fetch_page(toc_url)
+        yield self._parse_toc_page(html, toc_url, toc_rule)
+
+        if not (toc_rule.pagination and toc_rule.next_page):
+            return
+
+        visited = {toc_url}
+        page_url = toc_url
+
+        page_urls = [url for url in self._enumerate_pages(html, toc_url) if url not in visited]
+        if page_urls:
+            page_urls = page_urls[:self.MAX_PAGES]
+            print(f"目录还有 {len(page_urls)} 页，并发获取...")
+            visited.update(page_urls)
+
+            with ThreadPoolExecutor(max_workers=min(self.PAGE_WORKERS, len(page_urls))) as executor:
+                for page_url, html in zip(page_urls, executor.map(self._fetch_page_safe, page_urls)):
+                    if html is not None:
+                        yield self._parse_toc_page(html, toc_url, toc_rule, page_url)
+
+        # 沿"下一页"链接逐页获取
+        while html is not None and len(visited) < self.MAX_PAGES:
+            next_url = self._find_next_page(html, page_url)
+            if not next_url or next_url in visited:
+                break
+
+            visited.add(next_url)
+            html = self._fetch_page_safe(next_url)
+            if html is not None:
+                yield self._parse_toc_page(html, toc_url, toc_rule, next_url)
+            page_url = next_url
+
+    def _resolve_toc_url(self, book_url: str) -> str:
+        """
+        确定目录页 URL
+
+        Args:
+            book_url: 书籍详情页 URL
+
+        Returns:
+            目录页 URL
+        """
+        toc_rule = self.rule.toc
+        toc_url = toc_rule.url if toc_rule.url else book_url
+
+        # 如果 toc_url 包含 %s，需要从 book_url 中提取 ID
+        if toc_rule.url and '%s' in toc_rule.url:
+            # 从 book_url 中提取书籍 ID
+            # 例如：http://www.yeudusk.com/book/1234916/ -> 1234916
+            match = re.search(r'/(\d+)/?$', book_url)
+            if match:
+                book_id = match.group(1)
+                toc_url = toc_rule.url.replace('%s', book_id)
+            else:
+                # 如果无法提取 ID，使用原 URL
+                print(f"无法从 {book_url} 中提取书籍 ID")
+                toc_url = book_url
+
+        # 处理相对路径
+        if toc_rule.url and not toc_url.startswith('http'):
+            toc_url = urljoin(book_url, toc_url)
+
+        return toc_url
+
+    def _fetch_page(self, url: str) -> str:
+        """请求目录页，返回 HTML"""
+        response = self.http_client.get(url)
+        response.encoding = response.apparent_encoding
+        return response.text
+
+    def _fetch_page_safe(self, url: str) -> Optional[str]:
+        """请求目录页，失败时返回 None（单页失败不影响其他页）"""
+        try:
+            return self._fetch_page(url)
+        except Exception as e:
+            print(f"获取目录分页失败: {url} - {e}")
+            return None
+
+    def _enumerate_pages(self, html: str, page_url: str) -> List[str]:
+        """
+        列举分页目录的全部页面地址
+
+        nextPage 选中 option 时取各选项的 value（分页下拉框）；
+        选中链接时，查找页面上与下一页链接只有页码不同的链接，按最大页码生成全部地址。
+
+        Args:
+            html: 第一页 HTML
+            page_url: 第一页 URL
+
+        Returns:
+            页面地址列表（按页码顺序），无法列举时返回空列表
+        """
+        selector = Selector(html, page_url)
+        next_page = self.rule.toc.next_page
+
+        # 分页下拉框
+        options = selector.select(next_page, 'value')
+        if options:
+            return self._unique([urljoin(page_url, value) for value in options])
+
+        # 页码链接：下一页链接中的最后一个数字为页码
+        next_url = self._find_next_page(html, page_url, selector)
+        match = next_url and re.search(r'(\d+)(\D*)$', next_url)
+        if not match:
+            return []
+
+        prefix, suffix = next_url[:match.start(1)], match.group(2)
+        pattern = re.compile(re.escape(prefix) + r'(\d+)' + re.escape(suffix) + '$')
+        numbers = [
+            int(m.group(1)) for m in (
+                pattern.match(urljoin(page_url, href)) for href in selector.select('a', 'href')
+            ) if m
+        ]
+        first, last = int(match.group(1)), max(numbers, default=0)
+        if last <= first:
             return []
 
-    def _parse_toc_page(self, html: str, base_url: str, toc_rule) -> List[Chapter]:
+        width = len(match.group(1))  # 保留补零位数（page_02）
+        return [f"{prefix}{str(n).zfill(width)}{suffix}" for n in range(first, last + 1)]
+
+    def _find_next_page(self, html: str, page_url: str, selector: Optional[Selector] = None) -> Optional[str]:
+        """
+        获取"下一页"链接
+
+        Args:
+            html: 页面 HTML
+            page_url: 页面 URL
+            selector: 已创建的选择器
+
+        Returns:
+            下一页 URL，没有时返回 None
+        """
+        selector = selector or Selector(html, page_url)
+        next_url = selector.select_one(self.rule.toc.next_page, 'href')
+        if not next_url or next_url.startswith('javascript'):
+            return None
+
+        next_url = urljoin(page_url, next_url)
+        return next_url if next_url != page_url else None
+
+    @staticmethod
+    def _unique(urls: List[str]) -> List[str]:
+        """去重并保持顺序"""
+        return list(dict.fromkeys(urls))
+
+    def _parse_toc_page(self, html: str, base_url: str, toc_rule, page_url: Optional[str] = None) -> List[Chapter]:
         """
         解析单个目录页
 
         Args:
             html: HTML 内容
-            base_url: 基础 URL
+            base_url: 基础 URL（目录第一页的 URL，baseUri 中的 %s 从中提取书籍 ID）
             toc_rule: 目录规则
+            page_url: 当前分页的 URL，没有配置 baseUri 时相对链接按它解析，默认为 base_url
 
         Returns:
             章节列表
         """
-        base_uri = toc_rule.base_uri or base_url
+        base_uri = toc_rule.base_uri or page_url or base_url
         
         # 处理 base_uri 中的 %s 占位符
         if base_uri and '%s' in base_uri:
             # 从 book_url 中提取书籍 ID
             # 例如：http://www.xbiquzw.net/10_10229/ -> 10_10229
-            import re
             match = re.search(r'/(\d+_\d+|\d+)/?$', base_url)
             if match:
                 book_id = match.group(1)
@@ -4,104 +4,220 @@ Z Reader - Web 服务器
 基于 Flask 的 Web 界面
 """
 import os
+import sys
 import json
+import gzip
+import mimetypes
 import time
-import sqlite3
+import atexit
+import subprocess
+import multiprocessing
+import threading
 from datetime import datetime
-from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
+from flask import Flask, Blueprint, render_template, request, jsonify, send_file, Response, stream_with_context
 from pathlib import Path
-import threading
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from core.rule_loader import RuleLoader
 from core.http_client import HttpClient
 from core.downloader import Downloader
+from core.multi_source import MultiSourceDownloader
+from core.reader_cache import ReaderCache
+from core.content_store import ContentStore
+from core.prefetcher import Prefetcher
+from core.task_store import TaskStore
+from core.job_runner import JobRunner
+from core.circuit_breaker import CircuitBreakerRegistry
+from core.storage import Storage
+from core.assets import AssetPipeline
+from core.validators import ChapterValidation, BlockPageValidator, MinLengthValidator
 from parsers.search_parser import SearchParser
 from models.chapter import Chapter
+from models.chapter_table import ChapterTable
 from parsers.book_parser import BookParser
 from parsers.toc_parser import TocParser
 from parsers.chapter_parser import ChapterParser
 
-# 创建 Flask 应用
-app = Flask(__name__)
-app.config['JSON_AS_ASCII'] = False  # 支持中文
-
-# 全局变量
-rule_loader = RuleLoader()
-download_tasks = {}  # 下载任务字典
-task_lock = threading.Lock()
-
-# Reader cache for book info and chapter content
-reader_cache = {}
+# 路由蓝图（应用由 create_app 创建）
+bp = Blueprint('zreader', __name__)
 
 # 数据库文件路径
 DB_PATH = Path("zreader.db")
 
-# 数据库操作锁
-db_lock = threading.Lock()
-
+# 全局变量（打开数据库或启动后台线程的对象在 init_services 中创建，导入本模块时没有副作用）
+rule_loader = RuleLoader()
+storage = None  # SQLite 存储（WAL 模式，每线程独立连接）
+task_store = None  # 下载任务存储（多个 worker 进程通过数据库共享）
+
+# 下载任务执行配置
+DOWNLOAD_MAX_JOBS = 2  # 每个进程同时执行的最大下载任务数
+DOWNLOAD_POLL_INTERVAL = 1.0  # 检查新下载任务的间隔（秒）
+DOWNLOAD_WORKER_PROCESSES = 1  # 独立的下载 worker 进程数，为 0 时在 Web 进程内执行下载
+DOWNLOAD_WORKER_NICE = 5  # worker 进程降低的调度优先级（仅 POSIX）
+DOWNLOAD_HEDGE_REQUESTS = True  # 章节请求超过 p95 耗时仍未返回时补发一次
+DOWNLOAD_REPAIR_ROUNDS = 2  # 校验失败（拦截页、过短、重复内容）章节的重新获取轮数
+DOWNLOAD_REPAIR_BACKOFF = 5.0  # 第一轮重新获取前的等待时间（秒），之后每轮翻倍
+DOWNLOAD_MAX_SOURCES = 3  # 多书源下载时同时使用的最大书源数（包括选择的书源）
+DOWNLOAD_EPUB_COMPRESS_LEVEL = 6  # EPUB 的压缩级别（0-9，越大文件越小、越慢）
+job_runner = None  # 下载任务执行器（create_app 或 run_worker 中创建）
+
+# 任务进度推送配置
+TASK_STREAM_INTERVAL = 0.5  # 检查任务变化的间隔（秒）
+TASK_STREAM_MIN_INTERVAL = 1.0  # 同一任务两次进度推送的最小间隔（秒）
+TASK_STREAM_HEARTBEAT = 15  # 心跳间隔（秒）
+
+# 阅读器缓存配置
+READER_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 缓存字节预算
+READER_CACHE_BOOK_TTL = 10 * 60  # 书籍信息和目录缓存时间（秒）
+READER_CACHE_CHAPTER_TTL = 24 * 60 * 60  # 章节内容缓存时间（秒）
+READER_CACHE_COMPRESS = True  # 是否压缩缓存的章节正文
+
+reader_cache = None  # 阅读器的书籍信息和章节内容缓存（每个进程一份，是共享内容存储之前的内存缓存）
+content_store = None  # 磁盘内容存储（阅读器与下载器共用的章节、目录缓存）
+CONTENT_STORE_DIR = "cache"  # 内容存储的对象目录
+CONTENT_STORE_MAX_BYTES = 1024 * 1024 * 1024  # 内容对象总大小上限，超出后淘汰最久未用的章节和目录
+CONTENT_STORE_GC_INTERVAL = 6 * 60 * 60  # 清理无引用对象和超限内容的间隔（秒）
+
+# 阅读器获取的章节写入内容存储前的校验（拦截页、过短）；重复内容校验需要同一本书的上下文，不在这里使用
+reader_validation = ChapterValidation([BlockPageValidator(), MinLengthValidator()])
+
+# 预读配置
+PREFETCH_MIN_AHEAD = 1  # 最少预读章节数
+PREFETCH_MAX_AHEAD = 8  # 最多预读章节数
+PREFETCH_WORKERS = 2  # 预读线程数
+prefetcher = None  # 阅读器预读（init_services 中创建，每个进程各自的线程，预读的章节写入共享的内容存储）
+
+# 书源熔断配置（搜索、检查和阅读器共用，按书源名称区分）
+SOURCE_BREAKER_FAILURE_THRESHOLD = 5  # 连续失败多少次后暂停访问
+SOURCE_BREAKER_RECOVERY_TIMEOUT = 60  # 暂停多久后放行探测请求（秒）
+source_breakers = None  # 各书源的熔断器（状态保存在数据库中，所有进程共享）
+
+# 批量获取章节配置
+READER_BATCH_MAX_CHAPTERS = 10  # 单次请求最多章节数
+READER_BATCH_WORKERS = 3  # 单次请求的最大并发数
+
+# 目录分段获取配置
+READER_TOC_PAGE_SIZE = 200  # 默认每段章节数
+READER_TOC_MAX_LIMIT = 1000  # 单次请求最多章节数
+
+# 响应压缩配置
+RESPONSE_GZIP_MIN_BYTES = 1024  # 超过该大小的文本响应才压缩
+RESPONSE_GZIP_LEVEL = 6  # gzip 压缩级别
+RESPONSE_GZIP_MIMETYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+# 静态资源构建配置（启动时压缩并以内容哈希命名，通过 /assets/ 提供并长期缓存）
+ASSET_FILES = ['css/style.css', 'css/reader.css', 'js/app.js', 'js/reader.js', 'js/chapter-cache.js']
+ASSET_MAX_AGE = 365 * 24 * 60 * 60  # 构建产物的缓存时间（秒）
+asset_pipeline = None  # 静态资源构建（init_services 中创建，create_app 中构建）
 
 # ==================== 数据库操作 ====================
-def init_database():
-    """初始化数据库"""
-    with sqlite3.connect(DB_PATH) as conn:
-        cursor = conn.cursor()
-
-        # 创建书源检查结果表
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS source_check_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                results TEXT NOT NULL,
-                summary TEXT NOT NULL,
-                timestamp INTEGER NOT NULL
-            )
-        ''')
-
-        conn.commit()
-
-
 def save_check_results_to_db(results, summary):
     """保存书源检查结果到数据库"""
-    with db_lock:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-
-            # 删除旧记录（只保留最新一条）
-            cursor.execute('DELETE FROM source_check_results')
-
-            # 插入新记录
-            cursor.execute(
-                'INSERT INTO source_check_results (results, summary, timestamp) VALUES (?, ?, ?)',
-                (json.dumps(results, ensure_ascii=False),
-                 json.dumps(summary, ensure_ascii=False),
-                 int(time.time() * 1000))
-            )
+    now = int(time.time() * 1000)
+
+    with storage.transaction() as conn:
+        # 删除旧记录（只保留最新一条）
+        conn.execute('DELETE FROM source_check_results')
+
+        # 插入新记录
+        conn.execute(
+            'INSERT INTO source_check_results (results, summary, timestamp) VALUES (?, ?, ?)',
+            (json.dumps(results, ensure_ascii=False),
+             json.dumps(summary, ensure_ascii=False),
+             now)
+        )
 
-            conn.commit()
+        # 批量更新书源统计
+        conn.executemany(
+            '''
+            INSERT INTO source_stats (source, status, message, success_count, failure_count, checked_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(source) DO UPDATE SET
+                status = excluded.status,
+                message = excluded.message,
+                success_count = success_count + excluded.success_count,
+                failure_count = failure_count + excluded.failure_count,
+                checked_at = excluded.checked_at,
+                updated_at = excluded.updated_at
+            ''',
+            [
+                (r['name'], r['status'], r['message'],
+                 1 if r['status'] == 'success' else 0,
+                 1 if r['status'] == 'error' else 0,
+                 now, now)
+                for r in results
+            ]
+        )
 
 
 def load_check_results_from_db():
     """从数据库加载书源检查结果"""
-    with db_lock:
-        with sqlite3.connect(DB_PATH) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'SELECT results, summary, timestamp FROM source_check_results ORDER BY id DESC LIMIT 1'
-            )
-            row = cursor.fetchone()
+    row = storage.query_one(
+        'SELECT results, summary, timestamp FROM source_check_results ORDER BY id DESC LIMIT 1'
+    )
 
-            if row:
-                return {
-                    'results': json.loads(row[0]),
-                    'summary': json.loads(row[1]),
-                    'timestamp': row[2]
-                }
+    if row:
+        return {
+            'results': json.loads(row[0]),
+            'summary': json.loads(row[1]),
+            'timestamp': row[2]
+        }
+
+    return None
 
-            return None
+
+# ==================== 响应压缩 ====================
+@bp.after_app_request
+def compress_response(response):
+    """客户端支持 gzip 时压缩较大的文本响应（跳过流式响应和文件）"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in RESPONSE_GZIP_MIMETYPES
+            or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()):
+        return response
+
+    data = response.get_data()
+    if len(data) < RESPONSE_GZIP_MIN_BYTES:
+        return response
+
+    response.set_data(gzip.compress(data, compresslevel=RESPONSE_GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+
+    # 压缩后的内容与原文不再逐字节相同，强 ETag 改为弱 ETag
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+# ==================== 静态资源 ====================
+@bp.app_template_global()
+def asset_url(path):
+    """模板中引用静态资源（已构建时返回带内容哈希的地址）"""
+    return asset_pipeline.url(path)
+
+
+@bp.route('/assets/<path:filename>')
+def built_asset(filename):
+    """提供构建后的静态资源（按 Accept-Encoding 选择预压缩文件，文件名带哈希，可永久缓存）"""
+    path, encoding = asset_pipeline.resolve(filename, request.headers.get('Accept-Encoding', ''))
+    if path is None:
+        return "Not Found", 404
+
+    response = send_file(path, mimetype=mimetypes.guess_type(filename)[0], max_age=ASSET_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    return response
 
 
 # ==================== 首页 ====================
-@app.route('/')
+@bp.route('/')
 def index():
     """首页"""
     # 读取公告内容
@@ -157,8 +273,26 @@ def convert_markdown_to_html(md_text):
 
 
 
+# ==================== 书源熔断 ====================
+def get_breaker_message(rule):
+    """
+    书源熔断中时返回提示信息
+
+    Returns:
+        提示信息，未熔断时返回 None
+    """
+    breaker = source_breakers.get(rule.name)
+    if not breaker.is_open():
+        return None
+
+    retry_in = breaker.stats()['retry_in']
+    if retry_in:
+        return f"书源暂时不可用（熔断中，{retry_in} 秒后重试）"
+    return "书源暂时不可用（熔断中）"
+
+
 # ==================== 书源管理 ====================
-@app.route('/api/sources')
+@bp.route('/api/sources')
 def get_sources():
     """获取所有书源列表"""
     try:
@@ -172,7 +306,8 @@ def get_sources():
                 'url': rule.url,
                 'comment': rule.comment or '',
                 'search_enabled': bool(rule.search and not rule.search.disabled),
-                'has_crawl_config': bool(rule.crawl)
+                'has_crawl_config': bool(rule.crawl),
+                'breaker': source_breakers.stats(rule.name) or {'state': 'closed', 'failures': 0, 'retry_in': None}
             })
 
         return jsonify({
@@ -188,7 +323,7 @@ def get_sources():
         }), 500
 
 
-@app.route('/api/sources/check', methods=['POST'])
+@bp.route('/api/sources/check', methods=['POST'])
 def check_sources():
     """检查所有书源可用性"""
     try:
@@ -214,6 +349,14 @@ def check_sources():
                 results.append(result)
                 continue
 
+            # 熔断中的书源不再发请求
+            breaker_message = get_breaker_message(rule)
+            if breaker_message:
+                result['status'] = 'error'
+                result['message'] = breaker_message
+                results.append(result)
+                continue
+
             try:
                 # 创建HTTP客户端
                 http_client = HttpClient(
@@ -221,7 +364,8 @@ def check_sources():
                     min_interval=0.5,
                     max_interval=1.0,
                     verify_ssl=not rule.ignore_ssl,
-                    timeout=3  # 减少超时时间
+                    timeout=3,  # 减少超时时间
+                    breaker=source_breakers.get(rule.name)
                 )
 
                 # 执行搜索测试
@@ -271,7 +415,7 @@ def check_sources():
         }), 500
 
 
-@app.route('/api/sources/check/cached', methods=['GET'])
+@bp.route('/api/sources/check/cached', methods=['GET'])
 def get_cached_check_results():
     """获取缓存的书源检查结果"""
     try:
@@ -297,7 +441,7 @@ def get_cached_check_results():
         }), 500
 
 
-@app.route('/api/sources/check/stream', methods=['POST'])
+@bp.route('/api/sources/check/stream', methods=['POST'])
 def check_sources_stream():
     """检查所有书源可用性（SSE流式返回结果）"""
     def generate():
@@ -332,6 +476,15 @@ def check_sources_stream():
                     yield f"data: {json.dumps({'type': 'result', 'source': rule.name, 'result': result, 'completed': i, 'total': total}, ensure_ascii=False)}\n\n"
                     continue
 
+                # 熔断中的书源不再发请求
+                breaker_message = get_breaker_message(rule)
+                if breaker_message:
+                    result['status'] = 'error'
+                    result['message'] = breaker_message
+                    results.append(result)
+                    yield f"data: {json.dumps({'type': 'result', 'source': rule.name, 'result': result, 'completed': i, 'total': total}, ensure_ascii=False)}\n\n"
+                    continue
+
                 try:
                     # 创建HTTP客户端
                     http_client = HttpClient(
@@ -339,7 +492,8 @@ def check_sources_stream():
                         min_interval=0.5,
                         max_interval=1.0,
                         verify_ssl=not rule.ignore_ssl,
-                        timeout=5  # 减少超时时间
+                        timeout=5,  # 减少超时时间
+                        breaker=source_breakers.get(rule.name)
                     )
 
                     # 执行搜索测试
@@ -401,7 +555,7 @@ def check_sources_stream():
 
 
 # ==================== 搜索功能 ====================
-@app.route('/api/search', methods=['POST'])
+@bp.route('/api/search', methods=['POST'])
 def search_books():
     """搜索书籍"""
     try:
@@ -433,8 +587,13 @@ def search_books():
             if not rule.search or rule.search.disabled:
                 continue
 
+            breaker_message = get_breaker_message(rule)
+            if breaker_message:
+                print(f"跳过书源 ({rule.name}): {breaker_message}")
+                continue
+
             try:
-                http_client = HttpClient(verify_ssl=not rule.ignore_ssl)
+                http_client = HttpClient(verify_ssl=not rule.ignore_ssl, breaker=source_breakers.get(rule.name))
                 parser = SearchParser(rule, http_client)
                 books = parser.search(keyword, max_results=20)
 
@@ -471,7 +630,7 @@ def search_books():
         }), 500
 
 
-@app.route('/api/search/stream', methods=['POST'])
+@bp.route('/api/search/stream', methods=['POST'])
 def search_books_stream():
     """搜索书籍（SSE流式返回进度）"""
     data = request.get_json()
@@ -502,7 +661,7 @@ def search_books_stream():
             total_sources = sum(1 for r in rules if r.search and not r.search.disabled)
             yield f"data: {json.dumps({'type': 'start', 'total': total_sources, 'keyword': keyword}, ensure_ascii=False)}\n\n"
 
-            all_books = []
+            total_books = 0
             completed = 0
 
             for rule in rules:
@@ -512,10 +671,18 @@ def search_books_stream():
                 # 发送当前搜索的书源
                 yield f"data: {json.dumps({'type': 'searching', 'source': rule.name}, ensure_ascii=False)}\n\n"
 
+                # 熔断中的书源直接返回错误，不再等待超时
+                breaker_message = get_breaker_message(rule)
+                if breaker_message:
+                    completed += 1
+                    yield f"data: {json.dumps({'type': 'error_source', 'source': rule.name, 'error': breaker_message, 'completed': completed, 'total': total_sources}, ensure_ascii=False)}\n\n"
+                    continue
+
                 try:
                     http_client = HttpClient(
                         verify_ssl=not rule.ignore_ssl,
-                        timeout=3
+                        timeout=3,
+                        breaker=source_breakers.get(rule.name)
                     )
                     parser = SearchParser(rule, http_client)
                     books = parser.search(keyword, max_results=20)
@@ -534,10 +701,10 @@ def search_books_stream():
                             'word_count': book.word_count,
                             'status': book.status
                         }
-                        all_books.append(book_data)
                         source_books.append(book_data)
 
                     completed += 1
+                    total_books += len(source_books)
 
                     # 发送搜索结果
                     yield f"data: {json.dumps({'type': 'result', 'source': rule.name, 'books': source_books, 'count': len(books), 'completed': completed, 'total': total_sources}, ensure_ascii=False)}\n\n"
@@ -552,8 +719,8 @@ def search_books_stream():
                 # 添加小延迟避免过快
                 time.sleep(0.1)
 
-            # 发送完成事件
-            yield f"data: {json.dumps({'type': 'complete', 'total_books': len(all_books), 'books': all_books}, ensure_ascii=False)}\n\n"
+            # 发送完成事件（结果已随 result 事件发送，这里只发送总数）
+            yield f"data: {json.dumps({'type': 'complete', 'total_books': total_books}, ensure_ascii=False)}\n\n"
 
         except Exception as e:
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)}, ensure_ascii=False)}\n\n"
@@ -570,7 +737,7 @@ def search_books_stream():
 
 
 # ==================== 下载功能 ====================
-@app.route('/api/download', methods=['POST'])
+@bp.route('/api/download', methods=['POST'])
 def start_download():
     """开始下载书籍"""
     try:
@@ -580,6 +747,7 @@ def start_download():
         start_chapter = data.get('start_chapter', 1)
         end_chapter = data.get('end_chapter', -1)
         format_type = data.get('format', 'txt')  # 默认为 txt
+        multi_source = bool(data.get('multi_source', False))  # 是否同时从其他书源下载
 
         if not book_url:
             return jsonify({
@@ -604,74 +772,31 @@ def start_download():
 
         rule = rules[source_id - 1]
 
-        # 生成任务 ID
-        task_id = f"{int(datetime.now().timestamp() * 1000)}"
-
-        # 创建下载任务
-        with task_lock:
-            download_tasks[task_id] = {
-                'id': task_id,
-                'book_url': book_url,
-                'source_name': rule.name,
-                'status': 'pending',
-                'progress': 0,
-                'total_chapters': 0,
-                'downloaded_chapters': 0,
-                'book_name': '',
-                'author': '',
-                'error': None,
-                'created_at': datetime.now().isoformat()
-            }
-
-        # 在后台线程中执行下载
-        def download_task():
-            try:
-                with task_lock:
-                    download_tasks[task_id]['status'] = 'downloading'
-
-                # 进度回调函数
-                def update_progress(stage, completed, total, book_name, author):
-                    with task_lock:
-                        download_tasks[task_id]['book_name'] = book_name
-                        download_tasks[task_id]['author'] = author
-                        download_tasks[task_id]['total_chapters'] = total
-                        download_tasks[task_id]['downloaded_chapters'] = completed
-
-                        if total > 0:
-                            progress = int((completed / total) * 100)
-                            download_tasks[task_id]['progress'] = progress
-
-                # 创建下载器
-                downloader = Downloader(
-                    rule,
-                    output_dir="downloads",
-                    progress_callback=update_progress
-                )
-
-                # 下载
-                success = downloader.download(
-                    book_url=book_url,
-                    start_chapter=start_chapter,
-                    end_chapter=end_chapter,
-                    format=format_type
-                )
-
-                with task_lock:
-                    if success:
-                        download_tasks[task_id]['status'] = 'completed'
-                        download_tasks[task_id]['progress'] = 100
-                    else:
-                        download_tasks[task_id]['status'] = 'failed'
-                        download_tasks[task_id]['error'] = '下载失败'
-
-            except Exception as e:
-                with task_lock:
-                    download_tasks[task_id]['status'] = 'failed'
-                    download_tasks[task_id]['error'] = str(e)
+        # 生成任务 ID（带上进程号，多个 worker 进程同时创建任务时不会冲突）
+        task_id = f"{int(datetime.now().timestamp() * 1000)}-{os.getpid()}"
+
+        # 创建下载任务（写入共享的任务表，由某个进程的任务执行器领取执行）
+        task_store.create({
+            'id': task_id,
+            'book_url': book_url,
+            'source_name': rule.name,
+            'start_chapter': start_chapter,
+            'end_chapter': end_chapter,
+            'format': format_type,
+            'multi_source': multi_source,
+            'status': 'pending',
+            'progress': 0,
+            'total_chapters': 0,
+            'downloaded_chapters': 0,
+            'concurrency': 0,
+            'book_name': '',
+            'author': '',
+            'error': None,
+            'created_at': datetime.now().isoformat()
+        })
 
-        # 启动下载线程
-        thread = threading.Thread(target=download_task, daemon=True)
-        thread.start()
+        if job_runner:
+            job_runner.notify()
 
         return jsonify({
             'success': True,
@@ -688,11 +813,88 @@ def start_download():
         }), 500
 
 
-@app.route('/api/tasks')
+def run_download_job(task):
+    """执行下载任务（由任务执行器在后台线程中调用）"""
+    task_id = task['id']
+
+    rule = rule_loader.get_rule_by_name(task['source_name'], "main-rules.json")
+    if not rule:
+        task_store.update(task_id, status='failed', error=f"书源不存在: {task['source_name']}")
+        return
+
+    # 重新排队的任务从头开始，已下载的章节会命中内容存储
+    task_store.update(task_id, progress=0, downloaded_chapters=0, error=None, stage='downloading',
+                      failed_chapters=0, warning_chapters=0, repaired_chapters=0)
+
+    # 进度回调函数（同时上报下载器当前的自适应并发数）
+    def update_progress(stage, completed, total, book_name, author):
+        fields = {
+            'book_name': book_name,
+            'author': author,
+            'total_chapters': total,
+            'downloaded_chapters': completed,
+            'concurrency': downloader.concurrency,
+            'stage': stage
+        }
+        if total > 0:
+            fields['progress'] = int((completed / total) * 100)
+
+        task_store.update(task_id, **fields)
+
+    # 章节结果回调函数（保存每章的状态，任务中只记录各状态的数量）
+    def save_chapters(chapters):
+        task_store.save_chapters(task_id, chapters)
+        task_store.update(
+            task_id,
+            failed_chapters=sum(1 for c in chapters if c['status'] == 'failed'),
+            warning_chapters=sum(1 for c in chapters if c['status'] == 'warning'),
+            repaired_chapters=sum(1 for c in chapters if c['status'] == 'repaired')
+        )
+
+    try:
+        # 创建下载器
+        options = dict(
+            output_dir="downloads",
+            progress_callback=update_progress,
+            content_store=content_store,
+            hedge_requests=DOWNLOAD_HEDGE_REQUESTS,
+            repair_rounds=DOWNLOAD_REPAIR_ROUNDS,
+            repair_backoff=DOWNLOAD_REPAIR_BACKOFF,
+            chapter_callback=save_chapters,
+            epub_compress_level=DOWNLOAD_EPUB_COMPRESS_LEVEL
+        )
+        if task.get('multi_source'):
+            downloader = MultiSourceDownloader(
+                rule,
+                rule_loader.load_rules("main-rules.json"),
+                max_sources=DOWNLOAD_MAX_SOURCES,
+                breakers=source_breakers,
+                **options
+            )
+        else:
+            downloader = Downloader(rule, **options)
+
+        # 下载
+        success = downloader.download(
+            book_url=task['book_url'],
+            start_chapter=task.get('start_chapter', 1),
+            end_chapter=task.get('end_chapter', -1),
+            format=task.get('format', 'txt')
+        )
+
+        if success:
+            task_store.update(task_id, status='completed', progress=100)
+        else:
+            task_store.update(task_id, status='failed', error='下载失败')
+
+    except Exception as e:
+        task_store.update(task_id, status='failed', error=str(e))
+
+
+@bp.route('/api/tasks')
 def get_tasks():
     """获取所有下载任务"""
-    with task_lock:
-        tasks = list(download_tasks.values())
+    tasks = task_store.list()
 
     return jsonify({
         'success': True,
@@ -701,11 +903,78 @@ def get_tasks():
     })
 
 
-@app.route('/api/tasks/<task_id>')
+@bp.route('/api/tasks/stream')
+def stream_tasks():
+    """推送下载任务进度（SSE，先发送全量快照，之后只推送合并后的增量）"""
+    def generate():
+        version = task_store.version
+        tasks = task_store.list()
+        yield f"data: {json.dumps({'type': 'snapshot', 'tasks': tasks}, ensure_ascii=False)}\n\n"
+
+        # 每个任务上次推送的内容和时间，用于计算增量和限制推送频率
+        sent = {task['id']: task for task in tasks}
+        sent_at = {}
+        last_message = time.time()
+
+        while True:
+            time.sleep(TASK_STREAM_INTERVAL)
+            now = time.time()
+
+            changed, deleted, version_now = task_store.changes_since(version)
+            updates = []
+            deferred = False
+
+            for task in changed:
+                previous = sent.get(task['id'])
+                if previous and previous.get('version') == task['version']:
+                    continue
+
+                # 进度类更新按任务限频，状态变化立即推送
+                if (previous and previous.get('status') == task.get('status')
+                        and now - sent_at.get(task['id'], 0) < TASK_STREAM_MIN_INTERVAL):
+                    deferred = True
+                    continue
+
+                if previous:
+                    delta = {k: v for k, v in task.items() if previous.get(k) != v}
+                    delta['id'] = task['id']
+                else:
+                    delta = task
+
+                updates.append(delta)
+                sent[task['id']] = task
+                sent_at[task['id']] = now
+
+            for task_id in deleted:
+                sent.pop(task_id, None)
+                sent_at.pop(task_id, None)
+
+            # 有被限频推迟的任务时不推进版本号，下一轮继续检查
+            if not deferred:
+                version = version_now
+
+            if updates or deleted:
+                yield f"data: {json.dumps({'type': 'update', 'tasks': updates, 'deleted': deleted}, ensure_ascii=False)}\n\n"
+                last_message = now
+            elif now - last_message >= TASK_STREAM_HEARTBEAT:
+                yield ": heartbeat\n\n"
+                last_message = now
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'Connection': 'keep-alive'
+        }
+    )
+
+
+@bp.route('/api/tasks/<task_id>')
 def get_task(task_id):
-    """获取指定下载任务的状态"""
-    with task_lock:
-        task = download_tasks.get(task_id)
+    """获取指定下载任务的状态（包含每个章节的下载结果）"""
+    task = task_store.get(task_id)
 
     if not task:
         return jsonify({
@@ -713,31 +982,31 @@ def get_task(task_id):
             'message': '任务不存在'
         }), 404
 
+    task['chapters'] = task_store.get_chapters(task_id)
+
     return jsonify({
         'success': True,
         'data': task
     })
 
 
-@app.route('/api/tasks/<task_id>', methods=['DELETE'])
+@bp.route('/api/tasks/<task_id>', methods=['DELETE'])
 def delete_task(task_id):
     """删除下载任务"""
-    with task_lock:
-        if task_id in download_tasks:
-            del download_tasks[task_id]
-            return jsonify({
-                'success': True,
-                'message': '任务已删除'
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'message': '任务不存在'
-            }), 404
+    if task_store.delete(task_id):
+        return jsonify({
+            'success': True,
+            'message': '任务已删除'
+        })
+    else:
+        return jsonify({
+            'success': False,
+            'message': '任务不存在'
+        }), 404
 
 
 # ==================== 文件下载 ====================
-@app.route('/api/files')
+@bp.route('/api/files')
 def list_files():
     """列出下载目录中的文件"""
     try:
@@ -777,7 +1046,7 @@ def list_files():
         }), 500
 
 
-@app.route('/api/files/<filename>')
+@bp.route('/api/files/<filename>')
 def download_file(filename):
     """下载文件"""
     try:
@@ -803,9 +1072,9 @@ def download_file(filename):
 
 
 # ==================== 阅读器功能 ====================
-@app.route('/api/reader/book', methods=['POST'])
+@bp.route('/api/reader/book', methods=['POST'])
 def get_reader_book_info():
-    """获取阅读器书籍信息和章节列表"""
+    """获取阅读器书籍信息（只返回章节数和目录版本，目录通过 /api/reader/toc 分段获取）"""
     try:
         data = request.get_json()
         book_url = data.get('book_url', '').strip()
@@ -819,10 +1088,11 @@ def get_reader_book_info():
 
         # 检查缓存
         cache_key = f"book_{source_id}_{book_url}"
-        if cache_key in reader_cache:
+        cached_data = reader_cache.get(cache_key)
+        if cached_data is not None:
             return jsonify({
                 'success': True,
-                'data': reader_cache[cache_key],
+                'data': book_response_data(cached_data),
                 'cached': True
             })
 
@@ -838,49 +1108,40 @@ def get_reader_book_info():
 
         try:
             # 创建HTTP客户端和解析器
-            http_client = HttpClient(verify_ssl=not rule.ignore_ssl, timeout=3)
+            http_client = HttpClient(verify_ssl=not rule.ignore_ssl, timeout=3, breaker=source_breakers.get(rule.name))
             
             # 获取书籍信息
             book_parser = BookParser(rule, http_client)
             book = book_parser.parse(book_url)
-            
-            if not book:
-                http_client.close()
-                return jsonify({
-                    'success': False,
-                    'message': '获取书籍信息失败'
-                }), 404
 
             # 获取章节列表
-            toc_parser = TocParser(rule, http_client)
-            chapters = toc_parser.parse(book_url, 1, -1)  # 获取所有章节
-            
+            chapters = []
+            if book:
+                toc_parser = TocParser(rule, http_client)
+                chapters = toc_parser.parse(book_url, 1, -1)  # 获取所有章节
+
             http_client.close()
 
-            # 构建返回数据
-            book_data = {
-                'book_name': book.book_name,
-                'author': book.author,
-                'intro': book.intro,
-                'category': book.category,
-                'cover_url': book.cover_url,
-                'latest_chapter': book.latest_chapter,
-                'status': book.status,
-                'chapters': [
-                    {
-                        'index': chapter.index,
-                        'title': chapter.title,
-                        'url': chapter.url
-                    } for chapter in chapters
-                ]
-            }
+            if book and chapters:
+                book_data = ContentStore.book_to_dict(book, chapters)
+                content_store.put_book(rule.name, book_url, book_data)
+            else:
+                # 网络获取失败时使用内容存储中的离线数据
+                book_data = content_store.get_book(rule.name, book_url)
+                if not book_data:
+                    if not book:
+                        return jsonify({
+                            'success': False,
+                            'message': '获取书籍信息失败'
+                        }), 404
+                    book_data = ContentStore.book_to_dict(book, chapters)
 
             # 缓存结果
-            reader_cache[cache_key] = book_data
+            reader_cache.set(cache_key, book_data, ReaderCache.KIND_BOOK)
 
             return jsonify({
                 'success': True,
-                'data': book_data,
+                'data': book_response_data(book_data),
                 'cached': False
             })
 
@@ -897,13 +1158,235 @@ def get_reader_book_info():
         }), 500
 
 
-@app.route('/api/reader/chapter', methods=['POST'])
+def book_response_data(book_data):
+    """将缓存的书籍数据转换为接口返回的格式（目录只返回章节数和版本号）"""
+    chapters = book_data.get('chapters') or ChapterTable()
+    data = {key: value for key, value in book_data.items() if key != 'chapters'}
+    data['chapter_count'] = len(chapters)
+    data['toc_version'] = chapters.version
+    return data
+
+
+@bp.route('/api/reader/toc')
+def get_reader_toc_range():
+    """
+    分段获取目录
+
+    参数 source_id、book_url、start（从 0 开始的位置）、limit。返回紧凑格式：
+    URL 公共前缀 prefix、标题数组 titles 和去掉前缀的 URL 数组 urls。
+    ETag 由目录版本和范围组成，客户端带 If-None-Match 请求未变化的目录时返回 304。
+    """
+    try:
+        source_id = request.args.get('source_id', type=int)
+        book_url = request.args.get('book_url', '').strip()
+        start = max(0, request.args.get('start', 0, type=int))
+        limit = request.args.get('limit', READER_TOC_PAGE_SIZE, type=int)
+        limit = min(max(1, limit), READER_TOC_MAX_LIMIT)
+
+        if not book_url or not source_id:
+            return jsonify({
+                'success': False,
+                'message': '请提供书籍 URL 和书源 ID'
+            }), 400
+
+        rules = rule_loader.load_rules("main-rules.json")
+        if source_id < 1 or source_id > len(rules):
+            return jsonify({
+                'success': False,
+                'message': f'无效的书源 ID: {source_id}'
+            }), 400
+
+        chapters = get_reader_toc(source_id, rules[source_id - 1], book_url)
+        if chapters is None:
+            return jsonify({
+                'success': False,
+                'message': '目录未加载，请先获取书籍信息'
+            }), 404
+
+        response = jsonify({
+            'success': True,
+            'data': toc_window(chapters, start, limit)
+        })
+        response.set_etag(f"{chapters.version}-{start}-{limit}")
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'获取目录失败: {str(e)}'
+        }), 500
+
+
+def toc_window(chapters, start, limit):
+    """目录的一段（紧凑格式：URL 公共前缀、标题数组和去掉前缀的 URL 数组）"""
+    page = chapters[start:start + limit].to_dict()
+    return {
+        'start': start,
+        'total': len(chapters),
+        'version': chapters.version,
+        'prefix': page['prefix'],
+        'titles': page['titles'],
+        'urls': page['urls']
+    }
+
+
+def create_reader_http_client(rule, timeout=3):
+    """创建遵循书源请求间隔配置、带熔断器的 HTTP 客户端"""
+    crawl = rule.crawl
+    return HttpClient(
+        verify_ssl=not rule.ignore_ssl,
+        timeout=timeout,
+        min_interval=crawl.min_interval if crawl and crawl.min_interval else 0,
+        max_interval=crawl.max_interval if crawl and crawl.max_interval else 0,
+        breaker=source_breakers.get(rule.name)
+    )
+
+
+def get_reader_toc(source_id, rule, book_url):
+    """获取缓存的目录表（先查阅读器缓存，再查内容存储），不存在返回 None"""
+    book_data = reader_cache.get(f"book_{source_id}_{book_url}")
+    if book_data is None:
+        book_data = content_store.get_book(rule.name, book_url)
+    if not book_data:
+        return None
+    return book_data.get('chapters') or ChapterTable()
+
+
+def load_reader_chapter(source_id, rule, chapter_url, http_client):
+    """
+    获取阅读器章节数据（阅读器缓存 -> 内容存储 -> 书源）
+
+    Returns:
+        (章节数据, 是否命中阅读器缓存)
+    """
+    cache_key = f"chapter_{source_id}_{chapter_url}"
+    cached_data = reader_cache.get(cache_key)
+    if cached_data is not None:
+        return cached_data, True
+
+    chapter_parser = ChapterParser(rule, http_client)
+    chapter = content_store.fetch_chapter(rule.name, Chapter(url=chapter_url), chapter_parser.parse, reader_validation)
+
+    chapter_data = {
+        'title': chapter.title,
+        'content': chapter.content,
+        'url': chapter.url,
+        'index': chapter.index,
+        'error': chapter.error  # 未通过校验的原因，阅读页据此决定是否写入本地缓存
+    }
+
+    # 仅缓存成功获取并通过校验的章节（拦截页等仍返回给阅读页显示，但不缓存）
+    if chapter.content and not chapter.error:
+        reader_cache.set(cache_key, chapter_data, ReaderCache.KIND_CHAPTER)
+
+    return chapter_data, False
+
+
+def get_cached_reader_chapter(source_id, rule, chapter_url):
+    """获取已缓存的章节数据（阅读器缓存 -> 内容存储，不访问书源），不存在返回 None"""
+    cache_key = f"chapter_{source_id}_{chapter_url}"
+    chapter_data = reader_cache.get(cache_key)
+    if chapter_data is not None:
+        return chapter_data
+
+    stored = content_store.get_chapter(rule.name, chapter_url)
+    if not stored or not stored['content']:
+        return None
+
+    # 旧版本未经校验写入的拦截页等不再使用
+    if reader_validation.validate(Chapter(title=stored['title'], url=chapter_url, content=stored['content']))[0]:
+        return None
+
+    chapter_data = dict(stored, index=None)
+    reader_cache.set(cache_key, chapter_data, ReaderCache.KIND_CHAPTER)
+    return chapter_data
+
+
+def reader_bootstrap(source_id, rule, book_url, chapter_index=None):
+    """
+    阅读页内嵌的初始数据（只使用已缓存的书籍信息、目录和章节，不访问书源）
+
+    Args:
+        source_id: 书源 ID
+        rule: 书源规则
+        book_url: 书籍 URL
+        chapter_index: 要打开的章节位置（从 0 开始），None 表示第一章
+
+    Returns:
+        包含 book、toc（目录中 chapter_index 所在的一段）、chapter_index、chapter 的字典，
+        未缓存的部分为 None
+    """
+    bootstrap = {'book': None, 'toc': None, 'chapter_index': chapter_index, 'chapter': None}
+
+    book_data = reader_cache.get(f"book_{source_id}_{book_url}")
+    if book_data is None:
+        book_data = content_store.get_book(rule.name, book_url)
+    if not book_data:
+        return bootstrap
+
+    bootstrap['book'] = book_response_data(book_data)
+    chapters = book_data.get('chapters')
+    if not chapters:
+        return bootstrap
+
+    if chapter_index is None or not 0 <= chapter_index < len(chapters):
+        chapter_index = 0
+    start = chapter_index - chapter_index % READER_TOC_PAGE_SIZE
+    bootstrap['chapter_index'] = chapter_index
+    bootstrap['toc'] = toc_window(chapters, start, READER_TOC_PAGE_SIZE)
+    bootstrap['chapter'] = get_cached_reader_chapter(source_id, rule, chapters.url(chapter_index))
+
+    if bootstrap['chapter']:
+        schedule_prefetch(source_id, rule, book_url, chapter_index)
+    return bootstrap
+
+
+def prefetch_chapter(context, chapter_url):
+    """预读单个章节并写入阅读器缓存（后台线程调用）"""
+    source_id, rule = context
+    if f"chapter_{source_id}_{chapter_url}" in reader_cache:
+        return
+
+    http_client = create_reader_http_client(rule, timeout=10)
+    try:
+        load_reader_chapter(source_id, rule, chapter_url, http_client)
+    finally:
+        http_client.close()
+
+
+def schedule_prefetch(source_id, rule, book_url, chapter_index):
+    """根据缓存的目录安排后续章节的预读"""
+    if not book_url or chapter_index is None:
+        return
+
+    chapters = get_reader_toc(source_id, rule, book_url)
+    if not chapters:
+        return
+
+    if not isinstance(chapter_index, int) or not 0 <= chapter_index < len(chapters):
+        return
+
+    session_key = f"{request.remote_addr}_{source_id}_{book_url}"
+    prefetcher.on_read(
+        session_key,
+        rule.name,
+        chapters,
+        chapter_index,
+        context=(source_id, rule),
+        is_cached=lambda url: f"chapter_{source_id}_{url}" in reader_cache
+    )
+
+
+@bp.route('/api/reader/chapter', methods=['POST'])
 def get_reader_chapter():
     """获取阅读器章节内容"""
     try:
         data = request.get_json()
         chapter_url = data.get('chapter_url', '').strip()
         source_id = data.get('source_id')
+        book_url = data.get('book_url', '').strip()  # 可选，用于预读
+        chapter_index = data.get('chapter_index')  # 可选，章节在目录中的位置（从 0 开始）
 
         if not chapter_url or not source_id:
             return jsonify({
@@ -911,15 +1394,6 @@ def get_reader_chapter():
                 'message': '请提供章节 URL 和书源 ID'
             }), 400
 
-        # 检查缓存
-        cache_key = f"chapter_{source_id}_{chapter_url}"
-        if cache_key in reader_cache:
-            return jsonify({
-                'success': True,
-                'data': reader_cache[cache_key],
-                'cached': True
-            })
-
         # 加载规则
         rules = rule_loader.load_rules("main-rules.json")
         if source_id < 1 or source_id > len(rules):
@@ -930,39 +1404,22 @@ def get_reader_chapter():
 
         rule = rules[source_id - 1]
 
-        try:
-            # 创建HTTP客户端和解析器
-            http_client = HttpClient(verify_ssl=not rule.ignore_ssl, timeout=3)
-            chapter_parser = ChapterParser(rule, http_client)
-            
-            # 创建章节对象并传递URL
-            chapter_obj = Chapter(url=chapter_url)
-            
-            # 获取章节内容
-            chapter = chapter_parser.parse(chapter_obj)
-            http_client.close()
+        # 安排后续章节预读
+        schedule_prefetch(source_id, rule, book_url, chapter_index)
 
-            if not chapter:
-                return jsonify({
-                    'success': False,
-                    'message': '获取章节内容失败'
-                }), 404
-
-            # 构建返回数据
-            chapter_data = {
-                'title': chapter.title,
-                'content': chapter.content,
-                'url': chapter.url,
-                'index': chapter.index
-            }
+        try:
+            # 创建HTTP客户端
+            http_client = HttpClient(verify_ssl=not rule.ignore_ssl, timeout=3, breaker=source_breakers.get(rule.name))
 
-            # 缓存结果
-            reader_cache[cache_key] = chapter_data
+            # 获取章节内容，期间暂停该书源的预读
+            with prefetcher.foreground(rule.name):
+                chapter_data, cached = load_reader_chapter(source_id, rule, chapter_url, http_client)
+            http_client.close()
 
             return jsonify({
                 'success': True,
                 'data': chapter_data,
-                'cached': False
+                'cached': cached
             })
 
         except Exception as e:
@@ -978,7 +1435,205 @@ def get_reader_chapter():
         }), 500
 
 
-@app.route('/reader/<int:source_id>/<path:book_url>')
+@bp.route('/api/reader/chapter/stream', methods=['POST'])
+def get_reader_chapter_stream():
+    """获取阅读器章节内容（SSE流式返回，每解析完一页推送一次）"""
+    data = request.get_json()
+    chapter_url = data.get('chapter_url', '').strip()
+    source_id = data.get('source_id')
+    book_url = data.get('book_url', '').strip()  # 可选，用于预读
+    chapter_index = data.get('chapter_index')  # 可选，章节在目录中的位置（从 0 开始）
+    refresh = bool(data.get('refresh'))  # 可选，跳过缓存重新从书源获取（用户重试时使用）
+
+    if not chapter_url or not source_id:
+        return jsonify({
+            'success': False,
+            'message': '请提供章节 URL 和书源 ID'
+        }), 400
+
+    rules = rule_loader.load_rules("main-rules.json")
+    if source_id < 1 or source_id > len(rules):
+        return jsonify({
+            'success': False,
+            'message': f'无效的书源 ID: {source_id}'
+        }), 400
+
+    rule = rules[source_id - 1]
+
+    # 安排后续章节预读
+    schedule_prefetch(source_id, rule, book_url, chapter_index)
+
+    def generate():
+        """生成SSE事件流"""
+        cache_key = f"chapter_{source_id}_{chapter_url}"
+
+        # 已缓存的章节一次性返回（缓存中只有通过校验的章节）
+        if refresh:
+            reader_cache.delete(cache_key)
+            cached_data = None
+        else:
+            cached_data = get_cached_reader_chapter(source_id, rule, chapter_url)
+        if cached_data is not None:
+            paragraphs = (cached_data.get('content') or '').split('\n')
+            yield f"data: {json.dumps({'type': 'page', 'page': 1, 'title': cached_data.get('title'), 'paragraphs': paragraphs}, ensure_ascii=False)}\n\n"
+            yield f"data: {json.dumps({'type': 'complete', 'pages': 1, 'cached': True, 'valid': True, 'error': None}, ensure_ascii=False)}\n\n"
+            return
+
+        http_client = HttpClient(verify_ssl=not rule.ignore_ssl, timeout=3, breaker=source_breakers.get(rule.name))
+        chapter = Chapter(url=chapter_url)
+        all_paragraphs = []
+        page = 0
+
+        try:
+            with prefetcher.foreground(rule.name):
+                for page_paragraphs in ChapterParser(rule, http_client).iter_pages(chapter):
+                    page += 1
+                    all_paragraphs.extend(page_paragraphs)
+                    yield f"data: {json.dumps({'type': 'page', 'page': page, 'title': chapter.title, 'paragraphs': page_paragraphs}, ensure_ascii=False)}\n\n"
+
+            # 完整获取并通过校验后写入缓存；校验结果随 complete 事件返回，阅读页只在本地缓存通过校验的章节
+            chapter.content = '\n'.join(all_paragraphs)
+            error = reader_validation.validate(chapter)[0]
+            if error is None:
+                content_store.put_chapter(rule.name, chapter.url, chapter.title, chapter.content)
+                reader_cache.set(cache_key, {
+                    'title': chapter.title,
+                    'content': chapter.content,
+                    'url': chapter.url,
+                    'index': chapter.index
+                }, ReaderCache.KIND_CHAPTER)
+
+            yield f"data: {json.dumps({'type': 'complete', 'pages': page, 'cached': False, 'valid': error is None, 'error': error}, ensure_ascii=False)}\n\n"
+
+        except Exception as e:
+            yield f"data: {json.dumps({'type': 'error', 'message': f'获取章节内容失败: {str(e)}'}, ensure_ascii=False)}\n\n"
+
+        finally:
+            http_client.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'Connection': 'keep-alive'
+        }
+    )
+
+
+@bp.route('/api/reader/chapters', methods=['POST'])
+def get_reader_chapters():
+    """批量获取阅读器章节内容（SSE流式返回，每完成一章推送一次）"""
+    try:
+        data = request.get_json(silent=True) or {}
+        source_id = int(data.get('source_id') or 0)
+        book_url = (data.get('book_url') or '').strip()
+        indices = data.get('indices')  # 章节在目录中的位置列表（从 0 开始）
+        start = data.get('start')  # 或使用 start + count 指定范围
+        count = int(data.get('count', READER_BATCH_MAX_CHAPTERS))
+        if start is not None:
+            start = int(start)
+        if indices is not None and not isinstance(indices, list):
+            raise TypeError('indices 应为列表')
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'message': '请求参数格式错误'
+        }), 400
+
+    if not book_url or not source_id:
+        return jsonify({
+            'success': False,
+            'message': '请提供书籍 URL 和书源 ID'
+        }), 400
+
+    if indices is None:
+        if start is None:
+            return jsonify({
+                'success': False,
+                'message': '请提供章节位置列表或范围'
+            }), 400
+        # 与目录分段接口的 limit 一样限制范围
+        start = max(0, start)
+        count = min(max(1, count), READER_BATCH_MAX_CHAPTERS)
+        indices = list(range(start, start + count))
+
+    rules = rule_loader.load_rules("main-rules.json")
+    if source_id < 1 or source_id > len(rules):
+        return jsonify({
+            'success': False,
+            'message': f'无效的书源 ID: {source_id}'
+        }), 400
+
+    rule = rules[source_id - 1]
+
+    chapters = get_reader_toc(source_id, rule, book_url)
+    if not chapters:
+        return jsonify({
+            'success': False,
+            'message': '目录未加载，请先获取书籍信息'
+        }), 404
+
+    # 去重并限制单次请求的章节数
+    seen = set()
+    valid_indices = []
+    for index in indices:
+        if isinstance(index, int) and 0 <= index < len(chapters) and index not in seen:
+            seen.add(index)
+            valid_indices.append(index)
+    valid_indices = valid_indices[:READER_BATCH_MAX_CHAPTERS]
+
+    # 并发数不超过书源配置的线程数
+    max_workers = READER_BATCH_WORKERS
+    if rule.crawl and rule.crawl.threads:
+        max_workers = min(max_workers, rule.crawl.threads)
+
+    def generate():
+        """生成SSE事件流"""
+        yield f"data: {json.dumps({'type': 'start', 'total': len(valid_indices)}, ensure_ascii=False)}\n\n"
+
+        http_client = create_reader_http_client(rule)
+        executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        completed = 0
+
+        try:
+            with prefetcher.foreground(rule.name):
+                future_to_index = {
+                    executor.submit(load_reader_chapter, source_id, rule, chapters.url(index), http_client): index
+                    for index in valid_indices
+                }
+
+                # 按完成顺序推送
+                for future in as_completed(future_to_index):
+                    index = future_to_index[future]
+                    completed += 1
+                    try:
+                        chapter_data, cached = future.result()
+                        valid = bool(chapter_data.get('content')) and not chapter_data.get('error')
+                        yield f"data: {json.dumps({'type': 'chapter', 'chapter_index': index, 'data': chapter_data, 'cached': cached, 'valid': valid, 'completed': completed, 'total': len(valid_indices)}, ensure_ascii=False)}\n\n"
+                    except Exception as e:
+                        yield f"data: {json.dumps({'type': 'error_chapter', 'chapter_index': index, 'error': str(e), 'completed': completed, 'total': len(valid_indices)}, ensure_ascii=False)}\n\n"
+
+            yield f"data: {json.dumps({'type': 'complete', 'total': len(valid_indices)}, ensure_ascii=False)}\n\n"
+
+        finally:
+            # 客户端断开时取消未开始的章节
+            executor.shutdown(wait=False, cancel_futures=True)
+            http_client.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'Connection': 'keep-alive'
+        }
+    )
+
+
+@bp.route('/reader/<int:source_id>/<path:book_url>')
 def reader_page(source_id, book_url):
     """阅读器页面"""
     # 加载规则验证书源ID
@@ -988,28 +1643,228 @@ def reader_page(source_id, book_url):
             return "无效的书源 ID", 404
         
         rule = rules[source_id - 1]
-        
+
+        # ?chapter=N 打开第 N 章（从 1 开始）
+        chapter = request.args.get('chapter', type=int)
+        chapter_index = chapter - 1 if chapter and chapter > 0 else None
+
+        # 内嵌已缓存的书籍信息、目录和章节，页面无需再等待接口请求即可显示正文
+        try:
+            bootstrap = reader_bootstrap(source_id, rule, book_url, chapter_index)
+        except Exception as e:
+            print(f"读取阅读页初始数据失败: {e}")
+            bootstrap = {'book': None, 'toc': None, 'chapter_index': chapter_index, 'chapter': None}
+
         return render_template('reader.html', 
                           source_id=source_id, 
                           book_url=book_url,
-                          source_name=rule.name)
+                          source_name=rule.name,
+                          bootstrap=bootstrap)
     except Exception as e:
         return f"加载阅读器失败: {str(e)}", 500
 
 
-# ==================== 启动服务器 ====================
-if __name__ == '__main__':
+@bp.route('/reader-sw.js')
+def reader_service_worker():
+    """阅读器 Service Worker（从根路径提供，作用域覆盖阅读页和目录接口）"""
+    response = send_file(
+        Path(__file__).parent / 'static' / 'js' / 'reader-sw.js',
+        mimetype='application/javascript',
+        max_age=0
+    )
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# ==================== 应用初始化 ====================
+def init_services():
+    """
+    创建进程内的共享对象（数据库、任务存储、缓存、熔断器、预读器、静态资源构建）
+
+    由 create_app 和 run_worker 调用，重复调用时直接返回。这些对象会打开数据库、启动后台线程，
+    不在导入时创建：解析进程池以 spawn 方式启动时会重新导入主模块，不能在每个解析进程中再启动一套。
+    """
+    global storage, task_store, reader_cache, content_store, source_breakers, prefetcher, asset_pipeline
+
+    if storage is not None:
+        return
+
+    storage = Storage(DB_PATH)
+    task_store = TaskStore(storage=storage)
+    reader_cache = ReaderCache(
+        max_bytes=READER_CACHE_MAX_BYTES,
+        book_ttl=READER_CACHE_BOOK_TTL,
+        chapter_ttl=READER_CACHE_CHAPTER_TTL,
+        compress_chapters=READER_CACHE_COMPRESS
+    )
+    content_store = ContentStore(
+        storage,
+        CONTENT_STORE_DIR,
+        max_bytes=CONTENT_STORE_MAX_BYTES,
+        gc_interval=CONTENT_STORE_GC_INTERVAL
+    )
+    source_breakers = CircuitBreakerRegistry(
+        failure_threshold=SOURCE_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout=SOURCE_BREAKER_RECOVERY_TIMEOUT,
+        storage=storage
+    )
+    prefetcher = Prefetcher(
+        prefetch_chapter,
+        min_ahead=PREFETCH_MIN_AHEAD,
+        max_ahead=PREFETCH_MAX_AHEAD,
+        num_workers=PREFETCH_WORKERS
+    )
+    asset_pipeline = AssetPipeline(
+        Path(__file__).parent / 'static',
+        Path(__file__).parent / 'static' / 'dist',
+        ASSET_FILES
+    )
+
+
+def create_app(run_jobs=True):
+    """
+    创建 Flask 应用
+
+    Args:
+        run_jobs: 是否在本进程中领取并执行下载任务
+
+    Returns:
+        Flask 应用
+    """
+    global job_runner
+
+    init_services()
+
+    flask_app = Flask(__name__)
+    flask_app.config['JSON_AS_ASCII'] = False  # 支持中文
+    flask_app.register_blueprint(bp)
+
+    # 构建静态资源
+    try:
+        asset_pipeline.build()
+    except Exception as e:
+        print(f"构建静态资源失败，使用未压缩的文件: {e}")
+
     # 创建下载目录
     Path("downloads").mkdir(exist_ok=True)
 
-    # 初始化数据库
-    init_database()
+    if run_jobs and job_runner is None:
+        job_runner = JobRunner(
+            task_store,
+            run_download_job,
+            max_jobs=DOWNLOAD_MAX_JOBS,
+            poll_interval=DOWNLOAD_POLL_INTERVAL
+        )
+        job_runner.start()
+
+    return flask_app
+
+
+# ==================== 下载 worker 进程 ====================
+def run_worker(max_jobs=DOWNLOAD_MAX_JOBS, parent_pid=None):
+    """
+    在当前进程中持续执行下载任务（独立 worker 进程的入口）
+
+    Args:
+        max_jobs: 同时执行的最大任务数
+        parent_pid: 启动本进程的 Web 进程号（由 start_worker_processes 传入），该进程退出时随之退出；
+            为 None 时（单独启动的 worker.py）一直运行到被终止
+    """
+    global job_runner
+
+    init_services()
+    Path("downloads").mkdir(exist_ok=True)
+
+    # 降低优先级，避免批量下载的解析占满 CPU 影响 Web 进程
+    if hasattr(os, 'nice') and DOWNLOAD_WORKER_NICE:
+        try:
+            os.nice(DOWNLOAD_WORKER_NICE)
+        except OSError:
+            pass
+
+    job_runner = JobRunner(
+        task_store,
+        run_download_job,
+        max_jobs=max_jobs,
+        poll_interval=DOWNLOAD_POLL_INTERVAL
+    )
+    job_runner.start()
+    print(f"下载 worker 已启动 (pid={os.getpid()}, 并发任务数={max_jobs})")
+
+    try:
+        # 父进程退出后本进程被重新挂到其他进程下，getppid 随之改变
+        while parent_pid is None or os.getppid() == parent_pid:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        task_store.flush()
+
+
+def start_worker_processes(count):
+    """
+    启动下载 worker 子进程，进程意外退出时自动重启，Web 进程退出时一并结束
+
+    Args:
+        count: 进程数
+    """
+    # 打包后的可执行文件通过参数进入 worker 模式，并传入本进程号，worker 在本进程退出后随之退出
+    if getattr(sys, 'frozen', False):
+        command = [sys.executable, '--worker']
+    else:
+        command = [sys.executable, os.path.abspath(__file__), '--worker']
+    command += ['--parent-pid', str(os.getpid())]
+
+    processes = [subprocess.Popen(command) for _ in range(count)]
+    stopping = threading.Event()
+
+    def monitor():
+        while not stopping.wait(5):
+            for i, process in enumerate(processes):
+                if process.poll() is not None:
+                    print(f"下载 worker 进程已退出 (code={process.returncode})，正在重启")
+                    processes[i] = subprocess.Popen(command)
+
+    def stop():
+        stopping.set()
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    threading.Thread(target=monitor, daemon=True).start()
+    atexit.register(stop)
+
+
+# ==================== 启动服务器 ====================
+if __name__ == '__main__':
+    # 打包后的可执行文件中，解析进程池的子进程需要由此进入
+    multiprocessing.freeze_support()
+
+    if '--worker' in sys.argv:
+        parent_pid = None
+        if '--parent-pid' in sys.argv:
+            parent_pid = int(sys.argv[sys.argv.index('--parent-pid') + 1])
+        run_worker(parent_pid=parent_pid)
+        sys.exit(0)
+
+    # 下载任务交给独立进程执行，避免解析占用 Web 进程的 GIL
+    if DOWNLOAD_WORKER_PROCESSES > 0:
+        start_worker_processes(DOWNLOAD_WORKER_PROCESSES)
+        app = create_app(run_jobs=False)
+    else:
+        app = create_app()
 
     # 启动服务器
     print("\n" + "=" * 60)
     print("Z Reader - Web 服务器")
     print("=" * 60)
     print("\n访问地址: http://localhost:5000")
+    print("生产环境多进程部署请使用 wsgi.py（见 README）")
     print("按 Ctrl+C 停止服务器\n")
     webbrowser.open("http://localhost:5000")
     app.run(
@@ -1,6 +1,10 @@
 // 全局变量
 let currentTab = 'search';
 let searchResults = [];
+let searchResultKeys = new Set();  // 已显示的结果（书源 ID + 书籍 URL），用于去重
+let pendingSearchResults = [];  // 等待渲染的结果在 searchResults 中的位置
+let searchRenderPending = false;
+let searchGeneration = 0;  // 每次搜索加一，旧搜索的流不再渲染
 let currentDownloadBook = null;
 
 // 页面加载完成
@@ -29,11 +33,17 @@ function switchTab(tabName, event) {
 
     currentTab = tabName;
 
+    // 离开任务页时关闭进度推送
+    if (tabName !== 'tasks') {
+        closeTaskStream();
+    }
+
     // 加载标签页内容
     if (tabName === 'sources') {
         loadSources();
     } else if (tabName === 'tasks') {
         refreshTasks();
+        openTaskStream();
     } else if (tabName === 'files') {
         refreshFiles();
     }
@@ -137,6 +147,7 @@ function renderSources(sources) {
                     ${source.search_enabled ? '✓ 支持搜索' : '✗ 不支持搜索'}
                 </span>
                 ${source.has_crawl_config ? '<span class="source-badge badge-success">✓ 限流配置</span>' : ''}
+                ${source.breaker && source.breaker.state !== 'closed' ? `<span class="source-badge badge-warning">⚠ ${source.breaker.state === 'open' ? `熔断中${source.breaker.retry_in ? `（${source.breaker.retry_in} 秒后重试）` : ''}` : '恢复探测中'}</span>` : ''}
             </div>
         </div>
     `).join('');
@@ -396,9 +407,11 @@ async function searchBooks() {
 
     const loadingEl = document.getElementById('search-loading');
     const resultsEl = document.getElementById('search-results');
+    const generation = ++searchGeneration;
 
     loadingEl.style.display = 'block';
     resultsEl.innerHTML = '';
+    resetSearchResults();
 
     // 使用SSE流式接口
     try {
@@ -427,7 +440,6 @@ async function searchBooks() {
         const reader = response.body.getReader();
         const decoder = new TextDecoder();
         let buffer = '';
-        let allBooks = [];
         let totalSources = 0;
         let completed = 0;
 
@@ -439,6 +451,12 @@ async function searchBooks() {
                 break;
             }
 
+            // 已开始新的搜索，停止读取
+            if (generation !== searchGeneration) {
+                reader.cancel();
+                return;
+            }
+
             buffer += decoder.decode(value, { stream: true });
             const lines = buffer.split('\n\n');
             buffer = lines.pop(); // 保留最后一个不完整的部分
@@ -477,10 +495,8 @@ async function searchBooks() {
                             ${data.source}: 找到 <span style="color: #4caf50; font-weight: bold;">${data.count}</span> 本书 (${completed}/${totalSources})
                         `;
 
-                        // 实时显示结果
-                        allBooks.push(...data.books);
-                        renderSearchResults(allBooks);
-                        searchResults = allBooks;
+                        // 实时追加结果
+                        addSearchResults(data.books);
                         break;
 
                     case 'error_source':
@@ -496,12 +512,12 @@ async function searchBooks() {
                         loadingEl.style.display = 'none';
                         progressDiv.innerHTML = `
                             <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 15px; border-radius: 4px;">
-                                ✓ 搜索完成！共找到 <strong>${data.total_books}</strong> 本书
+                                ✓ 搜索完成！共找到 <strong>${searchResults.length}</strong> 本书
                             </div>
                         `;
-                        allBooks = data.books;
-                        renderSearchResults(allBooks);
-                        searchResults = allBooks;
+                        if (searchResults.length === 0) {
+                            getBooksContainer().innerHTML = '<p style="text-align: center; color: #888; padding: 40px;">未找到相关书籍</p>';
+                        }
                         break;
 
                     case 'error':
@@ -533,23 +549,60 @@ function openReader(index) {
     window.open(readerUrl, '_blank');
 }
 
-function renderSearchResults(books) {
-    const resultsEl = document.getElementById('search-results');
+// 清空搜索结果
+function resetSearchResults() {
+    searchResults = [];
+    searchResultKeys = new Set();
+    pendingSearchResults = [];
+}
+
+// 添加一批搜索结果（跳过已显示的书），在下一帧统一渲染
+function addSearchResults(books) {
+    for (const book of books) {
+        const key = `${book.source_id}|${book.url}`;
+        if (searchResultKeys.has(key)) {
+            continue;
+        }
+        searchResultKeys.add(key);
+        searchResults.push(book);
+        pendingSearchResults.push(searchResults.length - 1);
+    }
 
-    // 查找或创建结果容器
+    if (pendingSearchResults.length > 0 && !searchRenderPending) {
+        searchRenderPending = true;
+        requestAnimationFrame(flushSearchResults);
+    }
+}
+
+// 查找或创建结果容器
+function getBooksContainer() {
+    const resultsEl = document.getElementById('search-results');
     let booksContainer = resultsEl.querySelector('.books-container');
     if (!booksContainer) {
         booksContainer = document.createElement('div');
         booksContainer.className = 'books-container';
         resultsEl.appendChild(booksContainer);
     }
+    return booksContainer;
+}
 
-    if (books.length === 0) {
-        booksContainer.innerHTML = '<p style="text-align: center; color: #888; padding: 40px;">未找到相关书籍</p>';
+// 把等待渲染的结果一次性追加到列表末尾，已显示的结果不重新渲染
+function flushSearchResults() {
+    searchRenderPending = false;
+    if (pendingSearchResults.length === 0) {
         return;
     }
 
-    booksContainer.innerHTML = books.map((book, index) => `
+    // template.content 是 DocumentFragment，整批结果只触发一次布局
+    const template = document.createElement('template');
+    template.innerHTML = pendingSearchResults.map(index => renderSearchResult(searchResults[index], index)).join('');
+    pendingSearchResults = [];
+    getBooksContainer().appendChild(template.content);
+}
+
+// 渲染单个搜索结果（index 为在 searchResults 中的位置）
+function renderSearchResult(book, index) {
+    return `
         <div class="result-item">
             <div class="result-header">
                 <div>
@@ -569,7 +622,7 @@ function renderSearchResults(books) {
             </div>
             ${book.latest_chapter ? `<div style="margin-top: 10px; color: #666;">最新: ${book.latest_chapter}</div>` : ''}
         </div>
-    `).join('');
+    `;
 }
 
 // ==================== 下载功能 ====================
@@ -598,6 +651,7 @@ async function startDownload() {
     const startChapter = parseInt(document.getElementById('download-start').value);
     const endChapter = parseInt(document.getElementById('download-end').value);
     const format = document.getElementById('download-format').value;
+    const multiSource = document.getElementById('download-multi-source').value === '1';
 
     try {
         const response = await fetch('/api/download', {
@@ -610,7 +664,8 @@ async function startDownload() {
                 source_id: sourceId,
                 start_chapter: startChapter,
                 end_chapter: endChapter,
-                format: format
+                format: format,
+                multi_source: multiSource
             })
         });
 
@@ -642,6 +697,8 @@ async function refreshTasks() {
         const result = await response.json();
 
         if (result.success) {
+            taskMap = {};
+            result.data.forEach(task => taskMap[task.id] = task);
             renderTasks(result.data);
         } else {
             showToast(result.message, 'error');
@@ -651,6 +708,56 @@ async function refreshTasks() {
     }
 }
 
+// ==================== 任务进度推送 ====================
+let taskMap = {};
+let taskEventSource = null;
+let taskRenderPending = false;
+
+// 订阅任务进度推送（服务端先发全量快照，之后只推送变化的字段）
+function openTaskStream() {
+    if (!window.EventSource || taskEventSource) {
+        return;
+    }
+
+    taskEventSource = new EventSource('/api/tasks/stream');
+    taskEventSource.onmessage = function(event) {
+        const data = JSON.parse(event.data);
+
+        if (data.type === 'snapshot') {
+            taskMap = {};
+            data.tasks.forEach(task => taskMap[task.id] = task);
+        } else if (data.type === 'update') {
+            data.tasks.forEach(delta => {
+                taskMap[delta.id] = Object.assign(taskMap[delta.id] || {}, delta);
+            });
+            data.deleted.forEach(taskId => delete taskMap[taskId]);
+        }
+
+        scheduleTaskRender();
+    };
+    // 连接断开时 EventSource 会自动重连，重连后重新收到快照
+}
+
+function closeTaskStream() {
+    if (taskEventSource) {
+        taskEventSource.close();
+        taskEventSource = null;
+    }
+}
+
+// 合并同一帧内的多次更新，只渲染一次
+function scheduleTaskRender() {
+    if (currentTab !== 'tasks' || taskRenderPending) {
+        return;
+    }
+
+    taskRenderPending = true;
+    requestAnimationFrame(() => {
+        taskRenderPending = false;
+        renderTasks(Object.values(taskMap));
+    });
+}
+
 function renderTasks(tasks) {
     const listEl = document.getElementById('tasks-list');
 
@@ -671,7 +778,7 @@ function renderTasks(tasks) {
                         ${task.author ? `<span style="color: #666; font-size: 0.9em;">（${task.author}）</span>` : ''}
                     </div>
                     <div style="color: #888; font-size: 0.9em; margin-top: 5px;">
-                        书源: ${task.source_name} | 创建于: ${new Date(task.created_at).toLocaleString()}
+                        书源: ${task.source_name}${task.multi_source ? ' 等多个书源' : ''} | 创建于: ${new Date(task.created_at).toLocaleString()}
                     </div>
                 </div>
                 <span class="task-status status-${task.status}">${getStatusText(task.status)}</span>
@@ -681,7 +788,15 @@ function renderTasks(tasks) {
                     <div class="progress-fill" style="width: ${task.progress}%"></div>
                 </div>
                 <div style="text-align: center; color: #666; font-size: 0.9em;">
-                    ${task.downloaded_chapters}/${task.total_chapters} 章节
+                    ${task.stage === 'repairing' ? '重新获取 ' : ''}${task.downloaded_chapters}/${task.total_chapters} 章节
+                    ${task.concurrency ? ` | 并发: ${task.concurrency}` : ''}
+                </div>
+            ` : ''}
+            ${task.failed_chapters || task.warning_chapters || task.repaired_chapters ? `
+                <div style="color: #888; font-size: 0.9em; margin-top: 5px;">
+                    ${task.repaired_chapters ? `已修复 ${task.repaired_chapters} 章 ` : ''}
+                    ${task.warning_chapters ? `<span style="color: #ff9800;">可疑 ${task.warning_chapters} 章</span> ` : ''}
+                    ${task.failed_chapters ? `<span style="color: #f44336;">失败 ${task.failed_chapters} 章</span>` : ''}
                 </div>
             ` : ''}
             ${task.error ? `<div style="color: #f44336; margin-top: 10px;">错误: ${task.error}</div>` : ''}
@@ -800,9 +915,11 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
-// 自动刷新下载任务（如果在任务标签页）
-setInterval(() => {
-    if (currentTab === 'tasks') {
-        refreshTasks();
-    }
-}, 5000);  // 每 5 秒刷新一次
+// 浏览器不支持 SSE 时退回轮询（如果在任务标签页）
+if (!window.EventSource) {
+    setInterval(() => {
+        if (currentTab === 'tasks') {
+            refreshTasks();
+        }
+    }, 5000);  // 每 5 秒刷新一次
+}
@@ -0,0 +1,222 @@
+// 阅读器本地章节缓存（IndexedDB）
+// 按书源和章节 URL 保存已读和预取的章节正文，按书保存书籍信息；
+// 每条记录的大小和访问时间另存在 meta 中，总大小超过 CACHE_MAX_BYTES 时按访问时间淘汰最久未读的章节和书籍信息，
+// 淘汰和更新访问时间只读写 meta 中的小记录，不加载正文。
+// 浏览器不支持或禁用 IndexedDB（如隐私模式）时所有操作返回空结果，不影响在线阅读。
+const ChapterCache = (function() {
+    const DB_NAME = 'zreader';
+    const DB_VERSION = 2;
+    const CACHE_MAX_BYTES = 50 * 1024 * 1024;  // 章节和书籍信息的字节预算
+    const EVICT_DELAY = 2000;  // 写入后延迟执行淘汰（毫秒），合并连续写入
+
+    let dbPromise = null;
+    let evictTimer = null;
+
+    // 打开数据库（只打开一次）
+    function openDb() {
+        if (!dbPromise) {
+            dbPromise = new Promise((resolve, reject) => {
+                if (!window.indexedDB) {
+                    reject(new Error('IndexedDB 不可用'));
+                    return;
+                }
+
+                const request = indexedDB.open(DB_NAME, DB_VERSION);
+                request.onupgradeneeded = event => upgrade(request.result, request.transaction, event.oldVersion);
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => reject(request.error);
+            });
+        }
+        return dbPromise;
+    }
+
+    // 创建或升级表结构
+    function upgrade(db, tx, oldVersion) {
+        if (oldVersion < 1) {
+            db.createObjectStore('chapters', { keyPath: 'key' });
+            db.createObjectStore('books', { keyPath: 'key' });
+        }
+
+        if (oldVersion < 2) {
+            // 版本 1 的章节记录自带 size/accessed，淘汰时需要遍历正文；改为单独的 meta
+            const meta = db.createObjectStore('meta', { keyPath: ['store', 'key'] });
+            meta.createIndex('accessed', 'accessed');
+
+            const chapters = tx.objectStore('chapters');
+            if (chapters.indexNames.contains('accessed')) {
+                chapters.deleteIndex('accessed');
+            }
+
+            // 为已有记录补上 meta（只在升级时遍历一次）
+            ['chapters', 'books'].forEach(storeName => {
+                tx.objectStore(storeName).openCursor().onsuccess = e => {
+                    const cursor = e.target.result;
+                    if (!cursor) {
+                        return;
+                    }
+                    const record = cursor.value;
+                    meta.put({
+                        store: storeName,
+                        key: record.key,
+                        size: record.size || recordSize(record),
+                        accessed: record.accessed || record.updated || Date.now()
+                    });
+                    cursor.continue();
+                };
+            });
+        }
+    }
+
+    // 在一个事务中执行操作，返回 callback 的结果；出错时返回 null
+    async function withStores(storeNames, mode, callback) {
+        try {
+            const db = await openDb();
+            return await new Promise((resolve, reject) => {
+                const tx = db.transaction(storeNames, mode);
+                let result;
+                tx.oncomplete = () => resolve(result);
+                tx.onerror = () => reject(tx.error);
+                tx.onabort = () => reject(tx.error);
+                const request = callback(tx);
+                if (request) {
+                    request.onsuccess = () => { result = request.result; };
+                }
+            });
+        } catch (error) {
+            return null;
+        }
+    }
+
+    function chapterKey(sourceId, chapterUrl) {
+        return sourceId + '|' + chapterUrl;
+    }
+
+    function bookKey(sourceId, bookUrl) {
+        return sourceId + '|' + bookUrl;
+    }
+
+    // 估算记录占用的字节数（按 UTF-16 计）
+    function recordSize(record) {
+        try {
+            return JSON.stringify(record).length * 2;
+        } catch (error) {
+            return 0;
+        }
+    }
+
+    // 更新访问时间（用于淘汰），不等待写入完成
+    function touch(storeName, key) {
+        withStores('meta', 'readwrite', tx => {
+            const meta = tx.objectStore('meta');
+            const request = meta.get([storeName, key]);
+            request.onsuccess = () => {
+                if (request.result) {
+                    request.result.accessed = Date.now();
+                    meta.put(request.result);
+                }
+            };
+        });
+    }
+
+    // 写入记录及其 meta
+    async function put(storeName, record, size) {
+        await withStores([storeName, 'meta'], 'readwrite', tx => {
+            tx.objectStore(storeName).put(record);
+            tx.objectStore('meta').put({ store: storeName, key: record.key, size: size, accessed: Date.now() });
+        });
+        scheduleEvict();
+    }
+
+    // 获取缓存的章节 {title, content}，未缓存时返回 null
+    async function getChapter(sourceId, chapterUrl) {
+        const key = chapterKey(sourceId, chapterUrl);
+        const record = await withStores('chapters', 'readonly', tx => tx.objectStore('chapters').get(key));
+        if (!record) {
+            return null;
+        }
+
+        touch('chapters', key);
+        return { title: record.title, content: record.content };
+    }
+
+    // 保存章节
+    async function putChapter(sourceId, bookUrl, chapterUrl, chapter) {
+        if (!chapter || !chapter.content) {
+            return;
+        }
+
+        const title = chapter.title || '';
+        await put('chapters', {
+            key: chapterKey(sourceId, chapterUrl),
+            book: bookKey(sourceId, bookUrl),
+            title: title,
+            content: chapter.content
+        }, (title.length + chapter.content.length) * 2);
+    }
+
+    // 删除缓存的章节（用户重试时使用）
+    async function deleteChapter(sourceId, chapterUrl) {
+        const key = chapterKey(sourceId, chapterUrl);
+        await withStores(['chapters', 'meta'], 'readwrite', tx => {
+            tx.objectStore('chapters').delete(key);
+            tx.objectStore('meta').delete(['chapters', key]);
+        });
+    }
+
+    // 获取缓存的书籍信息
+    async function getBook(sourceId, bookUrl) {
+        const key = bookKey(sourceId, bookUrl);
+        const record = await withStores('books', 'readonly', tx => tx.objectStore('books').get(key));
+        if (!record) {
+            return null;
+        }
+
+        touch('books', key);
+        return record.data;
+    }
+
+    // 保存书籍信息
+    async function putBook(sourceId, bookUrl, data) {
+        const record = { key: bookKey(sourceId, bookUrl), data: data, updated: Date.now() };
+        await put('books', record, recordSize(record));
+    }
+
+    function scheduleEvict() {
+        if (evictTimer === null) {
+            evictTimer = setTimeout(() => {
+                evictTimer = null;
+                evict();
+            }, EVICT_DELAY);
+        }
+    }
+
+    // 按访问时间从新到旧累计 meta 中的大小，超出预算的章节和书籍信息全部删除
+    async function evict() {
+        await withStores(['meta', 'chapters', 'books'], 'readwrite', tx => {
+            let total = 0;
+            const request = tx.objectStore('meta').index('accessed').openCursor(null, 'prev');
+            request.onsuccess = () => {
+                const cursor = request.result;
+                if (!cursor) {
+                    return;
+                }
+                const meta = cursor.value;
+                total += meta.size || 0;
+                if (total > CACHE_MAX_BYTES) {
+                    tx.objectStore(meta.store).delete(meta.key);
+                    cursor.delete();
+                }
+                cursor.continue();
+            };
+        });
+    }
+
+    return {
+        getChapter: getChapter,
+        putChapter: putChapter,
+        deleteChapter: deleteChapter,
+        getBook: getBook,
+        putBook: putBook,
+        evict: evict
+    };
+})();
@@ -0,0 +1,81 @@
+// 阅读器 Service Worker（由 /reader-sw.js 提供，作用域为整个站点）
+// 阅读页、静态资源和分段目录优先走网络，成功的响应写入缓存，离线时使用缓存的版本；
+// /assets/ 下的构建产物文件名带内容哈希，内容不会变化，优先使用缓存。
+// 章节正文通过 POST 获取，由页面保存在 IndexedDB 中（见 chapter-cache.js）。
+const CACHE_NAME = 'zreader-reader-v2';
+const CACHE_MAX_ENTRIES = 500;  // 缓存的响应数上限，超过时删除最早写入的
+
+self.addEventListener('install', event => {
+    self.skipWaiting();
+});
+
+self.addEventListener('activate', event => {
+    // 删除旧版本的缓存
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(names.filter(name => name !== CACHE_NAME).map(name => caches.delete(name))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') {
+        return;
+    }
+
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+
+    if (url.pathname.startsWith('/assets/')) {
+        event.respondWith(cacheFirst(event, request));
+    } else if (url.pathname.startsWith('/reader/')
+            || url.pathname.startsWith('/static/')
+            || url.pathname === '/api/reader/toc') {
+        event.respondWith(networkFirst(event, request));
+    }
+});
+
+// 先请求网络（目录带 ETag，未变化时由浏览器缓存重新验证），失败时返回缓存
+async function networkFirst(event, request) {
+    const cache = await caches.open(CACHE_NAME);
+    try {
+        const response = await fetch(request);
+        if (response.ok) {
+            event.waitUntil(cache.put(request, response.clone()).then(() => trimCache(cache)));
+        }
+        return response;
+    } catch (error) {
+        const cached = await cache.match(request);
+        if (cached) {
+            return cached;
+        }
+        throw error;
+    }
+}
+
+// 先查缓存，没有时请求网络并写入缓存
+async function cacheFirst(event, request) {
+    const cache = await caches.open(CACHE_NAME);
+    const cached = await cache.match(request);
+    if (cached) {
+        return cached;
+    }
+
+    const response = await fetch(request);
+    if (response.ok) {
+        event.waitUntil(cache.put(request, response.clone()).then(() => trimCache(cache)));
+    }
+    return response;
+}
+
+// 限制缓存条目数（keys 按写入顺序返回）
+async function trimCache(cache) {
+    const keys = await cache.keys();
+    const excess = keys.length - CACHE_MAX_ENTRIES;
+    for (let i = 0; i < excess; i++) {
+        await cache.delete(keys[i]);
+    }
+}
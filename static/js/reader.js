@@ -0,0 +1,1196 @@
+// 阅读器页面（sourceId、bookUrl、bootstrap 由 reader.html 内嵌）
+let bookData = null;
+let currentChapterIndex = -1;
+
+// 目录分段加载（按目录位置保存已获取的 {title, url}，未获取的位置为空）
+const TOC_PAGE_SIZE = 200;
+let chapters = [];
+let chapterCount = 0;
+let tocVersion = '';
+let tocPages = {};
+
+// 章节列表虚拟滚动：只渲染可见范围（前后各多渲染 CHAPTER_OVERSCAN 行）内的章节
+const CHAPTER_ROW_HEIGHT = 46;
+const CHAPTER_OVERSCAN = 10;
+let chapterListFrame = null;
+let currentFontSize = 16;
+
+// 后续章节缓冲（按目录位置保存已获取的章节内容）
+const CHAPTER_BUFFER_AHEAD = 3;
+let chapterBuffer = {};
+let bufferLoading = false;
+
+// 页面加载完成后初始化
+document.addEventListener('DOMContentLoaded', function() {
+    initReader();
+    initMobileSidebar();
+    initChapterList();
+    registerServiceWorker();
+});
+
+// 初始化移动端侧边栏功能
+function initMobileSidebar() {
+    const sidebarToggle = document.getElementById('sidebar-toggle');
+    const sidebar = document.querySelector('.reader-sidebar');
+    const backdrop = document.getElementById('sidebar-backdrop');
+
+    if (sidebarToggle && sidebar && backdrop) {
+        // 切换侧边栏开关状态
+        sidebarToggle.addEventListener('click', function() {
+            sidebar.classList.toggle('open');
+            backdrop.classList.toggle('show');
+        });
+
+        // 点击背景遮罩关闭侧边栏
+        backdrop.addEventListener('click', function() {
+            sidebar.classList.remove('open');
+            backdrop.classList.remove('show');
+        });
+
+        // 窗口大小改变时的处理
+        window.addEventListener('resize', function() {
+            if (window.innerWidth > 768) {
+                sidebar.classList.remove('open');
+                backdrop.classList.remove('show');
+            }
+        });
+
+        // 点击章节项后自动关闭侧边栏（移动端，章节项是分段追加的，在列表上统一处理）
+        document.getElementById('chapter-list').addEventListener('click', function(event) {
+            if (event.target.closest('.chapter-item') && window.innerWidth <= 768) {
+                setTimeout(() => {
+                    sidebar.classList.remove('open');
+                    backdrop.classList.remove('show');
+                }, 300); // 短暂延迟以确保章节已加载
+            }
+        });
+    }
+}
+
+// 注册 Service Worker（缓存阅读页、静态资源和目录，离线时使用）
+function registerServiceWorker() {
+    if ('serviceWorker' in navigator) {
+        navigator.serviceWorker.register('/reader-sw.js').catch(error => {
+            console.warn('注册 Service Worker 失败:', error);
+        });
+    }
+}
+
+// 章节列表随侧边栏滚动和窗口大小变化重新渲染可见的行
+function initChapterList() {
+    const sidebar = document.querySelector('.reader-sidebar');
+    sidebar.addEventListener('scroll', scheduleChapterListRender);
+    window.addEventListener('resize', scheduleChapterListRender);
+
+    document.getElementById('chapter-list').addEventListener('click', function(event) {
+        const item = event.target.closest('.chapter-item');
+        if (item && !item.classList.contains('placeholder')) {
+            loadChapter(Number(item.dataset.index));
+        }
+    });
+}
+
+// 初始化阅读器：有内嵌数据时直接显示，再在后台刷新书籍信息；否则请求书籍信息后打开章节
+async function initReader() {
+    if (!bootstrap.book) {
+        await loadBookInfo();
+        if (bootstrap.chapter_index !== null && bootstrap.chapter_index < chapterCount) {
+            loadChapter(bootstrap.chapter_index);
+        }
+        return;
+    }
+
+    showBook(bootstrap.book);
+    if (bootstrap.toc) {
+        addTocWindow(bootstrap.toc);
+        renderVisibleChapters();
+    }
+    if (isValidChapter(bootstrap.chapter)) {
+        chapterBuffer[bootstrap.chapter_index] = bootstrap.chapter;
+        ChapterCache.putChapter(sourceId, bookUrl, bootstrap.chapter.url, bootstrap.chapter);
+        loadChapter(bootstrap.chapter_index);
+    } else if (bootstrap.chapter_index !== null && bootstrap.chapter_index < chapterCount) {
+        loadChapter(bootstrap.chapter_index);
+    }
+
+    // 内嵌的可能是内容存储中较旧的目录，后台刷新（目录版本不变时不重新渲染）
+    loadBookInfo(true);
+}
+
+// 加载书籍信息（background 为 true 时失败不显示错误）
+async function loadBookInfo(background = false) {
+    try {
+        const response = await fetch('/api/reader/book', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                source_id: sourceId,
+                book_url: bookUrl
+            })
+        });
+
+        const result = await response.json();
+
+        if (result.success) {
+            ChapterCache.putBook(sourceId, bookUrl, result.data);
+            showBook(result.data);
+        } else if (background) {
+            console.warn('刷新书籍信息失败:', result.message);
+        } else if (!await showCachedBook()) {
+            showError('加载书籍信息失败: ' + result.message);
+        }
+    } catch (error) {
+        if (background) {
+            console.warn('刷新书籍信息失败:', error);
+        } else if (!await showCachedBook()) {
+            // 离线或服务端不可用时使用本地缓存的书籍信息
+            showError('加载书籍信息失败: ' + error.message);
+        }
+    }
+}
+
+// 显示书籍信息，目录版本变化时重新渲染章节列表
+function showBook(data) {
+    bookData = data;
+    if (data.toc_version !== tocVersion) {
+        resetToc(data.toc_version, data.chapter_count || 0);
+        renderChapterList();
+    }
+    updateBookInfo();
+}
+
+// 显示本地缓存的书籍信息，没有缓存时返回 false
+async function showCachedBook() {
+    const data = await ChapterCache.getBook(sourceId, bookUrl);
+    if (!data) {
+        return false;
+    }
+    showBook(data);
+    return true;
+}
+
+// 更新书籍信息显示
+function updateBookInfo() {
+    document.getElementById('book-title').textContent = bookData.book_name || '未知书名';
+    document.getElementById('book-author').textContent = '作者：' + (bookData.author || '未知');
+    document.getElementById('book-status').textContent = '状态：' + (bookData.status || '未知');
+    document.getElementById('chapter-count').textContent = '章节数：' + chapterCount;
+}
+
+// 清空已加载的目录（书籍加载完成或服务端目录版本变化时调用）
+function resetToc(version, total) {
+    tocVersion = version;
+    chapterCount = total;
+    chapters = [];
+    tocPages = {};
+}
+
+// 获取一段目录（同一段只请求一次，浏览器按 ETag 重新验证缓存的响应）
+function loadTocPage(page) {
+    if (!tocPages[page]) {
+        const params = new URLSearchParams({
+            source_id: sourceId,
+            book_url: bookUrl,
+            start: page * TOC_PAGE_SIZE,
+            limit: TOC_PAGE_SIZE
+        });
+        tocPages[page] = fetch('/api/reader/toc?' + params)
+            .then(response => response.json())
+            .then(result => {
+                if (!result.success) {
+                    throw new Error(result.message);
+                }
+
+                const changed = result.data.version !== tocVersion;
+                addTocWindow(result.data);
+                if (changed) {
+                    // 重置目录时清空了已请求的段落，保留当前段
+                    tocPages[page] = Promise.resolve();
+                }
+            })
+            .catch(error => {
+                delete tocPages[page];
+                throw error;
+            });
+    }
+    return tocPages[page];
+}
+
+// 保存一段目录（/api/reader/toc 或内嵌数据的格式）
+function addTocWindow(data) {
+    if (data.version !== tocVersion) {
+        // 目录已更新，之前加载的段落作废
+        resetToc(data.version, data.total);
+        updateBookInfo();
+    }
+    data.titles.forEach((title, i) => {
+        chapters[data.start + i] = { title: title, url: data.prefix + data.urls[i] };
+    });
+}
+
+// 获取指定位置的章节（所在的目录段未加载时先加载）
+async function getChapter(index) {
+    if (!chapters[index]) {
+        await loadTocPage(Math.floor(index / TOC_PAGE_SIZE));
+    }
+    return chapters[index];
+}
+
+// 转义 HTML 特殊字符
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text;
+    return div.innerHTML;
+}
+
+// 渲染章节列表（列表高度按章节数撑开，行在滚动时按需渲染）
+function renderChapterList() {
+    const chapterList = document.getElementById('chapter-list');
+
+    if (chapterCount === 0) {
+        chapterList.style.height = '';
+        chapterList.innerHTML = '<li style="text-align: center; color: #888; padding: 20px;">暂无章节</li>';
+        return;
+    }
+
+    chapterList.style.height = (chapterCount * CHAPTER_ROW_HEIGHT) + 'px';
+    renderVisibleChapters();
+}
+
+// 合并同一帧内的多次渲染请求
+function scheduleChapterListRender() {
+    if (chapterListFrame === null && chapterCount > 0) {
+        chapterListFrame = requestAnimationFrame(() => {
+            chapterListFrame = null;
+            renderVisibleChapters();
+        });
+    }
+}
+
+// 计算侧边栏中可见的章节范围 [first, last)
+function visibleChapterRange() {
+    const sidebar = document.querySelector('.reader-sidebar');
+    const chapterList = document.getElementById('chapter-list');
+    const top = sidebar.scrollTop - chapterList.offsetTop;
+    const first = Math.max(0, Math.floor(top / CHAPTER_ROW_HEIGHT) - CHAPTER_OVERSCAN);
+    const last = Math.min(chapterCount, Math.ceil((top + sidebar.clientHeight) / CHAPTER_ROW_HEIGHT) + CHAPTER_OVERSCAN);
+    return [first, Math.max(first, last)];
+}
+
+// 只渲染可见范围内的章节，目录段未加载的行先显示占位并请求该段
+function renderVisibleChapters() {
+    const [first, last] = visibleChapterRange();
+    const missingPages = new Set();
+    let html = '';
+
+    for (let index = first; index < last; index++) {
+        const chapter = chapters[index];
+        const top = index * CHAPTER_ROW_HEIGHT;
+        if (chapter) {
+            html += `<li class="chapter-item ${index === currentChapterIndex ? 'active' : ''}" data-index="${index}" style="top: ${top}px">${escapeHtml(chapter.title)}</li>`;
+        } else {
+            html += `<li class="chapter-item placeholder" data-index="${index}" style="top: ${top}px">第 ${index + 1} 章 加载中...</li>`;
+            missingPages.add(Math.floor(index / TOC_PAGE_SIZE));
+        }
+    }
+    document.getElementById('chapter-list').innerHTML = html;
+
+    missingPages.forEach(page => {
+        const version = tocVersion;
+        loadTocPage(page)
+            .then(() => {
+                if (version !== tocVersion) {
+                    // 目录版本变化，章节数可能不同
+                    renderChapterList();
+                } else {
+                    scheduleChapterListRender();
+                }
+            })
+            .catch(error => showError('加载章节列表失败: ' + error.message));
+    });
+}
+
+// 按序号跳转到章节
+function jumpToChapter() {
+    const input = document.getElementById('chapter-jump-input');
+    const number = parseInt(input.value, 10);
+    if (!number || number < 1 || number > chapterCount) {
+        input.value = '';
+        input.placeholder = `请输入 1 - ${chapterCount}`;
+        return;
+    }
+    loadChapter(number - 1);
+}
+
+// 章节是否可以缓存：有正文且通过了服务端校验（拦截页、验证码页等带有 error）
+function isValidChapter(chapterData) {
+    return Boolean(chapterData && chapterData.content && !chapterData.error);
+}
+
+// 加载章节内容（refresh 为 true 时跳过本地和服务端缓存，重新从书源获取）
+async function loadChapter(chapterIndex, refresh = false) {
+    if (chapterIndex < 0 || chapterIndex >= chapterCount) {
+        return;
+    }
+
+    currentChapterIndex = chapterIndex;
+
+    // 更新章节列表激活状态
+    updateChapterListActive();
+
+    let chapter;
+    try {
+        chapter = await getChapter(chapterIndex);
+    } catch (error) {
+        showError('加载目录失败: ' + error.message);
+        return;
+    }
+    if (currentChapterIndex !== chapterIndex || !chapter) {
+        return;
+    }
+
+    // 缓冲或本地缓存中已有该章节时直接显示
+    if (!refresh && !chapterBuffer[chapterIndex]) {
+        const cached = await ChapterCache.getChapter(sourceId, chapter.url);
+        if (cached) {
+            chapterBuffer[chapterIndex] = cached;
+        }
+        if (currentChapterIndex !== chapterIndex) {
+            return;
+        }
+    }
+    if (!refresh && chapterBuffer[chapterIndex]) {
+        displayChapter(chapterBuffer[chapterIndex]);
+        updateNavigation();
+        fillChapterBuffer(chapterIndex);
+        return;
+    }
+
+    // 显示加载状态
+    showLoading();
+
+    document.getElementById('chapter-content').innerHTML = `
+        <p style="text-align: center; color: #888;">
+            <div class="spinner" style="margin: 20px auto;"></div>
+            <p>正在加载章节内容...</p>
+        </p>
+    `;
+
+    try {
+        // 流式获取章节：每解析完一页就先显示，多页章节不必等全部页面
+        const response = await fetch('/api/reader/chapter/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                source_id: sourceId,
+                chapter_url: chapter.url,
+                book_url: bookUrl,
+                chapter_index: chapterIndex,
+                refresh: refresh
+            })
+        });
+
+        if (!response.ok) {
+            const result = await response.json();
+            showError('加载章节失败: ' + result.message);
+            return;
+        }
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let title = '';
+        let paragraphs = [];
+
+        // 读取流
+        while (true) {
+            const { done, value } = await reader.read();
+
+            if (done) {
+                break;
+            }
+
+            // 用户已切换到其他章节，停止渲染
+            if (currentChapterIndex !== chapterIndex) {
+                reader.cancel();
+                return;
+            }
+
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n\n');
+            buffer = lines.pop(); // 保留最后一个不完整的部分
+
+            for (const line of lines) {
+                if (!line.trim() || !line.startsWith('data: ')) {
+                    continue;
+                }
+
+                const data = JSON.parse(line.substring(6));
+
+                switch (data.type) {
+                    case 'page':
+                        if (data.page === 1) {
+                            title = data.title || '';
+                            hideLoading();
+                            renderChapterStart(title);
+                        }
+                        paragraphs = paragraphs.concat(data.paragraphs);
+                        appendChapterParagraphs(data.paragraphs);
+                        break;
+
+                    case 'complete':
+                        // 完整内容到达后统一渲染（同时触发朗读等后续处理）
+                        displayChapter({ title: title, content: paragraphs.join('\n') });
+                        // 未通过校验的内容（拦截页等）只显示，不写入本地缓存，下次打开时重新获取
+                        if (data.valid) {
+                            ChapterCache.putChapter(sourceId, bookUrl, chapter.url, { title: title, content: paragraphs.join('\n') });
+                        }
+                        updateNavigation();
+                        fillChapterBuffer(chapterIndex);
+                        break;
+
+                    case 'error':
+                        showError('加载章节失败: ' + data.message);
+                        return;
+                }
+            }
+        }
+    } catch (error) {
+        showError('加载章节失败: ' + error.message);
+    } finally {
+        hideLoading();
+    }
+}
+
+// 重新获取当前章节：删除缓冲和本地缓存中的内容，跳过服务端缓存重新请求
+async function reloadChapter() {
+    if (currentChapterIndex < 0) {
+        location.reload();
+        return;
+    }
+
+    const chapterIndex = currentChapterIndex;
+    let chapter;
+    try {
+        chapter = await getChapter(chapterIndex);
+    } catch (error) {
+        location.reload();
+        return;
+    }
+
+    delete chapterBuffer[chapterIndex];
+    if (chapter) {
+        await ChapterCache.deleteChapter(sourceId, chapter.url);
+    }
+    loadChapter(chapterIndex, true);
+}
+
+// 渲染章节标题和空的正文容器（流式加载时使用）
+function renderChapterStart(title) {
+    document.getElementById('chapter-content').innerHTML = `
+        <div class="chapter-content">
+            <h1></h1>
+            <div id="chapter-paragraphs"></div>
+        </div>
+    `;
+    // 标题和正文来自第三方书源，只作为文本写入
+    document.querySelector('#chapter-content h1').textContent = title || '未知章节';
+    document.getElementById('chapter-navigation').style.display = 'flex';
+}
+
+// 追加一页段落（流式加载时使用）
+function appendChapterParagraphs(paragraphs) {
+    const container = document.getElementById('chapter-paragraphs');
+    if (!container || !paragraphs.length) return;
+    const fragment = document.createDocumentFragment();
+    paragraphs.forEach(text => {
+        const p = document.createElement('p');
+        p.textContent = text;
+        fragment.appendChild(p);
+    });
+    container.appendChild(fragment);
+}
+
+// 批量预取后续章节到缓冲区（一次请求，服务端逐章流式返回）
+async function fillChapterBuffer(fromIndex) {
+    if (bufferLoading) return;
+
+    // 丢弃离当前位置较远的缓冲
+    Object.keys(chapterBuffer).forEach(key => {
+        const index = parseInt(key);
+        if (index < fromIndex - 1 || index > fromIndex + CHAPTER_BUFFER_AHEAD) {
+            delete chapterBuffer[key];
+        }
+    });
+
+    bufferLoading = true;
+    try {
+        // 本地缓存中已有的章节直接放入缓冲，其余向服务端请求
+        const indices = [];
+        for (let i = fromIndex + 1; i <= fromIndex + CHAPTER_BUFFER_AHEAD && i < chapterCount; i++) {
+            if (chapterBuffer[i]) {
+                continue;
+            }
+            const chapter = await getChapter(i);
+            const cached = chapter ? await ChapterCache.getChapter(sourceId, chapter.url) : null;
+            if (cached) {
+                chapterBuffer[i] = cached;
+            } else {
+                indices.push(i);
+            }
+        }
+        if (indices.length === 0) return;
+
+        const response = await fetch('/api/reader/chapters', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                source_id: sourceId,
+                book_url: bookUrl,
+                indices: indices
+            })
+        });
+
+        if (!response.ok) return;
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        // 读取流
+        while (true) {
+            const { done, value } = await reader.read();
+
+            if (done) {
+                break;
+            }
+
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n\n');
+            buffer = lines.pop(); // 保留最后一个不完整的部分
+
+            for (const line of lines) {
+                if (!line.trim() || !line.startsWith('data: ')) {
+                    continue;
+                }
+
+                const data = JSON.parse(line.substring(6));
+                // 未通过校验的章节不放入缓冲，翻到该章时重新请求
+                if (data.type === 'chapter' && data.valid && isValidChapter(data.data)) {
+                    chapterBuffer[data.chapter_index] = data.data;
+                    ChapterCache.putChapter(sourceId, bookUrl, data.data.url, data.data);
+                }
+            }
+        }
+    } catch (error) {
+        console.warn('预取章节失败:', error);
+    } finally {
+        bufferLoading = false;
+    }
+}
+
+// 显示章节内容
+function displayChapter(chapterData) {
+    const text = chapterData.content || '章节内容为空';
+
+    // 处理段落格式（标题和正文来自第三方书源，先转义）
+    const content = text.split('\n').map(line => `<p>${escapeHtml(line)}</p>`).join('');
+
+    document.getElementById('chapter-content').innerHTML = `
+        <div class="chapter-content">
+            <h1>${escapeHtml(chapterData.title || '未知章节')}</h1>
+            <div>${content}</div>
+        </div>
+    `;
+
+    // 显示导航栏
+    document.getElementById('chapter-navigation').style.display = 'flex';
+}
+
+// 更新章节列表激活状态
+function updateChapterListActive() {
+    if (currentChapterIndex < 0 || chapterCount === 0) {
+        return;
+    }
+
+    // 当前章节不在可见范围时，把侧边栏滚动到该行居中
+    const sidebar = document.querySelector('.reader-sidebar');
+    const chapterList = document.getElementById('chapter-list');
+    const rowTop = chapterList.offsetTop + currentChapterIndex * CHAPTER_ROW_HEIGHT;
+    if (rowTop < sidebar.scrollTop || rowTop + CHAPTER_ROW_HEIGHT > sidebar.scrollTop + sidebar.clientHeight) {
+        sidebar.scrollTop = rowTop - (sidebar.clientHeight - CHAPTER_ROW_HEIGHT) / 2;
+    }
+    renderVisibleChapters();
+}
+
+// 更新导航按钮状态
+function updateNavigation() {
+    const prevBtn = document.getElementById('prev-chapter');
+    const nextBtn = document.getElementById('next-chapter');
+    const progress = document.getElementById('chapter-progress');
+
+    // 更新进度显示
+    progress.textContent = `第 ${currentChapterIndex + 1} / ${chapterCount} 章`;
+
+    // 更新按钮状态
+    prevBtn.disabled = currentChapterIndex <= 0;
+    nextBtn.disabled = currentChapterIndex >= chapterCount - 1;
+}
+
+// 加载上一章
+function loadPrevChapter() {
+    if (currentChapterIndex > 0) {
+        loadChapter(currentChapterIndex - 1);
+    }
+}
+
+// 加载下一章
+function loadNextChapter() {
+    if (currentChapterIndex < chapterCount - 1) {
+        loadChapter(currentChapterIndex + 1);
+    }
+}
+
+// 改变字体大小
+function changeFontSize(delta) {
+    currentFontSize += delta;
+    currentFontSize = Math.max(12, Math.min(24, currentFontSize));
+
+    const content = document.getElementById('chapter-content');
+    content.style.fontSize = currentFontSize + 'px';
+
+    // 保存到localStorage
+    localStorage.setItem('reader-font-size', currentFontSize);
+}
+
+// 显示加载状态
+function showLoading() {
+    document.getElementById('loading-overlay').style.display = 'flex';
+}
+
+// 隐藏加载状态
+function hideLoading() {
+    document.getElementById('loading-overlay').style.display = 'none';
+}
+
+// 显示错误信息
+function showError(message) {
+    hideLoading();
+    document.getElementById('chapter-content').innerHTML = `
+        <div style="text-align: center; color: #f44336; margin-top: 50px; padding: 20px; background: #ffebee; border-radius: 4px;">
+            <h3>错误</h3>
+            <p>${escapeHtml(message)}</p>
+            <button onclick="reloadChapter()" class="btn btn-primary" style="margin-top: 15px;">重试</button>
+        </div>
+    `;
+    document.getElementById('chapter-navigation').style.display = 'none';
+}
+
+// 键盘快捷键
+document.addEventListener('keydown', function(e) {
+    if (currentChapterIndex < 0) return;
+
+    switch(e.key) {
+        case 'ArrowLeft':
+            e.preventDefault();
+            loadPrevChapter();
+            break;
+        case 'ArrowRight':
+            e.preventDefault();
+            loadNextChapter();
+            break;
+        case '+':
+        case '=':
+            e.preventDefault();
+            changeFontSize(1);
+            break;
+        case '-':
+        case '_':
+            e.preventDefault();
+            changeFontSize(-1);
+            break;
+    }
+});
+
+// 恢复字体大小设置
+const savedFontSize = localStorage.getItem('reader-font-size');
+if (savedFontSize) {
+    currentFontSize = parseInt(savedFontSize);
+    document.getElementById('chapter-content').style.fontSize = currentFontSize + 'px';
+}
+
+// TTS 相关变量
+let ttsState = {
+    isPlaying: false,
+    isPaused: false,
+    currentParagraph: 0,
+    paragraphs: [],
+    utterance: null,
+    voices: [],
+    selectedVoice: null,
+    speed: 1.0,
+    autoNextChapter: true
+};
+
+// 初始化 TTS
+function initTTS() {
+    if ('speechSynthesis' in window) {
+        // 加载语音列表
+        loadVoices();
+
+        // 监听语音列表变化
+        speechSynthesis.addEventListener('voiceschanged', loadVoices);
+
+        // 加载保存的设置
+        loadTTSSettings();
+
+        // 绑定事件监听器
+        setupTTSListeners();
+
+        console.log('TTS 初始化成功');
+    } else {
+        console.warn('浏览器不支持语音合成');
+        updateTTSStatus('不支持');
+    }
+}
+
+// 加载可用语音
+function loadVoices() {
+    const voices = speechSynthesis.getVoices();
+    const voiceSelect = document.getElementById('tts-voice-select');
+
+    // 筛选中文语音
+    const chineseVoices = voices.filter(voice => 
+        voice.lang.includes('zh') || voice.lang.includes('CN')
+    );
+
+    if (chineseVoices.length === 0) {
+        // 如果没有中文语音，使用所有语音
+        ttsState.voices = voices;
+    } else {
+        ttsState.voices = chineseVoices;
+    }
+
+    // 更新下拉列表
+    voiceSelect.innerHTML = '';
+
+    if (ttsState.voices.length === 0) {
+        voiceSelect.innerHTML = '<option value="">无可用语音</option>';
+        return;
+    }
+
+    ttsState.voices.forEach((voice, index) => {
+        const option = document.createElement('option');
+        option.value = index;
+        option.textContent = `${voice.name} (${voice.lang})`;
+        if (voice.default) {
+            option.selected = true;
+            ttsState.selectedVoice = voice;
+        }
+        voiceSelect.appendChild(option);
+    });
+
+    // 如果没有默认语音，选择第一个
+    if (!ttsState.selectedVoice && ttsState.voices.length > 0) {
+        ttsState.selectedVoice = ttsState.voices[0];
+        voiceSelect.value = 0;
+    }
+}
+
+// 设置 TTS 事件监听器
+function setupTTSListeners() {
+    // 语音选择
+    document.getElementById('tts-voice-select').addEventListener('change', function(e) {
+        const voiceIndex = parseInt(e.target.value);
+        if (voiceIndex >= 0 && voiceIndex < ttsState.voices.length) {
+            ttsState.selectedVoice = ttsState.voices[voiceIndex];
+            saveTTSSettings();
+        }
+    });
+
+    // 语速调整
+    document.getElementById('tts-speed-slider').addEventListener('input', function(e) {
+        ttsState.speed = parseFloat(e.target.value);
+        document.getElementById('tts-speed-value').textContent = ttsState.speed.toFixed(1) + 'x';
+        saveTTSSettings();
+    });
+
+    // 自动下一章设置
+    document.getElementById('tts-auto-next-chapter').addEventListener('change', function(e) {
+        ttsState.autoNextChapter = e.target.checked;
+        saveTTSSettings();
+    });
+}
+
+// 切换 TTS 面板显示
+function toggleTTSPanel() {
+    const panel = document.getElementById('tts-controls');
+    const toggleBtn = document.getElementById('tts-toggle-btn');
+
+    if (panel.style.display === 'none') {
+        panel.style.display = 'block';
+        toggleBtn.classList.add('active');
+
+        // 如果还没有初始化 TTS，现在初始化
+        if (ttsState.voices.length === 0) {
+            initTTS();
+        }
+
+        // 如果当前有章节内容，准备 TTS
+        if (currentChapterIndex >= 0) {
+            prepareTTS();
+        }
+    } else {
+        panel.style.display = 'none';
+        toggleBtn.classList.remove('active');
+    }
+}
+
+// 获取当前可见的段落索引
+function getFirstVisibleParagraph() {
+    const chapterContent = document.querySelector('.reader-content');
+    const paragraphs = chapterContent.querySelectorAll('p');
+    const contentRect = chapterContent.getBoundingClientRect();
+
+    for (let i = 0; i < paragraphs.length; i++) {
+        const paragraph = paragraphs[i];
+        const rect = paragraph.getBoundingClientRect();
+
+        // 检查段落是否在可视区域内
+        if (rect.bottom > contentRect.top && rect.top < contentRect.bottom) {
+            // 如果段落至少有一部分在可视区域内，返回该段落索引
+            return i;
+        }
+    }
+
+    // 如果没有可见段落，返回第一个段落
+    return 0;
+}
+
+// 准备 TTS
+function prepareTTS() {
+    const chapterContent = document.getElementById('chapter-content');
+    const paragraphs = chapterContent.querySelectorAll('p');
+
+    if (paragraphs.length === 0) {
+        updateTTSStatus('无内容');
+        return;
+    }
+
+    // 提取段落文本
+    ttsState.paragraphs = Array.from(paragraphs).map(p => p.textContent.trim()).filter(text => text);
+    ttsState.currentParagraph = 0;
+
+    // 启用播放按钮
+    document.getElementById('tts-play-btn').disabled = false;
+    document.getElementById('tts-stop-btn').disabled = false;
+
+    updateTTSStatus('准备就绪');
+    updateTTSProgress(0, ttsState.paragraphs.length);
+}
+
+// 切换播放/暂停
+function toggleTTSPlay() {
+    if (ttsState.isPlaying && !ttsState.isPaused) {
+        pauseTTS();
+    } else {
+        startTTS();
+    }
+}
+
+// 开始 TTS
+function startTTS() {
+    if (ttsState.paragraphs.length === 0) {
+        showError('没有可朗读的内容');
+        return;
+    }
+
+    if (ttsState.isPaused) {
+        // 继续播放
+        speechSynthesis.resume();
+        ttsState.isPaused = false;
+        ttsState.isPlaying = true;
+        updateTTSStatus('播放中');
+        updateTTSButtons();
+        return;
+    }
+
+
+    // 开始新的朗读 - 从当前可见段落开始
+    if (ttsState.currentParagraph >= ttsState.paragraphs.length) {
+        // 如果当前段落超出范围，获取可见段落
+        ttsState.currentParagraph = getFirstVisibleParagraph();
+    } else if (ttsState.currentParagraph === 0) {
+        // 如果是从头开始，也要获取可见段落
+        ttsState.currentParagraph = getFirstVisibleParagraph();
+    }
+    speakCurrentParagraph();
+}
+
+// 朗读当前段落
+function speakCurrentParagraph() {
+    if (ttsState.currentParagraph >= ttsState.paragraphs.length) {
+        // 当前章节朗读完毕
+        if (ttsState.autoNextChapter && currentChapterIndex < chapterCount - 1) {
+            // 自动加载下一章
+            loadNextChapterForTTS();
+        } else {
+            // 停止朗读
+            stopTTS();
+        }
+        return;
+    }
+
+    const text = ttsState.paragraphs[ttsState.currentParagraph];
+
+    // 创建语音合成实例
+    ttsState.utterance = new SpeechSynthesisUtterance(text);
+    ttsState.utterance.voice = ttsState.selectedVoice;
+    ttsState.utterance.rate = ttsState.speed;
+    ttsState.utterance.lang = ttsState.selectedVoice ? ttsState.selectedVoice.lang : 'zh-CN';
+
+    // 设置事件监听器
+    ttsState.utterance.onstart = function() {
+        ttsState.isPlaying = true;
+        ttsState.isPaused = false;
+        updateTTSStatus('播放中');
+        updateTTSButtons();
+        highlightCurrentParagraph();
+    };
+
+    ttsState.utterance.onend = function() {
+        ttsState.currentParagraph++;
+        updateTTSProgress(ttsState.currentParagraph, ttsState.paragraphs.length);
+        removeHighlight();
+
+        // 继续下一段
+        setTimeout(() => {
+            if (ttsState.isPlaying) {
+                speakCurrentParagraph();
+            }
+        }, 100);
+    };
+
+    ttsState.utterance.onerror = function(event) {
+        console.error('TTS 错误:', event);
+        //showError('语音朗读出错');
+        stopTTS();
+    };
+
+    // 开始朗读
+    speechSynthesis.speak(ttsState.utterance);
+}
+
+// 暂停 TTS
+function pauseTTS() {
+    if (speechSynthesis.speaking && !speechSynthesis.pending) {
+        speechSynthesis.pause();
+        ttsState.isPaused = true;
+        ttsState.isPlaying = false;
+        updateTTSStatus('已暂停');
+        updateTTSButtons();
+    }
+}
+
+// 停止 TTS
+function stopTTS() {
+    speechSynthesis.cancel();
+    ttsState.isPlaying = false;
+    ttsState.isPaused = false;
+    ttsState.currentParagraph = 0;
+    removeHighlight();
+    updateTTSStatus('已停止');
+    updateTTSButtons();
+    updateTTSProgress(0, ttsState.paragraphs.length);
+}
+
+// 为 TTS 加载下一章
+function loadNextChapterForTTS() {
+    if (currentChapterIndex < chapterCount - 1) {
+        const nextIndex = currentChapterIndex + 1;
+
+        // 显示提示
+        updateTTSStatus('加载下一章...');
+
+        // 加载下一章
+        loadChapter(nextIndex).then(() => {
+            // 延迟后继续朗读
+            setTimeout(() => {
+                if (ttsState.isPlaying) {
+                    prepareTTS();
+                    startTTS();
+                }
+            }, 1000);
+        }).catch(error => {
+            console.error('加载下一章失败:', error);
+            stopTTS();
+        });
+    } else {
+        // 已经是最后一章
+        stopTTS();
+        updateTTSStatus('朗读完成');
+    }
+}
+
+// 高亮当前段落
+function highlightCurrentParagraph() {
+    removeHighlight();
+    const paragraphs = document.getElementById('chapter-content').querySelectorAll('p');
+    if (paragraphs[ttsState.currentParagraph]) {
+        paragraphs[ttsState.currentParagraph].classList.add('tts-highlight');
+        // 滚动到当前段落
+        paragraphs[ttsState.currentParagraph].scrollIntoView({ 
+            behavior: 'smooth', 
+            block: 'start' 
+        });
+    }
+}
+
+// 移除高亮
+function removeHighlight() {
+    const highlighted = document.querySelectorAll('.tts-highlight');
+    highlighted.forEach(element => element.classList.remove('tts-highlight'));
+}
+
+// 更新 TTS 状态
+function updateTTSStatus(status) {
+    const statusElement = document.getElementById('tts-status');
+    statusElement.textContent = status;
+
+    // 更新状态样式
+    statusElement.className = 'tts-status';
+    if (status === '播放中') {
+        statusElement.classList.add('playing');
+    } else if (status === '已暂停') {
+        statusElement.classList.add('paused');
+    }
+}
+
+// 更新 TTS 按钮状态
+function updateTTSButtons() {
+    const playBtn = document.getElementById('tts-play-btn');
+    const pauseBtn = document.getElementById('tts-pause-btn');
+    const stopBtn = document.getElementById('tts-stop-btn');
+
+    if (ttsState.isPlaying && !ttsState.isPaused) {
+        playBtn.disabled = true;
+        pauseBtn.disabled = false;
+        stopBtn.disabled = false;
+        playBtn.innerHTML = '<span>▶️</span><span>播放</span>';
+    } else if (ttsState.isPaused) {
+        playBtn.disabled = false;
+        pauseBtn.disabled = true;
+        stopBtn.disabled = false;
+        playBtn.innerHTML = '<span>▶️</span><span>继续</span>';
+    } else {
+        playBtn.disabled = false;
+        pauseBtn.disabled = true;
+        stopBtn.disabled = true;
+        playBtn.innerHTML = '<span>▶️</span><span>播放</span>';
+    }
+}
+
+// 更新 TTS 进度
+function updateTTSProgress(current, total) {
+    const progressFill = document.getElementById('tts-progress-fill');
+    const progressText = document.getElementById('tts-progress-text');
+
+    const percentage = total > 0 ? (current / total) * 100 : 0;
+    progressFill.style.width = percentage + '%';
+
+    if (current === 0 && total === 0) {
+        progressText.textContent = '准备就绪';
+    } else {
+        progressText.textContent = `${current} / ${total} 段`;
+    }
+}
+
+// 保存 TTS 设置
+function saveTTSSettings() {
+    const settings = {
+        voiceIndex: ttsState.voices.indexOf(ttsState.selectedVoice),
+        speed: ttsState.speed,
+        autoNextChapter: ttsState.autoNextChapter
+    };
+    localStorage.setItem('tts-settings', JSON.stringify(settings));
+}
+
+// 加载 TTS 设置
+function loadTTSSettings() {
+    const saved = localStorage.getItem('tts-settings');
+    if (saved) {
+        try {
+            const settings = JSON.parse(saved);
+
+            // 设置语速
+            if (settings.speed) {
+                ttsState.speed = settings.speed;
+                document.getElementById('tts-speed-slider').value = settings.speed;
+                document.getElementById('tts-speed-value').textContent = settings.speed.toFixed(1) + 'x';
+            }
+
+            // 设置自动下一章
+            if (settings.autoNextChapter !== undefined) {
+                ttsState.autoNextChapter = settings.autoNextChapter;
+                document.getElementById('tts-auto-next-chapter').checked = settings.autoNextChapter;
+            }
+
+            // 语音设置需要在语音列表加载后设置
+            setTimeout(() => {
+                if (settings.voiceIndex >= 0 && settings.voiceIndex < ttsState.voices.length) {
+                    ttsState.selectedVoice = ttsState.voices[settings.voiceIndex];
+                    document.getElementById('tts-voice-select').value = settings.voiceIndex;
+                }
+            }, 100);
+
+        } catch (error) {
+            console.error('加载 TTS 设置失败:', error);
+        }
+    }
+}
+
+// 添加键盘快捷键支持
+document.addEventListener('keydown', function(e) {
+    // 只在有章节内容时响应
+    if (currentChapterIndex < 0) return;
+
+    // 防止在输入框中触发
+    if (e.target.tagName === 'INPUT' || e.target.tagName === 'TEXTAREA') return;
+
+    switch(e.key) {
+        case ' ': // 空格键 - 播放/暂停
+            e.preventDefault();
+            if (document.getElementById('tts-controls').style.display !== 'none') {
+                toggleTTSPlay();
+            }
+            break;
+        case 'Escape': // ESC - 停止
+            if (document.getElementById('tts-controls').style.display !== 'none') {
+                stopTTS();
+            }
+            break;
+    }
+});
+
+// 在页面加载完成后初始化 TTS
+document.addEventListener('DOMContentLoaded', function() {
+    // 延迟初始化，确保语音合成 API 可用
+    setTimeout(initTTS, 1000);
+});
+
+// 重写 displayChapter 函数以支持 TTS
+const originalDisplayChapter = displayChapter;
+displayChapter = function(chapterData) {
+    originalDisplayChapter(chapterData);
+
+    // 如果 TTS 面板是打开的，准备 TTS
+    if (document.getElementById('tts-controls').style.display !== 'none') {
+        setTimeout(prepareTTS, 1000);
+    }
+};
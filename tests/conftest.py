@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共配置：把项目根目录加入导入路径
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+CircuitBreaker 状态转换测试
+"""
+import threading
+
+import pytest
+
+from core.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError
+from core.storage import Storage
+
+
+def expire(breaker):
+    """把打开时间前移，模拟冷却时间已过"""
+    breaker._opened_at -= breaker.recovery_timeout
+
+
+def open_breaker(breaker):
+    for _ in range(breaker.failure_threshold):
+        breaker.on_failure()
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('test', failure_threshold=3, recovery_timeout=30)
+
+    breaker.on_failure()
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open()
+    assert not breaker.allow_request()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker('test', failure_threshold=3, recovery_timeout=30)
+
+    breaker.on_failure()
+    breaker.on_failure()
+    breaker.on_success()
+    breaker.on_failure()
+    breaker.on_failure()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_single_probe():
+    breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=30)
+    open_breaker(breaker)
+    expire(breaker)
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.is_open()
+    assert breaker.allow_request()
+
+    # 探测进行中，其他请求仍被拒绝
+    assert breaker.is_open()
+    assert not breaker.allow_request()
+
+
+def test_probe_success_closes():
+    breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=30)
+    open_breaker(breaker)
+    expire(breaker)
+
+    assert breaker.allow_request()
+    breaker.on_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()['failures'] == 0
+    assert breaker.allow_request()
+    assert breaker.allow_request()
+
+
+def test_probe_failure_reopens():
+    breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=30)
+    open_breaker(breaker)
+    expire(breaker)
+
+    assert breaker.allow_request()
+    breaker.on_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats()['retry_in'] == 30
+
+
+def test_stale_probe_releases_slot():
+    breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=30)
+    open_breaker(breaker)
+    expire(breaker)
+    assert breaker.allow_request()
+
+    # 探测超过冷却时间仍未回报，视为已结束，允许新的探测
+    breaker._probe_at -= breaker.recovery_timeout
+    assert breaker.allow_request()
+
+
+def test_registry_shares_breaker_per_source():
+    registry = CircuitBreakerRegistry(failure_threshold=1, recovery_timeout=30)
+
+    assert registry.stats('a') is None
+    registry.get('a').on_failure()
+
+    assert registry.get('a') is registry.get('a')
+    assert registry.stats('a')['state'] == CircuitBreaker.OPEN
+    assert registry.get('b').state == CircuitBreaker.CLOSED
+
+
+@pytest.fixture
+def shared(tmp_path):
+    """两个进程的注册表：各自打开同一个数据库文件"""
+    storages = [Storage(str(tmp_path / 'test.db')) for _ in range(2)]
+    yield [CircuitBreakerRegistry(failure_threshold=2, recovery_timeout=30, storage=s) for s in storages]
+    for storage in storages:
+        storage.close()
+
+
+def expire_shared(registry, name):
+    registry.storage.execute('UPDATE circuit_breakers SET opened_at = opened_at - 30 WHERE name = ?', (name,))
+
+
+def test_shared_state_opens_in_all_processes(shared):
+    a, b = shared
+
+    a.get('src').on_failure()
+    b.get('src').on_failure()  # 两个进程的失败累计
+
+    assert a.get('src').state == CircuitBreaker.OPEN
+    assert not b.get('src').allow_request()
+    assert b.stats('src')['failures'] == 2
+
+
+def test_shared_half_open_allows_single_probe(shared):
+    a, b = shared
+    open_breaker(a.get('src'))
+    expire_shared(a, 'src')
+
+    results = []
+    threads = [threading.Thread(target=lambda r=r: results.append(r.get('src').allow_request())) for r in (a, b) * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+
+
+def test_shared_probe_success_closes_everywhere(shared):
+    a, b = shared
+    open_breaker(a.get('src'))
+    expire_shared(a, 'src')
+
+    assert b.get('src').allow_request()
+    assert not a.get('src').allow_request()
+    b.get('src').on_success()
+
+    assert a.get('src').state == CircuitBreaker.CLOSED
+    assert a.get('src').allow_request()
+
+
+def test_shared_success_when_closed_does_not_write(shared):
+    a, _ = shared
+
+    a.get('src').on_success()
+
+    assert a.storage.query_one('SELECT COUNT(*) FROM circuit_breakers') == (0,)
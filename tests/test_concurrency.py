@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+AdaptiveLimiter AIMD 调整测试
+"""
+import threading
+import time
+
+from core.concurrency import AdaptiveLimiter
+
+
+def test_additive_increase_after_a_round():
+    limiter = AdaptiveLimiter(min_limit=1, max_limit=10, initial_limit=4)
+
+    for _ in range(3):
+        limiter.on_success(0.1)
+    assert limiter.limit == 4
+
+    limiter.on_success(0.1)
+    assert limiter.limit == 5
+
+    # 下一轮需要 5 个成功请求
+    for _ in range(4):
+        limiter.on_success(0.1)
+    assert limiter.limit == 5
+    limiter.on_success(0.1)
+    assert limiter.limit == 6
+
+
+def test_increase_stops_at_max_limit():
+    limiter = AdaptiveLimiter(min_limit=1, max_limit=3, initial_limit=3)
+
+    for _ in range(20):
+        limiter.on_success(0.1)
+
+    assert limiter.limit == 3
+
+
+def test_throttle_and_timeout_halve_limit():
+    limiter = AdaptiveLimiter(min_limit=1, max_limit=16, initial_limit=16)
+
+    limiter.on_failure(429)
+    assert limiter.limit == 8
+
+    limiter.on_failure(503)
+    assert limiter.limit == 4
+
+    limiter.on_failure(None)
+    assert limiter.limit == 2
+
+
+def test_client_errors_are_ignored():
+    limiter = AdaptiveLimiter(min_limit=1, max_limit=16, initial_limit=8)
+
+    limiter.on_failure(404)
+    limiter.on_failure(403)
+
+    assert limiter.limit == 8
+
+
+def test_decrease_stops_at_min_limit():
+    limiter = AdaptiveLimiter(min_limit=2, max_limit=16, initial_limit=3)
+
+    limiter.on_failure(429)
+    limiter.on_failure(429)
+    limiter.on_failure(429)
+
+    assert limiter.limit == 2
+
+
+def test_latency_spike_decreases_limit():
+    limiter = AdaptiveLimiter(min_limit=1, max_limit=16, initial_limit=8, latency_factor=3.0)
+    limiter.on_success(0.1)
+
+    limiter.on_success(1.0)
+
+    assert limiter.limit == 4
+
+
+def test_requests_started_before_decrease_do_not_decrease_again():
+    limiter = AdaptiveLimiter(min_limit=1, max_limit=16, initial_limit=16)
+    started_at = time.time() - 1
+
+    limiter.on_failure(429, started_at=started_at)
+    limiter.on_failure(429, started_at=started_at)
+    limiter.on_failure(None, started_at=started_at)
+    assert limiter.limit == 8
+
+    # 下调之后发出的请求失败，继续下调
+    limiter.on_failure(429)
+    assert limiter.limit == 4
+
+
+def test_decrease_resets_increase_progress():
+    limiter = AdaptiveLimiter(min_limit=1, max_limit=16, initial_limit=4)
+    for _ in range(3):
+        limiter.on_success(0.1)
+
+    limiter.on_failure(429)
+    assert limiter.limit == 2
+
+    limiter.on_success(0.1)
+    assert limiter.limit == 2
+    limiter.on_success(0.1)
+    assert limiter.limit == 3
+
+
+def test_acquire_blocks_at_limit():
+    limiter = AdaptiveLimiter(min_limit=1, max_limit=4, initial_limit=1)
+    acquired = threading.Event()
+
+    limiter.acquire()
+
+    def worker():
+        with limiter.slot():
+            acquired.set()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    assert not acquired.wait(0.1)
+    assert limiter.stats()['in_use'] == 1
+
+    limiter.release()
+    assert acquired.wait(1)
+    thread.join(1)
+    assert limiter.stats()['in_use'] == 0
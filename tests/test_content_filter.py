@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+编码检测测试
+"""
+import chardet
+import pytest
+
+from utils.content_filter import ContentFilter
+
+
+@pytest.fixture
+def low_confidence_guess(monkeypatch):
+    """模拟 chardet 在短页面上给出低置信度的误判"""
+    monkeypatch.setattr(chardet, 'detect', lambda content: {'encoding': 'Windows-1252', 'confidence': 0.4})
+
+
+def test_declared_encoding_wins():
+    assert ContentFilter.detect_encoding_from_bytes('正文'.encode('gbk'), 'gbk') == 'gbk'
+
+
+def test_low_confidence_guess_falls_back_to_gb18030(low_confidence_guess):
+    content = '<div id="content">第一章 少年</div>'.encode('gbk')
+    encoding = ContentFilter.detect_encoding_from_bytes(content, 'ISO-8859-1')
+
+    assert encoding == 'gb18030'
+    assert content.decode(encoding) == '<div id="content">第一章 少年</div>'
+
+
+def test_low_confidence_guess_falls_back_to_utf8(low_confidence_guess):
+    assert ContentFilter.detect_encoding_from_bytes('第一章'.encode('utf-8')) == 'utf-8'
+
+
+def test_high_confidence_guess_is_used(monkeypatch):
+    monkeypatch.setattr(chardet, 'detect', lambda content: {'encoding': 'Big5', 'confidence': 0.99})
+    assert ContentFilter.detect_encoding_from_bytes('第一章'.encode('big5')) == 'Big5'
+
+
+def test_detect_encoding_uses_response_bytes(low_confidence_guess):
+    class Response:
+        encoding = 'ISO-8859-1'
+        content = '第一章'.encode('gbk')
+
+    assert ContentFilter.detect_encoding(Response()) == 'gb18030'
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+ContentStore 清理和读穿校验测试
+"""
+import os
+import time
+
+import pytest
+
+from core.content_store import ContentStore
+from core.storage import Storage
+from core.validators import BlockPageValidator, ChapterValidation, MinLengthValidator
+from models.chapter import Chapter
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = Storage(str(tmp_path / 'test.db'))
+    yield storage
+    storage.close()
+
+
+def make_store(storage, tmp_path, **kwargs):
+    store = ContentStore(storage, str(tmp_path / 'cache'), **kwargs)
+    store.GC_GRACE = 0
+    return store
+
+
+def object_count(store):
+    return sum(1 for _ in store.objects_dir.rglob('*.z'))
+
+
+def text(n, size=400):
+    return f'第{n}章 ' + os.urandom(size).hex()
+
+
+def test_gc_removes_orphaned_objects(storage, tmp_path):
+    store = make_store(storage, tmp_path)
+    store.put_chapter('src', 'http://x/1.html', '第一章', text(1))
+    store.put_chapter('src', 'http://x/1.html', '第一章', text(2))  # 重新下载，旧内容不再被引用
+    assert object_count(store) == 2
+
+    stats = store.gc()
+
+    assert stats['removed_objects'] == 1
+    assert object_count(store) == 1
+    assert store.get_chapter('src', 'http://x/1.html')['content'].startswith('第2章')
+
+
+def test_gc_keeps_recent_orphans_within_grace(storage, tmp_path):
+    store = make_store(storage, tmp_path)
+    store.GC_GRACE = 3600
+    store._write_object(b'just written')
+
+    assert store.gc()['removed_objects'] == 0
+    assert object_count(store) == 1
+
+
+def test_gc_evicts_least_recently_used_over_size_limit(storage, tmp_path):
+    store = make_store(storage, tmp_path)
+    for n in range(1, 6):
+        store.put_chapter('src', f'http://x/{n}.html', f'第{n}章', text(n))
+        storage.execute('UPDATE cache_entries SET updated_at = ? WHERE url = ?', (n, f'http://x/{n}.html'))
+    object_size = next(store.objects_dir.rglob('*.z')).stat().st_size
+    store.max_bytes = object_size * 2 + object_size // 2
+
+    # 读取第 1 章，使用时间刷新为当前时间
+    assert store.get_chapter('src', 'http://x/1.html')
+
+    stats = store.gc()
+
+    assert stats['evicted_entries'] == 3
+    assert stats['removed_objects'] == 3
+    kept = [n for n in range(1, 6) if store.get_chapter('src', f'http://x/{n}.html')]
+    assert kept == [1, 5]
+
+
+def test_fetch_chapter_does_not_store_block_page(storage, tmp_path):
+    store = make_store(storage, tmp_path)
+    validation = ChapterValidation([BlockPageValidator(), MinLengthValidator()])
+
+    def block_page(chapter):
+        chapter.content = '访问过于频繁，请稍后再试'
+        return chapter
+
+    chapter = store.fetch_chapter('src', Chapter(url='http://x/1.html'), block_page, validation)
+
+    assert chapter.error
+    assert store.get_chapter('src', 'http://x/1.html') is None
+
+
+def test_fetch_chapter_refetches_invalid_stored_content(storage, tmp_path):
+    store = make_store(storage, tmp_path)
+    validation = ChapterValidation([BlockPageValidator(), MinLengthValidator()])
+    store.put_chapter('src', 'http://x/1.html', '第一章', '请输入验证码')
+
+    def loader(chapter):
+        chapter.title = '第一章'
+        chapter.content = '正文' * 100
+        return chapter
+
+    chapter = store.fetch_chapter('src', Chapter(url='http://x/1.html'), loader, validation)
+
+    assert chapter.error is None
+    assert store.get_chapter('src', 'http://x/1.html')['content'] == '正文' * 100
+
+
+def test_write_object_refreshes_mtime_of_existing_object(storage, tmp_path):
+    store = make_store(storage, tmp_path)
+    content_hash = store._write_object(b'same content')
+    path = store._object_path(content_hash)
+    os.utime(path, (time.time() - 7200, time.time() - 7200))
+
+    store._write_object(b'same content')
+
+    assert time.time() - path.stat().st_mtime < 60
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Downloader 章节范围筛选测试
+"""
+from core.downloader import Downloader
+from models.chapter import Chapter
+
+
+def paged_toc(pages, page_size, fetched):
+    """模拟分页目录：每开始产出一页记录一次"""
+    index = 0
+    for page in range(1, pages + 1):
+        fetched.append(page)
+        for _ in range(page_size):
+            index += 1
+            yield Chapter(title=f'第 {index} 章', url=f'/{index}.html', index=index)
+
+
+def test_range_stops_reading_toc_after_end():
+    fetched = []
+
+    chapters = list(Downloader._chapter_range(paged_toc(100, 50, fetched), 1, 50))
+
+    assert [c.index for c in chapters] == list(range(1, 51))
+    assert fetched == [1]
+
+
+def test_range_in_middle_of_toc():
+    fetched = []
+
+    chapters = list(Downloader._chapter_range(paged_toc(10, 10, fetched), 15, 32))
+
+    assert [c.index for c in chapters] == list(range(15, 33))
+    assert fetched == [1, 2, 3, 4]
+
+
+def test_open_range_reads_whole_toc():
+    fetched = []
+
+    chapters = list(Downloader._chapter_range(paged_toc(3, 10, fetched), 1, -1))
+
+    assert len(chapters) == 30
+    assert fetched == [1, 2, 3]
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+EpubWriter 输出测试（文件结构、导航和阅读顺序）
+"""
+import os
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from utils.epub_writer import EpubWriter
+
+
+OPF = '{http://www.idpf.org/2007/opf}'
+NCX = '{http://www.daisy.org/z3986/2005/ncx/}'
+XHTML = '{http://www.w3.org/1999/xhtml}'
+
+
+def write_book(path, chapters, **kwargs):
+    with EpubWriter(str(path), '测试书', '作者', **kwargs) as writer:
+        for index, title, content in chapters:
+            writer.add_chapter(index, title, content)
+    return zipfile.ZipFile(str(path))
+
+
+def parse(book, name):
+    return ET.fromstring(book.read(name))
+
+
+def test_mimetype_first_and_stored(tmp_path):
+    book = write_book(tmp_path / 'book.epub', [(1, '第一章', '正文')])
+
+    first = book.infolist()[0]
+    assert first.filename == 'mimetype'
+    assert first.compress_type == zipfile.ZIP_STORED
+    assert book.read('mimetype') == b'application/epub+zip'
+
+    container = parse(book, 'META-INF/container.xml')
+    rootfile = container.find('.//{urn:oasis:names:tc:opendocument:xmlns:container}rootfile')
+    assert rootfile.get('full-path') == 'OEBPS/content.opf'
+    assert book.testzip() is None
+
+
+def test_navigation_in_index_order(tmp_path):
+    # 乱序写入（并发下载时的完成顺序）
+    book = write_book(tmp_path / 'book.epub', [
+        (3, '第三章', 'c'),
+        (1, '第一章', 'a'),
+        (2, '第二章', 'b'),
+    ])
+
+    opf = parse(book, 'OEBPS/content.opf')
+    spine = [item.get('idref') for item in opf.find(f'{OPF}spine')]
+    assert spine == ['nav', 'chapter_0001', 'chapter_0002', 'chapter_0003']
+    manifest = {item.get('href') for item in opf.find(f'{OPF}manifest')}
+    assert {'nav.xhtml', 'toc.ncx', 'chapter_0001.xhtml', 'chapter_0003.xhtml'} <= manifest
+    for href in manifest:
+        assert f'OEBPS/{href}' in book.namelist()
+
+    ncx = parse(book, 'OEBPS/toc.ncx')
+    points = ncx.findall(f'.//{NCX}navPoint')
+    assert [p.find(f'{NCX}navLabel/{NCX}text').text for p in points] == ['第一章', '第二章', '第三章']
+    assert [p.get('playOrder') for p in points] == ['1', '2', '3']
+
+    nav = parse(book, 'OEBPS/nav.xhtml')
+    links = nav.findall(f'.//{XHTML}li/{XHTML}a')
+    assert [a.get('href') for a in links] == ['chapter_0001.xhtml', 'chapter_0002.xhtml', 'chapter_0003.xhtml']
+
+
+def test_duplicate_and_empty_chapters_skipped(tmp_path):
+    writer = EpubWriter(str(tmp_path / 'book.epub'), '测试书', '作者')
+
+    assert writer.add_chapter(1, '第一章', '正文')
+    assert not writer.add_chapter(1, '第一章（重复）', '另一份正文')
+    assert not writer.add_chapter(2, '第二章', '')
+    assert 1 in writer and 2 not in writer
+    assert len(writer) == 1
+    writer.close()
+
+    book = zipfile.ZipFile(str(tmp_path / 'book.epub'))
+    assert book.namelist().count('OEBPS/chapter_0001.xhtml') == 1
+    assert '另一份正文' not in book.read('OEBPS/chapter_0001.xhtml').decode('utf-8')
+
+
+def test_content_is_escaped(tmp_path):
+    book = write_book(tmp_path / 'book.epub', [(1, '<A&B>', '1 < 2 & 3\n\n  第二段  ')])
+
+    chapter = parse(book, 'OEBPS/chapter_0001.xhtml')
+    assert chapter.find(f'.//{XHTML}h1').text == '<A&B>'
+    assert [p.text for p in chapter.iter(f'{XHTML}p')] == ['1 < 2 & 3', '第二段']
+
+
+def test_close_replaces_temp_file(tmp_path):
+    path = tmp_path / 'book.epub'
+    writer = EpubWriter(str(path), '测试书', '作者')
+    writer.add_chapter(1, '第一章', '正文')
+
+    assert os.path.dirname(writer._temp_path) == str(tmp_path)
+    assert os.path.exists(writer._temp_path)
+    assert not path.exists()
+
+    writer.close()
+    assert path.exists()
+    assert os.listdir(str(tmp_path)) == ['book.epub']
+
+
+def test_abort_removes_temp_file(tmp_path):
+    path = tmp_path / 'book.epub'
+
+    with pytest.raises(RuntimeError):
+        with EpubWriter(str(path), '测试书', '作者') as writer:
+            writer.add_chapter(1, '第一章', '正文')
+            raise RuntimeError('下载中断')
+
+    assert not path.exists()
+    assert os.listdir(str(tmp_path)) == []
+
+
+def test_uncompressed_output(tmp_path):
+    book = write_book(tmp_path / 'book.epub', [(1, '第一章', '正文')], compress_level=0)
+
+    assert all(info.compress_type == zipfile.ZIP_STORED for info in book.infolist())
+    assert book.testzip() is None
+
+
+def test_concurrent_writers_to_same_path(tmp_path):
+    path = tmp_path / 'book.epub'
+    writers = [EpubWriter(str(path), f'书{i}', '作者') for i in range(2)]
+    assert writers[0]._temp_path != writers[1]._temp_path
+    barrier = threading.Barrier(len(writers))
+
+    def write(i, writer):
+        barrier.wait()
+        for index in range(1, 51):
+            writer.add_chapter(index, f'书{i} 第{index}章', f'书{i} 正文 {index}\n' * 20)
+        writer.close()
+
+    threads = [threading.Thread(target=write, args=(i, w)) for i, w in enumerate(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 最终文件是其中一个任务的完整输出，不会混入另一个任务的内容
+    book = zipfile.ZipFile(str(path))
+    assert book.testzip() is None
+    owner = parse(book, 'OEBPS/content.opf').find(f'{OPF}metadata/{{http://purl.org/dc/elements/1.1/}}title').text
+    chapters = [name for name in book.namelist() if name.startswith('OEBPS/chapter_')]
+    assert len(chapters) == 50
+    for name in chapters:
+        assert f'{owner} 正文' in book.read(name).decode('utf-8')
+    assert os.listdir(str(tmp_path)) == ['book.epub']
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+HttpClient 对冲请求测试（使用假的会话，不访问网络）
+"""
+import threading
+import time
+
+from core.circuit_breaker import CircuitBreaker
+from core.concurrency import AdaptiveLimiter
+from core.hedging import HedgePolicy
+from core.http_client import HttpClient
+
+
+class FakeResponse:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    """按给定的耗时返回响应，记录发出的请求"""
+
+    def __init__(self, latencies):
+        self.latencies = list(latencies)
+        self.calls = []
+        self.threads = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.calls.append(url)
+            self.threads.append(threading.current_thread())
+            latency = self.latencies.pop(0) if self.latencies else 0
+        time.sleep(latency)
+        return FakeResponse()
+
+    def close(self):
+        pass
+
+
+def make_hedge(latency=0.05, samples=20):
+    hedge = HedgePolicy(min_samples=samples, budget_ratio=1.0, max_tokens=10)
+    for _ in range(samples):
+        hedge.record(latency)
+    return hedge
+
+
+def test_no_thread_handoff_without_hedge_delay():
+    client = HttpClient(max_retries=1, hedge=HedgePolicy(min_samples=20))
+    client.session = FakeSession([0])
+
+    client.get('http://example.com/1')
+
+    assert client.session.threads == [threading.current_thread()]
+    assert client._hedge_executor is None
+
+
+def test_slow_request_is_hedged():
+    client = HttpClient(max_retries=1, hedge=make_hedge())
+    client.session = FakeSession([0.5, 0])
+
+    client.get('http://example.com/1')
+
+    assert len(client.session.calls) == 2
+    assert client.hedge.stats()['hedge_wins'] == 1
+    client.close()
+
+
+def test_time_queued_behind_limiter_does_not_trigger_hedge():
+    limiter = AdaptiveLimiter(min_limit=1, max_limit=1)
+    client = HttpClient(max_retries=1, limiter=limiter, hedge=make_hedge())
+    client.session = FakeSession([0.01])
+
+    # 另一个请求占用唯一的名额 0.3 秒，远超对冲等待时间
+    limiter.acquire()
+    threading.Timer(0.3, limiter.release).start()
+    client.get('http://example.com/1')
+
+    assert len(client.session.calls) == 1
+    assert client.hedge.stats()['hedged'] == 0
+    client.close()
+
+
+def test_hedge_respects_half_open_probe():
+    breaker = CircuitBreaker('test', failure_threshold=1, recovery_timeout=5)
+    breaker.on_failure()
+    breaker._opened_at -= 5  # 跳过冷却时间
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    client = HttpClient(max_retries=1, breaker=breaker, hedge=make_hedge())
+    client.session = FakeSession([0.3, 0])
+
+    # 主请求就是唯一的探测请求，不补发
+    client.get('http://example.com/1')
+
+    assert len(client.session.calls) == 1
+    assert breaker.state == CircuitBreaker.CLOSED
+    client.close()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Storage 连接生命周期测试
+"""
+import gc
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core.storage import Storage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = Storage(str(tmp_path / 'test.db'))
+    yield storage
+    storage.close()
+
+
+def test_connection_reused_within_thread(storage):
+    assert storage.connection() is storage.connection()
+    assert storage.connection_count == 1
+
+
+def test_connection_closed_when_thread_exits(storage):
+    storage.connection()
+    connections = []
+
+    def worker():
+        conn = storage.connection()
+        conn.execute('SELECT 1')
+        connections.append(conn)
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    gc.collect()
+
+    # 只剩主线程的连接，结束的线程的连接都已关闭
+    assert storage.connection_count == 1
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute('SELECT 1')
+
+
+def test_connection_closed_when_executor_shuts_down(storage):
+    # 创建表结构时主线程已打开一个连接
+    assert storage.connection_count == 1
+    for _ in range(5):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(lambda _: storage.query('SELECT 1'), range(16)))
+    gc.collect()
+
+    assert storage.connection_count == 1
+
+
+def test_close_closes_all_connections(storage):
+    storage.execute('INSERT INTO source_stats (source, updated_at) VALUES (?, ?)', ('a', 1))
+    conn = storage.connection()
+    storage.close()
+
+    assert storage.connection_count == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute('SELECT 1')
+
+    # 关闭后仍可继续使用（重新建立连接）
+    assert storage.query_one('SELECT source FROM source_stats') == ('a',)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+TaskStore 增量拉取测试
+"""
+import threading
+
+from core.task_store import TaskStore
+
+
+def test_changes_since_returns_changed_and_deleted():
+    store = TaskStore(num_shards=4)
+    store.create({'id': 'a', 'status': 'pending'})
+    store.create({'id': 'b', 'status': 'pending'})
+    version = store.version
+
+    store.update('a', progress=1)
+    store.delete('b')
+    changed, deleted, current = store.changes_since(version)
+
+    assert [t['id'] for t in changed] == ['a']
+    assert deleted == ['b']
+    assert current == store.version
+
+    # 没有新修改时不返回任何内容
+    assert store.changes_since(current)[:2] == ([], [])
+
+
+def test_unchanged_update_does_not_bump_version():
+    store = TaskStore()
+    store.create({'id': 'a', 'status': 'pending', 'progress': 0})
+    version = store.version
+
+    store.update('a', progress=0)
+    assert store.version == version
+
+
+def test_watermark_stops_at_uncommitted_version():
+    store = TaskStore(num_shards=4)
+    store.create({'id': 'a', 'status': 'pending'})
+    base = store.version
+
+    # 模拟写入中的修改：版本已分配，记录尚未写入分片
+    in_flight = store._next_version()
+    store.update('a', progress=1)
+    assert store.version == base
+
+    changed, _, current = store.changes_since(base)
+    assert current == base
+    assert [t['id'] for t in changed] == ['a']
+
+    store._commit_version(in_flight)
+    assert store.version == in_flight + 1
+
+
+def test_changes_since_with_concurrent_writers_loses_no_update():
+    store = TaskStore(num_shards=8)
+    task_ids = [f'task-{i}' for i in range(16)]
+    for task_id in task_ids:
+        store.create({'id': task_id, 'status': 'pending', 'progress': 0})
+
+    steps = 300
+    done = threading.Event()
+
+    def writer(task_id):
+        for step in range(1, steps + 1):
+            store.update(task_id, progress=step)
+        store.update(task_id, status='completed')
+
+    seen = {}
+    version = 0
+
+    def pull():
+        nonlocal version
+        changed, _, version = store.changes_since(version)
+        for task in changed:
+            # 同一任务的版本号只增不减
+            assert task['version'] >= seen.get(task['id'], {}).get('version', 0)
+            seen[task['id']] = task
+
+    def reader():
+        while not done.is_set():
+            pull()
+
+    reader_thread = threading.Thread(target=reader)
+    reader_thread.start()
+    writers = [threading.Thread(target=writer, args=(task_id,)) for task_id in task_ids]
+    for thread in writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    reader_thread.join()
+    pull()
+
+    # 每个任务的最终状态都被拉取到
+    for task_id in task_ids:
+        assert seen[task_id]['status'] == 'completed'
+        assert seen[task_id]['progress'] == steps
+    assert version == store.version == max(t['version'] for t in store.list())
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+TocParser 分页与去重测试（使用假的 HTTP 客户端，不访问网络）
+"""
+from models.rule import Rule, TocRule
+from parsers.toc_parser import TocParser
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+        self.apparent_encoding = 'utf-8'
+        self.encoding = 'utf-8'
+
+
+class FakeHttpClient:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def get(self, url):
+        return FakeResponse(self.pages[url])
+
+
+def links(*hrefs):
+    return ''.join(f'<dd><a href="{href}">{href}</a></dd>' for href in hrefs)
+
+
+def make_parser(pages, **toc):
+    rule = Rule(name='test', toc=TocRule(item='#list > dl > dd > a', **toc))
+    return TocParser(rule, FakeHttpClient(pages))
+
+
+def urls(parser, book_url):
+    return [(c.index, c.url.rsplit('/', 1)[-1]) for batch in parser.iter_batches(book_url) for c in batch]
+
+
+def test_latest_block_before_full_list_keeps_order():
+    # 笔趣阁类目录：最新章节区块在完整目录之前
+    html = f'<div id="list"><dl>{links("5.html", "4.html")}{links("1.html", "2.html", "3.html", "4.html", "5.html")}</dl></div>'
+    parser = make_parser({'http://x.com/book/1/': html})
+
+    assert urls(parser, 'http://x.com/book/1/') == [
+        (1, '1.html'), (2, '2.html'), (3, '3.html'), (4, '4.html'), (5, '5.html')
+    ]
+
+
+def test_duplicates_across_pages_keep_first_page():
+    page1 = f'<div id="list"><dl>{links("1.html", "2.html")}</dl></div><a class="next" href="index_2.html">下一页</a>'
+    page2 = f'<div id="list"><dl>{links("2.html", "3.html")}</dl></div>'
+    parser = make_parser(
+        {'http://x.com/book/1/': page1, 'http://x.com/book/1/index_2.html': page2},
+        pagination=True, next_page='a.next'
+    )
+
+    assert urls(parser, 'http://x.com/book/1/') == [(1, '1.html'), (2, '2.html'), (3, '3.html')]
+
+
+def test_desc_toc_is_reversed_after_dedupe():
+    html = f'<div id="list"><dl>{links("3.html", "3.html", "2.html", "1.html")}</dl></div>'
+    parser = make_parser({'http://x.com/book/1/': html}, is_desc=True)
+
+    assert urls(parser, 'http://x.com/book/1/') == [(1, '1.html'), (2, '2.html'), (3, '3.html')]
+
+
+def test_base_uri_placeholder_resolves_on_later_pages():
+    page1 = f'<div id="list"><dl>{links("1.html")}</dl></div><a class="next" href="/10_10229/index_2.html">下一页</a>'
+    page2 = f'<div id="list"><dl>{links("2.html")}</dl></div>'
+    parser = make_parser(
+        {'http://x.com/10_10229/': page1, 'http://x.com/10_10229/index_2.html': page2},
+        base_uri='http://read.x.com/%s/', pagination=True, next_page='a.next'
+    )
+
+    chapters = [c for batch in parser.iter_batches('http://x.com/10_10229/') for c in batch]
+    assert [c.url for c in chapters] == ['http://read.x.com/10_10229/1.html', 'http://read.x.com/10_10229/2.html']
+
+
+def test_relative_links_resolve_against_their_page():
+    page1 = f'<div id="list"><dl>{links("1.html")}</dl></div><a class="next" href="/book/1_2/">下一页</a>'
+    page2 = f'<div id="list"><dl>{links("2.html")}</dl></div>'
+    parser = make_parser(
+        {'http://x.com/book/1/': page1, 'http://x.com/book/1_2/': page2},
+        pagination=True, next_page='a.next'
+    )
+
+    chapters = [c for batch in parser.iter_batches('http://x.com/book/1/') for c in batch]
+    assert [c.url for c in chapters] == ['http://x.com/book/1/1.html', 'http://x.com/book/1_2/2.html']
@@ -3,5 +3,6 @@
 工具函数模块
 """
 from .file_utils import FileUtils
+from .epub_writer import EpubWriter
 
-__all__ = ['FileUtils']
+__all__ = ['FileUtils', 'EpubWriter']
@@ -4,7 +4,7 @@
 用于清理小说章节中的广告、无效内容等
 """
 import re
-from typing import List, Set
+from typing import List, Optional, Set
 
 
 class ContentFilter:
@@ -168,29 +168,56 @@ class ContentFilter:
 
         return paragraphs
 
+    # 没有可信的检测结果时依次尝试的编码（gb18030 兼容 GBK/GB2312）
+    FALLBACK_ENCODINGS = ('utf-8', 'gb18030')
+
     @classmethod
-    def detect_encoding(cls, response) -> str:
+    def detect_encoding_from_bytes(cls, content: bytes, declared: Optional[str] = None) -> str:
         """
-        智能检测响应的编码
+        根据原始字节检测编码（不依赖 Response 对象，可在进程池中使用）
 
         Args:
-            response: requests.Response对象
+            content: 原始字节
+            declared: 响应头声明的编码
 
         Returns:
             编码名称
         """
         # 优先使用Content-Type中声明的编码
-        if response.encoding and response.encoding.lower() != 'iso-8859-1':
-            return response.encoding
+        if declared and declared.lower() != 'iso-8859-1':
+            return declared
 
-        # 尝试使用chardet检测
+        # 尝试使用chardet检测（短页面上低置信度的结果常是 Windows-1252、ISO-8859-* 等误判）
+        guess = None
         try:
             import chardet
-            detected = chardet.detect(response.content)
-            if detected and detected['encoding'] and detected['confidence'] > 0.7:
-                return detected['encoding']
+            detected = chardet.detect(content)
+            if detected and detected['encoding']:
+                if detected['confidence'] > 0.7:
+                    return detected['encoding']
+                guess = detected['encoding']
         except ImportError:
             pass
 
-        # 使用apparent_encoding作为后备
-        return response.apparent_encoding or 'utf-8'
+        # 能完整解码的候选编码
+        for encoding in cls.FALLBACK_ENCODINGS:
+            try:
+                content.decode(encoding)
+                return encoding
+            except UnicodeDecodeError:
+                continue
+
+        return guess or 'utf-8'
+
+    @classmethod
+    def detect_encoding(cls, response) -> str:
+        """
+        智能检测响应的编码
+
+        Args:
+            response: requests.Response对象
+
+        Returns:
+            编码名称
+        """
+        return cls.detect_encoding_from_bytes(response.content, response.encoding)
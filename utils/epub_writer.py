@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+流式 EPUB 写入（逐章写入 zip，不在内存中保留整本书）
+"""
+import os
+import tempfile
+import threading
+import zipfile
+from datetime import datetime, timezone
+from html import escape
+from typing import List, Optional, Tuple
+
+
+CONTAINER_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+"""
+
+
+class EpubWriter:
+    """
+    流式 EPUB 写入器
+
+    打开时先写入 mimetype（不压缩，必须是第一个文件）和 container.xml，之后每调用一次 add_chapter
+    就把该章的 XHTML 直接写入 zip，只保留序号、标题和文件名；close 时按序号生成导航页、NCX 和 OPF。
+    写入过程中使用同目录下名称唯一的临时文件，close 成功后才替换为目标文件，下载中断时不会留下不完整的 EPUB；
+    多个任务写入同一目标文件时各自使用自己的临时文件，最终文件总是某一次完整的写入结果。
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        title: str,
+        author: str,
+        language: str = 'zh-CN',
+        identifier: Optional[str] = None,
+        compress_level: int = 6
+    ):
+        """
+        初始化写入器
+
+        Args:
+            output_path: 输出文件路径
+            title: 书名
+            author: 作者
+            language: 语言
+            identifier: 书籍标识，默认为 "书名-作者"
+            compress_level: deflate 压缩级别（0-9，0 为不压缩）
+        """
+        self.output_path = output_path
+        self.title = title or ''
+        self.author = author or ''
+        self.language = language
+        self.identifier = identifier or f"{self.title}-{self.author}"
+
+        self._chapters: List[Tuple[int, str, str]] = []  # (序号, 标题, 文件名)
+        self._written = set()
+        self._lock = threading.Lock()
+
+        # 临时文件与目标文件在同一目录，保证 os.replace 是原子的
+        directory, name = os.path.split(os.path.abspath(output_path))
+        fd, self._temp_path = tempfile.mkstemp(prefix=f"{name}.", suffix='.part', dir=directory)
+        os.close(fd)
+        try:
+            self._zip = zipfile.ZipFile(
+                self._temp_path, 'w',
+                compression=zipfile.ZIP_DEFLATED if compress_level > 0 else zipfile.ZIP_STORED,
+                compresslevel=compress_level if compress_level > 0 else None
+            )
+        except Exception:
+            os.remove(self._temp_path)
+            raise
+        self._zip.writestr(zipfile.ZipInfo('mimetype'), 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        self._zip.writestr('META-INF/container.xml', CONTAINER_XML)
+
+    def add_chapter(self, index: int, title: str, content: str) -> bool:
+        """
+        写入一章（同一序号只写入一次）
+
+        Args:
+            index: 章节序号
+            title: 章节标题
+            content: 章节正文（按行分段）
+
+        Returns:
+            是否写入（序号已写入或正文为空时返回 False）
+        """
+        if not content:
+            return False
+
+        file_name = f'chapter_{index:04d}.xhtml'
+        paragraphs = ''.join(f'<p>{escape(line.strip())}</p>' for line in content.split('\n') if line.strip())
+        title = title or f'第 {index} 章'
+        xhtml = self._xhtml(title, f'<h1>{escape(title)}</h1>{paragraphs}')
+
+        with self._lock:
+            if index in self._written:
+                return False
+            self._zip.writestr(f'OEBPS/{file_name}', xhtml)
+            self._written.add(index)
+            self._chapters.append((index, title, file_name))
+        return True
+
+    def __contains__(self, index: int) -> bool:
+        with self._lock:
+            return index in self._written
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._chapters)
+
+    def close(self):
+        """写入导航页、NCX 和 OPF，完成文件"""
+        with self._lock:
+            chapters = sorted(self._chapters)
+            self._zip.writestr('OEBPS/nav.xhtml', self._nav(chapters))
+            self._zip.writestr('OEBPS/toc.ncx', self._ncx(chapters))
+            self._zip.writestr('OEBPS/content.opf', self._opf(chapters))
+            self._zip.close()
+        os.replace(self._temp_path, self.output_path)
+
+    def abort(self):
+        """放弃写入，删除临时文件"""
+        with self._lock:
+            self._zip.close()
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _xhtml(self, title: str, body: str) -> str:
+        """生成 XHTML 页面"""
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<!DOCTYPE html>\n'
+            f'<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" '
+            f'lang="{self.language}" xml:lang="{self.language}">\n'
+            f'<head><title>{escape(title)}</title></head>\n'
+            f'<body>{body}</body>\n'
+            '</html>\n'
+        )
+
+    def _nav(self, chapters: List[Tuple[int, str, str]]) -> str:
+        """生成 EPUB 3 导航页"""
+        items = ''.join(f'<li><a href="{file_name}">{escape(title)}</a></li>' for _, title, file_name in chapters)
+        return self._xhtml(self.title, f'<nav epub:type="toc" id="toc"><h1>{escape(self.title)}</h1><ol>{items}</ol></nav>')
+
+    def _ncx(self, chapters: List[Tuple[int, str, str]]) -> str:
+        """生成 EPUB 2 目录（NCX）"""
+        points = ''.join(
+            f'<navPoint id="navpoint-{i}" playOrder="{i}"><navLabel><text>{escape(title)}</text></navLabel>'
+            f'<content src="{file_name}"/></navPoint>'
+            for i, (_, title, file_name) in enumerate(chapters, 1)
+        )
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">\n'
+            f'<head><meta name="dtb:uid" content="{escape(self.identifier)}"/><meta name="dtb:depth" content="1"/>'
+            '<meta name="dtb:totalPageCount" content="0"/><meta name="dtb:maxPageNumber" content="0"/></head>\n'
+            f'<docTitle><text>{escape(self.title)}</text></docTitle>\n'
+            f'<navMap>{points}</navMap>\n'
+            '</ncx>\n'
+        )
+
+    def _opf(self, chapters: List[Tuple[int, str, str]]) -> str:
+        """生成 OPF（元数据、文件清单和阅读顺序）"""
+        modified = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        manifest = ''.join(
+            f'<item id="chapter_{index:04d}" href="{file_name}" media-type="application/xhtml+xml"/>'
+            for index, _, file_name in chapters
+        )
+        spine = ''.join(f'<itemref idref="chapter_{index:04d}"/>' for index, _, _ in chapters)
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0" unique-identifier="id">\n'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/">'
+            f'<dc:identifier id="id">{escape(self.identifier)}</dc:identifier>'
+            f'<dc:title>{escape(self.title)}</dc:title>'
+            f'<dc:language>{self.language}</dc:language>'
+            f'<dc:creator>{escape(self.author)}</dc:creator>'
+            f'<meta property="dcterms:modified">{modified}</meta>'
+            '</metadata>\n'
+            '<manifest>'
+            '<item id="nav" href="nav.xhtml" media-type="application/xhtml+xml" properties="nav"/>'
+            '<item id="ncx" href="toc.ncx" media-type="application/x-dtbncx+xml"/>'
+            f'{manifest}</manifest>\n'
+            f'<spine toc="ncx"><itemref idref="nav"/>{spine}</spine>\n'
+            '</package>\n'
+        )
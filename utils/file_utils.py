@@ -7,6 +7,7 @@ import re
 from pathlib import Path
 from typing import List
 from models.chapter import Chapter
+from .epub_writer import EpubWriter
 
 
 class FileUtils:
@@ -93,83 +94,20 @@ class FileUtils:
         print(f"已保存为 TXT: {output_path}")
 
     @staticmethod
-    def save_as_epub(chapters: List[Chapter], output_path: str, book_name: str, author: str):
+    def save_as_epub(chapters: List[Chapter], output_path: str, book_name: str, author: str,
+                     compress_level: int = 6):
         """
-        保存为 EPUB 文件
+        保存为 EPUB 文件（逐章写入，见 EpubWriter）
 
         Args:
             chapters: 章节列表
             output_path: 输出路径
             book_name: 书名
             author: 作者
+            compress_level: 压缩级别（0-9）
         """
-        try:
-            from ebooklib import epub
-        except ImportError:
-            print("错误: 需要安装 ebooklib 库才能生成 EPUB 文件")
-            print("请运行: pip install ebooklib")
-            # 降级为 TXT 格式
-            txt_path = output_path.replace('.epub', '.txt')
-            print(f"将改为保存为 TXT 格式: {txt_path}")
-            FileUtils.save_as_txt(chapters, txt_path, book_name, author)
-            return
-
-        # 创建 EPUB 书籍
-        book = epub.EpubBook()
-
-        # 设置元数据
-        book.set_identifier(f"{book_name}-{author}")
-        book.set_title(book_name)
-        book.set_language('zh-CN')
-        book.add_author(author)
-
-        # 添加章节
-        epub_chapters = []
-        spine = ['nav']
-
-        for chapter in chapters:
-            if not chapter.content:
-                continue
-
-            # 创建 EPUB 章节
-            epub_chapter = epub.EpubHtml(
-                title=chapter.title,
-                file_name=f'chapter_{chapter.index:04d}.xhtml',
-                lang='zh-CN'
-            )
-
-            # 设置章节内容 (HTML 格式)
-            # 将内容转换为段落
-            paragraphs = ''.join(f'<p>{line}</p>' for line in chapter.content.split('\n') if line.strip())
-
-            content_html = f"""
-            <html>
-            <head>
-                <title>{chapter.title}</title>
-            </head>
-            <body>
-                <h1>{chapter.title}</h1>
-                {paragraphs}
-            </body>
-            </html>
-            """
-            epub_chapter.set_content(content_html.encode('utf-8'))
-
-            # 添加到书籍
-            book.add_item(epub_chapter)
-            epub_chapters.append(epub_chapter)
-            spine.append(epub_chapter)
-
-        # 添加目录
-        book.toc = tuple(epub_chapters)
-
-        # 添加导航文件
-        book.add_item(epub.EpubNcx())
-        book.add_item(epub.EpubNav())
-
-        # 设置书脊
-        book.spine = spine
-
-        # 写入文件
-        epub.write_epub(output_path, book, {})
+        with EpubWriter(output_path, book_name, author, compress_level=compress_level) as writer:
+            for chapter in chapters:
+                writer.add_chapter(chapter.index, chapter.title, chapter.content)
+
         print(f"已保存为 EPUB: {output_path}")
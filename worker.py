@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+"""
+Z Reader - 下载 worker 进程
+从共享的任务表中领取下载任务并执行，进度通过任务表回报给 Web 进程：
+
+    python worker.py [并发任务数]
+
+与 wsgi.py 配合使用时，Web 进程不执行下载，需要单独启动一个或多个 worker。
+"""
+import sys
+from server import run_worker, DOWNLOAD_MAX_JOBS
+
+
+if __name__ == '__main__':
+    run_worker(int(sys.argv[1]) if len(sys.argv) > 1 else DOWNLOAD_MAX_JOBS)
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""
+Z Reader - WSGI 入口
+生产环境使用 WSGI 服务器启动多个 worker 进程，任务状态和内容缓存通过 SQLite/磁盘共享：
+
+    gunicorn -w 4 -k gthread --threads 8 -b [::]:5000 wsgi:app
+    waitress-serve --listen=*:5000 --threads=16 wsgi:app
+
+Web 进程只负责接口，下载任务由单独启动的 worker.py 进程执行。
+注意不要使用 gunicorn 的 --preload，后台线程需要在每个 worker 进程中各自启动。
+"""
+from server import create_app
+
+app = create_app(run_jobs=False)